@@ -50,6 +50,7 @@ AUTH_USER_MODEL = 'modelmate.User'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
+    'modelmate.metrics.RequestMetricsMiddleware',  # per-endpoint query counts and timings
     
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'modelmate.counters.DeferredCountersMiddleware',  # coalesce counter updates per request
 
     # 'cors.middleware.CorsMiddleware',  # CORS middleware
 ]
@@ -155,7 +157,17 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'modelmate.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'modelmate.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
+    'DEFAULT_PAGINATION_CLASS': 'modelmate.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -168,4 +180,64 @@ SIMPLE_JWT = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Nested comment rendering limits; deeper or larger subtrees are fetched from /comments/<id>/replies/
+COMMENT_TREE_MAX_DEPTH = 5
+COMMENT_TREE_MAX_SIZE = 200
+
+# Caches: a per-process local-memory tier, and a shared one (Redis when REDIS_URL is set)
+# that holds the response cache's invalidation versions for every process
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'modelmate-local',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'modelmate-shared',
+    },
+}
+
+# Representations of nested categories and user mini-profiles kept per process (0 disables), and for how long
+FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', 10000))
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 300))
+
+# Anonymous GETs on the model, category and discussion lists and model details
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+RESPONSE_CACHE_LOCAL_TIMEOUT = 30
+
+# Discussion views are buffered per process and written at most this often (0 writes every view at once)
+DISCUSSION_VIEWS_FLUSH_INTERVAL = int(os.getenv('DISCUSSION_VIEWS_FLUSH_INTERVAL', 10))
+# Repeat views by the same user or IP within this many seconds are not counted (0 counts every view)
+DISCUSSION_VIEW_DEDUP_WINDOW = int(os.getenv('DISCUSSION_VIEW_DEDUP_WINDOW', 1800))
+TRENDING_WINDOW_HOURS = 48
+
+# Model ranking (rank_score, the default order): a Bayesian average that counts RANKING_PRIOR_WEIGHT
+# extra reviews at RANKING_PRIOR_MEAN. Run `manage.py rebuild_model_ranking` after changing these.
+RANKING_PRIOR_MEAN = float(os.getenv('RANKING_PRIOR_MEAN', 3.5))
+RANKING_PRIOR_WEIGHT = float(os.getenv('RANKING_PRIOR_WEIGHT', 10))
+
+# Entries kept per leaderboard snapshot (refreshed by `manage.py refresh_leaderboards`)
+LEADERBOARD_SIZE = 20
+
+# Most models /models/compare/ accepts at once
+COMPARE_MAX_MODELS = 4
+
+# Rows fetched per round trip by the streaming NDJSON/CSV exports (a server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 2000
+
+# Requests per endpoint kept by the metrics middleware for /api/metrics/ percentiles, and whether
+# responses carry a Server-Timing header. Views over their query_budget log a warning, or fail with
+# QUERY_BUDGETS_STRICT.
+METRICS_WINDOW = int(os.getenv('METRICS_WINDOW', 1000))
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'True') == 'True'
+QUERY_BUDGETS_STRICT = os.getenv('QUERY_BUDGETS_STRICT', 'False') == 'True'
+
+# Recount denormalized counters immediately instead of on commit / end of request (handy in tests)
+COUNTERS_SYNC = os.getenv('COUNTERS_SYNC', 'False') == 'True'
+
 
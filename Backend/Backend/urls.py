@@ -20,4 +20,5 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('modelmate.urls')),  # Include the modelmate app URLs
+    path('api/async/', include('modelmate.async_urls')),  # Async read paths for ASGI deployments
 ]
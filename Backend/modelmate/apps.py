@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ModelmateConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modelmate'
+
+    def ready(self):
+        from . import caching  # noqa: F401  (registers the cache invalidation receivers)
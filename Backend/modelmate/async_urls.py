@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+# Async (ASGI) read paths mirroring the GET side of the routes in urls.py
+urlpatterns = [
+    path('models/', async_views.AIModelListView.as_view(), name='async-model-list'),
+    path('models/<int:pk>/', async_views.AIModelDetailView.as_view(), name='async-model-detail'),
+    path('models/<int:model_id>/reviews/', async_views.ReviewListView.as_view(), name='async-model-review-list'),
+    path('discussions/<int:pk>/', async_views.DiscussionDetailView.as_view(), name='async-discussion-detail'),
+]
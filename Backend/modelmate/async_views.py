@@ -0,0 +1,142 @@
+"""
+Async versions of the hottest read endpoints, for ASGI deployments.
+
+They return the same JSON as their DRF counterparts in views.py, but query
+through the async ORM, so a request waiting on the database does not hold
+a worker thread. Everything a serializer would load lazily is fetched up
+front, independent queries together with asyncio.gather, and the DRF
+serializers then run without touching the database. Authentication uses the
+DRF authenticators (in a thread, as they are synchronous).
+
+Mounted under /api/async/ (see async_urls.py); writes stay on the DRF views.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import pageviews
+from .comment_tree import CommentTree
+from .models import AIModel, Discussion, Review
+from .pagination import KeysetPagination
+from .serializers import (
+    RECENT_REVIEWS, AIModelListSerializer, AIModelSerializer, DiscussionDetailSerializer, ReviewListSerializer,
+)
+from .views import AIModelListView as SyncAIModelListView
+
+
+class AsyncReadView(View):
+    """GET-only async view rendering DRF serializer output with the default (JSON) renderer"""
+    http_method_names = ['get', 'head', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            request = await self.authenticate(request)
+            data = await self.read(request, **kwargs)
+            status = 200
+        except Http404:
+            data, status = {'detail': exceptions.NotFound.default_detail}, 404
+        except exceptions.APIException as exc:
+            # The shape DRF's exception handler gives
+            detail = exc.detail
+            data, status = detail if isinstance(detail, (list, dict)) else {'detail': detail}, exc.status_code
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        response = HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    async def authenticate(self, request):
+        request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        # Touching .user runs the authenticators, which query the database
+        await sync_to_async(getattr)(request, 'user')
+        return request
+
+    async def read(self, request, **kwargs):
+        raise NotImplementedError
+
+    def context(self, request, **extra):
+        return {'request': request, 'view': self, **extra}
+
+
+class AsyncListView(AsyncReadView):
+    """Keyset-paginated list, filtered by `filter_backends` like a DRF list view"""
+    serializer_class = None
+    filter_backends = ()
+
+    def get_queryset(self, **kwargs):
+        raise NotImplementedError
+
+    async def read(self, request, **kwargs):
+        queryset = self.get_queryset(**kwargs)
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        setup_eager_loading = getattr(self.serializer_class, 'setup_eager_loading', None)
+        if setup_eager_loading:
+            queryset = setup_eager_loading(queryset, request)
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        data = self.serializer_class(page, many=True, context=self.context(request)).data
+        return paginator.get_paginated_response(data).data
+
+
+class AIModelListView(AsyncListView):
+    query_budget = 2
+    serializer_class = AIModelListSerializer
+    filter_backends = SyncAIModelListView.filter_backends
+    ordering_fields = SyncAIModelListView.ordering_fields
+
+    def get_queryset(self, **kwargs):
+        return AIModel.objects.all()
+
+
+class ReviewListView(AsyncListView):
+    query_budget = 2
+    serializer_class = ReviewListSerializer
+
+    def get_queryset(self, model_id=None, **kwargs):
+        reviews = Review.objects.select_related('user', 'model')
+        return reviews.filter(model_id=model_id) if model_id else reviews.all()
+
+
+class AIModelDetailView(AsyncReadView):
+    query_budget = 4
+
+    async def read(self, request, pk):
+        user = request.user
+        model_query = aget_object_or_404(AIModel.objects.select_related('category', 'rating_histogram'), pk=pk)
+        recent_query = Review.objects.filter(model_id=pk).select_related('user').order_by('-created_at')[:RECENT_REVIEWS]
+        reviewed_query = (
+            Review.objects.filter(model_id=pk, user=user).aexists() if user.is_authenticated else _constant(False)
+        )
+        model, recent_reviews, reviewed = await asyncio.gather(model_query, _alist(recent_query), reviewed_query)
+        for review in recent_reviews:
+            review.model = model
+        model.recent_review_list, model.reviewed_by_user = recent_reviews, reviewed
+        return AIModelSerializer(model, context=self.context(request)).data
+
+
+class DiscussionDetailView(AsyncReadView):
+    query_budget = 3
+
+    async def read(self, request, pk):
+        discussion, tree = await asyncio.gather(
+            aget_object_or_404(Discussion.objects.select_related('user', 'model__category'), pk=pk),
+            CommentTree.afor_discussion(pk),
+        )
+        data = DiscussionDetailSerializer(discussion, context=self.context(request, comment_tree=tree)).data
+        await sync_to_async(pageviews.record_view)(pk, pageviews.viewer_key(request))
+        return data
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def _constant(value):
+    return value
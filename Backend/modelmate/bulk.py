@@ -0,0 +1,357 @@
+"""
+Bulk loading of catalog data from CSV or JSONL.
+
+Input is parsed as a stream, one record at a time, and written in batches:
+rows are validated in Python against the model fields (no per-row queries),
+foreign keys are resolved through in-memory maps, and each batch is one
+multi-row INSERT. Rows that fail validation are written to a side file in
+the input's format, with the line number and the reason.
+
+Bulk writes skip the per-row signals, so each loader brings the denormalized
+counters, rollups and caches up to date itself, once per affected key.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from . import caching, counters
+from .models import (
+    RATING_FIELDS, AIModel, ModelCategory, Review, User, rebuild_rating_histograms, rebuild_stats_rollups,
+)
+
+BATCH_SIZE = 1000
+FORMATS = ('csv', 'jsonl')
+
+
+# ------------------------------
+# Parsing
+# ------------------------------
+
+@dataclass
+class Row:
+    line: int
+    data: dict = None
+    raw: str = None
+    error: str = None
+
+
+def detect_format(filename, default=None):
+    """'csv' or 'jsonl' from a file name's extension"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield a Row for every record of a CSV (with header) or JSONL text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for data in reader:
+            yield Row(reader.line_num, data={key: value for key, value in data.items() if key is not None})
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield Row(number, raw=line.rstrip('\n'), error=f'invalid JSON: {exc}')
+            continue
+        if not isinstance(data, dict):
+            yield Row(number, raw=line.rstrip('\n'), error='expected a JSON object')
+        else:
+            yield Row(number, data=data)
+
+
+class RejectWriter:
+    """Side file of rejected rows, in the input's format, each with its line number and reason"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        self.writer = None
+
+    def write(self, row, error):
+        self.count += 1
+        if self.stream is None:
+            return
+        if self.fmt == 'jsonl':
+            record = {'line': row.line, 'error': error, 'row': row.data if row.data is not None else row.raw}
+            self.stream.write(json.dumps(record, default=str) + '\n')
+            return
+        data = row.data or {}
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.stream, ['line', 'error', *data], extrasaction='ignore', restval='')
+            self.writer.writeheader()
+        self.writer.writerow({**data, 'line': row.line, 'error': error})
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    rejected: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        """Input rows per second"""
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows, 'created': self.created, 'updated': self.updated,
+            'rejected': self.rejected, 'seconds': round(self.elapsed, 3), 'rows_per_second': round(self.rate, 1),
+        }
+
+
+def clean_fields(model, data, names):
+    """Validate and convert the raw values of `names` with the model fields' own rules"""
+    values, errors = {}, []
+    for name in names:
+        model_field = model._meta.get_field(name)
+        raw = data.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw is None or raw == '':
+            raw = None if model_field.null else ''
+        try:
+            values[name] = model_field.clean(raw, None)
+        except ValidationError as exc:
+            errors.append(f"{name}: {' '.join(exc.messages)}")
+    if errors:
+        raise ValidationError('; '.join(errors))
+    return values
+
+
+# ------------------------------
+# AI models
+# ------------------------------
+
+MODEL_FIELDS = ('name', 'creator', 'version', 'description', 'url', 'release_date', 'size', 'architecture', 'license')
+
+
+class ModelImporter:
+    """
+    Upsert AIModel rows on (name, creator). Each record is a full catalog
+    entry: optional columns it leaves out are cleared on existing models.
+    `category` is a category slug.
+    """
+    update_fields = [name for name in MODEL_FIELDS if name not in ('name', 'creator')] + ['category', 'updated_at']
+
+    def __init__(self, batch_size=BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.category_ids = dict(ModelCategory.objects.order_by().values_list('slug', 'pk'))
+        self.moved_categories = set()
+
+    def clean(self, data):
+        values = clean_fields(AIModel, data, MODEL_FIELDS)
+        slug = (data.get('category') or '').strip()
+        if slug and slug not in self.category_ids:
+            raise ValidationError(f'category: unknown slug {slug!r}')
+        values['category_id'] = self.category_ids.get(slug)
+        return values
+
+    def run(self, rows, rejects):
+        stats = ImportStats()
+        batch = {}
+        with counters.deferred():
+            for row in rows:
+                stats.rows += 1
+                try:
+                    if row.error:
+                        raise ValidationError(row.error)
+                    values = self.clean(row.data)
+                except ValidationError as exc:
+                    stats.rejected += 1
+                    rejects.write(row, ' '.join(exc.messages))
+                    continue
+                # A later record for the same model replaces an earlier one in the batch
+                batch[(values['name'], values['creator'])] = values
+                if len(batch) >= self.batch_size:
+                    self.write(batch, stats)
+                    batch = {}
+            if batch:
+                self.write(batch, stats)
+            if self.moved_categories:
+                rebuild_stats_rollups(category_ids=sorted(self.moved_categories))
+        if stats.created or stats.updated:
+            caching.invalidate('models', 'categories', 'reviews', 'discussions')
+        return stats
+
+    def write(self, batch, stats):
+        existing = {
+            (name, creator): (pk, category_id)
+            for name, creator, pk, category_id in AIModel.objects.filter(
+                name__in={name for name, _ in batch}
+            ).order_by().values_list('name', 'creator', 'pk', 'category_id')
+            if (name, creator) in batch
+        }
+        with transaction.atomic():
+            AIModel.objects.bulk_create(
+                [AIModel(**values) for values in batch.values()],
+                update_conflicts=True,
+                unique_fields=['name', 'creator'],
+                update_fields=self.update_fields,
+            )
+
+        touched = set()
+        for key, values in batch.items():
+            new_category = values['category_id']
+            if key not in existing:
+                stats.created += 1
+                touched.add(new_category)
+                continue
+            stats.updated += 1
+            pk, old_category = existing[key]
+            if old_category != new_category:
+                touched.update((old_category, new_category))
+                self.moved_categories.update(pk for pk in (old_category, new_category) if pk is not None)
+        for category_id in touched:
+            counters.mark(ModelCategory, category_id, 'models_count')
+        caching.invalidate(*(f'model:{pk}' for pk, _ in existing.values()))
+        if self.progress:
+            self.progress(stats)
+
+
+# ------------------------------
+# Reviews
+# ------------------------------
+
+REVIEW_FIELDS = RATING_FIELDS + ('title', 'description', 'pros', 'cons')
+DUPLICATE_REVIEW = 'this user has already reviewed this model'
+
+
+class ReviewImporter:
+    """
+    Insert reviews without the per-row stats signals, then recompute the
+    aggregates of every affected model and user once, with one set-based
+    UPDATE per table. Records name the author by `username` and the model by
+    `model_id`; a user's second review of a model is rejected.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.model_ids = set()
+        self.user_ids = set()
+
+    def run(self, rows, rejects):
+        stats = ImportStats()
+        batch = []
+        for row in rows:
+            stats.rows += 1
+            if row.error:
+                stats.rejected += 1
+                rejects.write(row, row.error)
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.write(batch, stats, rejects)
+                batch = []
+        if batch:
+            self.write(batch, stats, rejects)
+        if stats.created:
+            self.recompute()
+        return stats
+
+    def write(self, batch, stats, rejects):
+        usernames = {str(row.data.get('username', '')).strip() for row in batch}
+        user_ids = dict(User.objects.filter(username__in=usernames).order_by().values_list('username', 'pk'))
+        model_ids = set()
+        for row in batch:
+            try:
+                model_ids.add(int(row.data.get('model_id')))
+            except (TypeError, ValueError):
+                pass
+        model_ids = set(AIModel.objects.filter(pk__in=model_ids).order_by().values_list('pk', flat=True))
+        taken = set(Review.objects.filter(
+            user_id__in=user_ids.values(), model_id__in=model_ids
+        ).order_by().values_list('user_id', 'model_id'))
+
+        accepted = []
+        for row in batch:
+            try:
+                review = self.build(row.data, user_ids, model_ids)
+                if (review.user_id, review.model_id) in taken:
+                    raise ValidationError(DUPLICATE_REVIEW)
+            except ValidationError as exc:
+                stats.rejected += 1
+                rejects.write(row, ' '.join(exc.messages))
+                continue
+            taken.add((review.user_id, review.model_id))
+            accepted.append((row, review))
+
+        # overall_rating for the whole batch at once, column by column
+        columns = [[getattr(review, field) for _, review in accepted] for field in RATING_FIELDS]
+        for (_, review), total in zip(accepted, map(sum, zip(*columns))):
+            review.overall_rating = total / len(RATING_FIELDS)
+
+        while True:
+            try:
+                with transaction.atomic():
+                    Review.objects.bulk_create([review for _, review in accepted])
+                break
+            except IntegrityError:
+                # Reviews created concurrently since the lookup above: reject those rows like any duplicate
+                taken = set(Review.objects.filter(
+                    user_id__in=user_ids.values(), model_id__in=model_ids
+                ).order_by().values_list('user_id', 'model_id'))
+                kept = [(row, review) for row, review in accepted if (review.user_id, review.model_id) not in taken]
+                if len(kept) == len(accepted):
+                    raise
+                for row, review in accepted:
+                    if (review.user_id, review.model_id) in taken:
+                        stats.rejected += 1
+                        rejects.write(row, DUPLICATE_REVIEW)
+                accepted = kept
+        reviews = [review for _, review in accepted]
+        stats.created += len(reviews)
+        self.model_ids.update(review.model_id for review in reviews)
+        self.user_ids.update(review.user_id for review in reviews)
+        if self.progress:
+            self.progress(stats)
+
+    def build(self, data, user_ids, model_ids):
+        values = clean_fields(Review, data, REVIEW_FIELDS)
+        username = str(data.get('username', '')).strip()
+        if username not in user_ids:
+            raise ValidationError(f'username: unknown user {username!r}')
+        try:
+            model_id = int(data.get('model_id'))
+        except (TypeError, ValueError):
+            model_id = None
+        if model_id not in model_ids:
+            raise ValidationError(f"model_id: unknown model {data.get('model_id')!r}")
+        return Review(user_id=user_ids[username], model_id=model_id, **values)
+
+    def recompute(self):
+        model_ids, user_ids = sorted(self.model_ids), sorted(self.user_ids)
+        with counters.deferred():
+            for start in range(0, len(model_ids), BATCH_SIZE):
+                AIModel.recompute_stats(model_ids[start:start + BATCH_SIZE])
+            rebuild_rating_histograms(AIModel.objects.filter(pk__in=model_ids))
+            for user_id in user_ids:
+                counters.mark(User, user_id, 'reviews_count')
+        category_ids = set(
+            AIModel.objects.filter(pk__in=model_ids, category__isnull=False).values_list('category_id', flat=True)
+        )
+        rebuild_stats_rollups(user_ids=user_ids, category_ids=sorted(category_ids))
+        caching.invalidate(
+            'models', 'reviews',
+            *(f'model:{pk}' for pk in model_ids), *(f'user:{pk}' for pk in user_ids),
+        )
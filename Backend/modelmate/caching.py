@@ -0,0 +1,306 @@
+"""
+Response cache for anonymous GETs on the public read endpoints.
+
+Entries are keyed on the view, the absolute URL (query string included) and
+the negotiated format, plus the current version of every invalidation group
+the view depends on ("models", "model:42", "categories", ...). The signal
+handlers below bump a group's version when rows it covers change, which
+orphans every dependent entry at once without enumerating keys.
+
+Versions live in the shared cache (Redis when REDIS_URL is set) so every
+process sees an invalidation; entries are stored there and in a short-lived
+local-memory tier, which is safe because a versioned key never changes
+meaning. On a miss one request per key rebuilds the entry while concurrent
+requests for it wait for the result instead of all hitting the database.
+
+The same group versions, together with max(updated_at) of the rows a view
+reads, also make up the ETag / Last-Modified validators of conditional
+GETs, which are answered with 304 before anything is serialized. Each bump
+also records when it happened, so Last-Modified moves with the versions.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from . import counters
+from .models import User, ModelCategory, AIModel, Review, Discussion, Comment, Vote
+
+KEY_PREFIX = 'response'
+LOCK_TIMEOUT = 5  # seconds a rebuild may hold the lock, and the longest anyone waits for it
+POLL_INTERVAL = 0.05
+
+
+def enabled():
+    return getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+
+
+def local_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_LOCAL_ALIAS', 'default')]
+
+
+def shared_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_SHARED_ALIAS', 'shared')]
+
+
+def _version_key(group):
+    return f'{KEY_PREFIX}:version:{group}'
+
+
+def _bumped_key(group):
+    return f'{KEY_PREFIX}:bumped:{group}'
+
+
+def group_versions(groups):
+    """Current version of each group, fetched in one round trip"""
+    return group_state(groups)[0]
+
+
+def group_state(groups):
+    """Current version of each group, and when the latest of them was bumped (a timestamp)"""
+    cache = shared_cache()
+    keys = {group: _version_key(group) for group in groups}
+    bumped_keys = [_bumped_key(group) for group in groups]
+    found = cache.get_many([*keys.values(), *bumped_keys])
+    for key in keys.values():
+        if key not in found:
+            # Never restart from a fixed value: entries cached under an evicted version must stay orphaned
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    for key in bumped_keys:
+        if key not in found:
+            # Not bumped since the cache started, or evicted: it may have changed just now
+            now = time.time()
+            cache.add(key, now, timeout=None)
+            found[key] = cache.get(key) or now
+    bumped = max((found[key] for key in bumped_keys), default=None)
+    return {group: found[key] for group, key in keys.items()}, bumped
+
+
+def _bump(groups):
+    cache = shared_cache()
+    for group in groups:
+        try:
+            cache.incr(_version_key(group))
+        except ValueError:
+            cache.add(_version_key(group), time.time_ns(), timeout=None)
+    cache.set_many(dict.fromkeys(map(_bumped_key, groups), time.time()), timeout=None)
+
+
+def invalidate(*groups):
+    """
+    Orphan every entry that depends on `groups`. Bumped now and again on
+    commit, so a response rebuilt from pre-commit rows in between is dropped.
+    """
+    groups = [group for group in groups if group]
+    if not groups:
+        return
+    _bump(groups)
+    transaction.on_commit(lambda: _bump(groups))
+
+
+def get_or_build(key_parts, groups, build):
+    """
+    Cached value for `key_parts` under the current `groups` versions.
+    `build()` returns (value, cacheable) and runs on a miss, by one caller
+    per key at a time.
+    """
+    versions = sorted(group_versions(groups).items())
+    digest = hashlib.sha256(repr((key_parts, versions)).encode()).hexdigest()
+    key = f'{KEY_PREFIX}:{digest}'
+    local, shared = local_cache(), shared_cache()
+    timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+    local_timeout = min(timeout, getattr(settings, 'RESPONSE_CACHE_LOCAL_TIMEOUT', 30))
+
+    value = local.get(key)
+    if value is not None:
+        return value
+    value = shared.get(key)
+    if value is not None:
+        local.set(key, value, local_timeout)
+        return value
+
+    lock = f'{key}:lock'
+    if not shared.add(lock, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = shared.get(key)
+            if value is not None:
+                return value
+            if shared.get(lock) is None:
+                break
+        # The rebuild failed or is too slow; don't queue behind it any longer
+        return build()[0]
+    try:
+        value, cacheable = build()
+        if cacheable:
+            shared.set(key, value, timeout)
+            local.set(key, value, local_timeout)
+        return value
+    finally:
+        shared.delete(lock)
+
+
+class CacheGroupsMixin:
+    """`cache_groups` name the invalidation groups a view's output depends on, e.g. 'model:{pk}'"""
+    cache_groups = ()
+
+    def get_cache_groups(self, row=None):
+        params = {**self.kwargs, **(row or {})}
+        return [group.format(**params) for group in self.cache_groups]
+
+
+class CachedResponseMixin(CacheGroupsMixin):
+    """Serve anonymous GETs from the response cache"""
+
+    def get(self, request, *args, **kwargs):
+        if not enabled() or request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        def build():
+            response = super(CachedResponseMixin, self).get(request, *args, **kwargs)
+            return (response.status_code, response.data), response.status_code == 200
+
+        key_parts = (type(self).__name__, request.build_absolute_uri(), request.accepted_renderer.format)
+        status, data = get_or_build(key_parts, self.get_cache_groups(), build)
+        return Response(data, status=status)
+
+
+# ------------------------------
+# Conditional GET
+# ------------------------------
+
+class ConditionalGetMixin(CacheGroupsMixin):
+    """
+    ETag and Last-Modified for GET, checked against If-None-Match /
+    If-Modified-Since before the view runs. The ETag covers max(updated_at)
+    over the view's queryset (or the looked-up row) and the versions of
+    `cache_groups`, which also move on deletes, counter updates, votes and
+    changes to nested rows. Last-Modified is the later of max(updated_at)
+    and the last bump of those groups. It has whole seconds, so it is left
+    out (and If-Modified-Since ignored) while the second of the latest
+    change is still running. Detail views can name extra columns in
+    `validator_fields` for use in their groups, e.g. 'model:{model_id}'.
+    """
+    validator_fields = ()
+
+    def get_validators(self):
+        queryset = self.get_queryset().order_by()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            row = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).values(
+                'updated_at', *self.validator_fields
+            ).first()
+            if row is None:
+                raise Http404
+        else:
+            row = queryset.aggregate(updated_at=Max('updated_at'))
+        updated_at = row.pop('updated_at')
+        request = self.request
+        versions, bumped = group_state(self.get_cache_groups(row))
+        digest = hashlib.sha256(repr((
+            type(self).__name__, request.get_full_path(), request.accepted_renderer.format,
+            request.user.pk, updated_at, sorted(versions.items()),
+        )).encode()).hexdigest()
+        changed = [stamp for stamp in (updated_at and updated_at.timestamp(), bumped) if stamp]
+        last_modified = int(max(changed)) if changed else None
+        if last_modified is not None and last_modified >= int(time.time()):
+            last_modified = None  # a change later in this second would not move it
+        return quote_etag(digest[:32]), last_modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Representations differ per user (can_edit, user_has_reviewed, ...)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+# ------------------------------
+# Invalidation
+# ------------------------------
+
+@receiver([post_save, post_delete], sender=AIModel)
+def invalidate_model(sender, instance, **kwargs):
+    # Review and discussion lists show the model's name
+    invalidate('models', f'model:{instance.pk}', 'reviews', 'discussions')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_model_reviews(sender, instance, **kwargs):
+    # Ratings and counts in the model list, recent_reviews on the detail page
+    invalidate('models', f'model:{instance.model_id}', 'reviews', f'review:{instance.pk}')
+
+
+@receiver(pre_save, sender=Review)
+def invalidate_previous_model(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_scores', None)
+    if stored and stored[1] != instance.model_id:
+        invalidate(f'model:{stored[1]}')
+
+
+@receiver([post_save, post_delete], sender=ModelCategory)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate('categories')
+
+
+@receiver([post_save, post_delete], sender=Discussion)
+def invalidate_discussion(sender, instance, **kwargs):
+    invalidate('discussions', f'discussion:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_thread(sender, instance, **kwargs):
+    invalidate(f'discussion:{instance.discussion_id}')
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    # Lists and details nest the author
+    invalidate('users', f'user:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Vote)
+def invalidate_vote_target(sender, instance, **kwargs):
+    # Vote counters are written with UPDATE; the ledger row's signals stand in for them
+    if instance.target_type == Vote.Target.REVIEW:
+        review = Review.objects.filter(pk=instance.target_id).values('model_id', 'user_id').first()
+        groups = ['reviews', f'review:{instance.target_id}']
+        if review:
+            groups += [f"model:{review['model_id']}", f"user:{review['user_id']}"]
+        invalidate(*groups)
+    elif instance.target_type == Vote.Target.DISCUSSION:
+        invalidate('discussions', f'discussion:{instance.target_id}')
+    else:
+        discussion_id = Comment.objects.filter(pk=instance.target_id).values_list('discussion_id', flat=True).first()
+        invalidate(f'discussion:{discussion_id}' if discussion_id else None)
+
+
+@receiver(counters.flushed)
+def invalidate_counters(sender, pks, fields, **kwargs):
+    # Counter columns are written with UPDATE, after the signals above have fired
+    if sender is Discussion:
+        invalidate('discussions', *(f'discussion:{pk}' for pk in pks))
+    elif sender is ModelCategory:
+        invalidate('categories')
+    elif sender is User:
+        invalidate(*(f'user:{pk}' for pk in pks))
+    elif sender is Comment:
+        discussion_ids = Comment.objects.filter(pk__in=pks).values_list('discussion_id', flat=True).distinct()
+        invalidate(*(f'discussion:{pk}' for pk in discussion_ids))
@@ -0,0 +1,75 @@
+"""
+In-memory comment trees.
+
+The comments rendered for a request are loaded in one query (users joined
+in): a (discussion, depth, path) range scan per root, cut off at the depth
+and size limits in breadth-first order. They are indexed by parent in O(N)
+and serialized from that index instead of querying `replies` per comment.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Comment
+
+
+def max_depth():
+    return getattr(settings, 'COMMENT_TREE_MAX_DEPTH', 5)
+
+
+def max_size():
+    return getattr(settings, 'COMMENT_TREE_MAX_SIZE', 200)
+
+
+class CommentTree:
+    """Parent -> children index over a bounded set of comments"""
+
+    def __init__(self, comments):
+        self.children = defaultdict(list)
+        for comment in comments:
+            self.children[comment.parent_id].append(comment)
+
+    @staticmethod
+    def _load(lookup):
+        # Ordering by depth first makes the size limit cut breadth first, so
+        # one deep branch cannot starve its siblings
+        return (
+            Comment.objects.filter(lookup)
+            .select_related('user')
+            .order_by('depth', 'path')[:max_size()]
+        )
+
+    @classmethod
+    def for_discussion(cls, discussion_id):
+        """The top of a discussion's thread, down to the configured depth"""
+        return cls(cls._load(Q(discussion_id=discussion_id, depth__lte=max_depth())))
+
+    @classmethod
+    async def afor_discussion(cls, discussion_id):
+        """for_discussion through the async ORM"""
+        return cls([comment async for comment in cls._load(Q(discussion_id=discussion_id, depth__lte=max_depth()))])
+
+    @classmethod
+    def for_roots(cls, roots):
+        """The subtrees under `roots`, down to the configured depth below each"""
+        if not roots:
+            return cls([])
+        return cls(cls._load(reduce(or_, (root.subtree_filter(max_depth()) for root in roots))))
+
+    @property
+    def roots(self):
+        return self.children.get(None, [])
+
+    def replies(self, comment):
+        return self.children.get(comment.pk, [])
+
+    @classmethod
+    def from_context(cls, context, roots):
+        """Tree shared by every serializer of the request, built on first use"""
+        tree = context.get('comment_tree')
+        if tree is None:
+            tree = context['comment_tree'] = cls.for_roots(roots)
+        return tree
@@ -0,0 +1,167 @@
+"""
+Deferred maintenance for denormalized counter columns (User.reviews_count,
+Discussion.comments_count, ...).
+
+Signal handlers only mark (model, pk, field) keys as dirty. The keys are
+buffered for the current transaction or request and flushed as one
+recounting UPDATE per table, so a burst of writes against the same parent
+row costs a single statement instead of a COUNT and a save per row.
+"""
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from . import metrics
+
+FLUSH_BATCH_SIZE = 1000
+
+# (model, field) -> (source model, foreign key on source pointing at model)
+_counters = {}
+_state = Local()
+
+# Sent after counters are recounted, with `pks` and `fields`, for caches of the counted rows
+flushed = Signal()
+
+
+def register(model, field, source, fk):
+    """Declare that `model.field` counts the `source` rows whose `fk` points at it"""
+    _counters[(model, field)] = (source, fk)
+
+
+def _buffer():
+    if not hasattr(_state, 'dirty'):
+        _state.dirty = {}
+        _state.depth = 0
+        _state.callbacks = []  # flushes registered with on_commit that have not run yet
+    return _state.dirty
+
+
+def _flush_on_commit():
+    """Register a flush for when the current transaction commits (now, outside one)"""
+    def callback():
+        if callback in _state.callbacks:
+            _state.callbacks.remove(callback)
+        flush()
+    _state.callbacks.append(callback)
+    transaction.on_commit(callback)
+
+
+def _flush_pending():
+    """
+    Whether a registered flush will run when the current transaction (or
+    savepoint) commits. Keys whose flushes were all rolled back are dropped.
+    """
+    if not _state.callbacks:
+        return False
+    connection = transaction.get_connection()
+    registered = {id(callback): savepoints for savepoints, callback, _ in connection.run_on_commit}
+    _state.callbacks = [callback for callback in _state.callbacks if id(callback) in registered]
+    if not _state.callbacks:
+        _state.dirty = {}
+        return False
+    # One registered in this savepoint or an enclosing one commits with whatever is marked now
+    current = set(connection.savepoint_ids)
+    return any(registered[id(callback)] <= current for callback in _state.callbacks)
+
+
+def mark(model, pk, field):
+    """Flag a counter as stale; it is recounted when the transaction or request ends"""
+    if pk is None:
+        return
+    if getattr(settings, 'COUNTERS_SYNC', False):
+        _recount(model, [pk], [field])
+        return
+
+    _buffer()
+    pending = _state.depth or _flush_pending()
+    pks = _state.dirty.setdefault(model, {}).setdefault(field, set())
+    if pk in pks and pending:
+        return
+    pks.add(pk)
+    if not pending:
+        _flush_on_commit()
+
+
+def flush():
+    """Recount every buffered counter, one UPDATE per table"""
+    dirty = _buffer()
+    if not dirty:
+        return
+    # Flushes still registered have nothing left to do; the next mark registers its own
+    _state.dirty, _state.callbacks = {}, []
+    with metrics.unbudgeted():
+        for model, fields in dirty.items():
+            pks = sorted(set().union(*fields.values()))
+            for start in range(0, len(pks), FLUSH_BATCH_SIZE):
+                _recount(model, pks[start:start + FLUSH_BATCH_SIZE], list(fields))
+
+
+def _recount(model, pks, fields):
+    updates = {}
+    for field in fields:
+        source, fk = _counters[(model, field)]
+        counts = (
+            source._default_manager.filter(**{fk: OuterRef('pk')})
+            .order_by().values(fk).annotate(count=Count('pk')).values('count')
+        )
+        updates[field] = Coalesce(Subquery(counts), 0)
+    model._default_manager.filter(pk__in=pks).update(**updates)
+    flushed.send(sender=model, pks=pks, fields=fields)
+
+
+@contextmanager
+def deferred():
+    """Hold dirty counters until the outermost block exits, then flush them"""
+    _buffer()
+    if not _state.depth:
+        _flush_pending()
+    _state.depth += 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if not _state.depth:
+            flush()
+
+
+@asynccontextmanager
+async def adeferred():
+    """deferred() for async code; the database is only touched (in a thread) when there is something to flush"""
+    _buffer()
+    if not _state.depth and _state.callbacks:
+        await sync_to_async(_flush_pending)()
+    _state.depth += 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if not _state.depth and _state.dirty:
+            await sync_to_async(flush)()
+
+
+class DeferredCountersMiddleware:
+    """Coalesce counter updates for the whole request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with deferred():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with adeferred():
+            return await self.get_response(request)
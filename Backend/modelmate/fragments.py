@@ -0,0 +1,136 @@
+"""
+Cached representations of small nested objects.
+
+The same category is nested in every one of its models, and the same user
+mini-profile in every review, discussion and comment they wrote.
+Serializers with CachedFragmentMixin build each object's representation
+once and reuse it from two places:
+
+- a per-request identity map, so one response renders each object once;
+- a per-process LRU of FRAGMENT_CACHE_SIZE objects (0 turns it off), whose
+  entries expire after FRAGMENT_CACHE_TTL seconds.
+
+Entries are keyed on the object's pk and `fragment_version_fields`
+(updated_at, plus any counter column recounted without save()), the
+serializer, and the request's scheme and host (file URLs are absolute).
+
+- Saving or deleting the object evicts its entries in this process.
+- Other processes see a new updated_at, and so miss.
+- The TTL bounds what is missed by both, such as an UPDATE that does not
+  touch updated_at.
+
+The values() list rendering in projection.py shares the cache, so the cost
+of nested objects grows with distinct objects rather than rows. Cached
+representations are shared between responses, so treat them as read-only.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ModelCategory, User
+
+
+def size():
+    return getattr(settings, 'FRAGMENT_CACHE_SIZE', 10000)
+
+
+def ttl():
+    return getattr(settings, 'FRAGMENT_CACHE_TTL', 300)
+
+
+class FragmentCache:
+    """Thread-safe LRU of (model, pk) -> {variant: (expires, representation)}"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, model, pk, variant):
+        with self.lock:
+            variants = self.entries.get((model, pk))
+            if variants is None:
+                return None
+            expires, value = variants.get(variant, (0, None))
+            if expires < time.monotonic():
+                variants.pop(variant, None)
+                return None
+            self.entries.move_to_end((model, pk))
+            return value
+
+    def set(self, model, pk, variant, value):
+        if size() <= 0:
+            return
+        with self.lock:
+            variants = self.entries.setdefault((model, pk), {})
+            variants[variant] = (time.monotonic() + ttl(), value)
+            self.entries.move_to_end((model, pk))
+            while len(self.entries) > size():
+                self.entries.popitem(last=False)
+
+    def forget(self, model, pk):
+        with self.lock:
+            self.entries.pop((model, pk), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+cache = FragmentCache()
+
+
+class CachedFragmentMixin:
+    """to_representation through the request's identity map and `cache`"""
+    fragment_version_fields = ('updated_at',)
+
+    def to_representation(self, instance):
+        loaded = instance.__dict__
+        if instance.pk is None or any(name not in loaded for name in self.fragment_version_fields):
+            return super().to_representation(instance)
+        return self.cached_fragment(
+            instance._meta.concrete_model, instance.pk, tuple(loaded[name] for name in self.fragment_version_fields),
+            lambda: super(CachedFragmentMixin, self).to_representation(instance),
+        )
+
+    def cached_fragment(self, model, pk, versions, build):
+        """The representation of `model` row `pk` at `versions`, from `build()` on a miss"""
+        seen, origin = self._fragment_scope()
+        variant = (type(self), origin, versions)
+        key = (model, pk, variant)
+        data = seen.get(key)
+        if data is None:
+            data = cache.get(model, pk, variant)
+            if data is None:
+                data = build()
+                cache.set(model, pk, variant, data)
+            seen[key] = data
+        return data
+
+    def _fragment_scope(self):
+        """The identity map and origin of the request (of the serializer tree without one)"""
+        try:
+            return self._scope
+        except AttributeError:
+            pass
+        request = self.context.get('request')
+        if request is None:
+            self._scope = self.context.setdefault('_fragments', {}), None
+        else:
+            http_request = getattr(request, '_request', request)
+            seen = http_request.__dict__.setdefault('_fragments', {})
+            self._scope = seen, request.build_absolute_uri('/')
+        return self._scope
+
+
+# ------------------------------
+# Invalidation
+# ------------------------------
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=ModelCategory)
+def forget_fragments(sender, instance, **kwargs):
+    cache.forget(sender._meta.concrete_model, instance.pk)
@@ -0,0 +1,110 @@
+"""
+Materialized leaderboards.
+
+The most-read rankings (top models overall and per category, top
+reviewers) are stored as one LeaderboardSnapshot row per board holding the
+top LEADERBOARD_SIZE entries, so serving a board is a primary key lookup.
+`refresh()` (the `refresh_leaderboards` command, run from cron) rebuilds
+only the boards whose inputs changed since their snapshot: a category board
+is stale when one of its models was updated after the snapshot, or when a
+model it lists has since been deleted, moved or updated.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import AIModel, LeaderboardSnapshot, ModelCategory, User
+
+MODELS = 'models'
+REVIEWERS = 'reviewers'
+CATEGORY_PREFIX = 'models:category:'
+
+MODEL_FIELDS = ('id', 'name', 'creator', 'category_id', 'rank_score', 'average_rating', 'reviews_count')
+REVIEWER_FIELDS = ('id', 'username', 'reviews_count', 'helpful_votes_received')
+
+
+def size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 20)
+
+
+def category_board(category_id):
+    return f'{CATEGORY_PREFIX}{category_id}'
+
+
+def build(board):
+    """The current top entries of `board`, ranked from 1"""
+    if board == REVIEWERS:
+        rows = (
+            User.objects.filter(reviews_count__gt=0, is_active=True)
+            .order_by('-reviews_count', '-helpful_votes_received', 'username')
+            .values(*REVIEWER_FIELDS)
+        )
+    else:
+        rows = AIModel.objects.filter(reviews_count__gt=0).order_by('-rank_score', 'name', 'id')
+        if board.startswith(CATEGORY_PREFIX):
+            rows = rows.filter(category_id=int(board[len(CATEGORY_PREFIX):]))
+        rows = rows.values(*MODEL_FIELDS)
+    return [{'rank': rank, **row} for rank, row in enumerate(rows[:size()], 1)]
+
+
+def _save(boards):
+    now = timezone.now()
+    snapshots = [LeaderboardSnapshot(board=board, entries=build(board), refreshed_at=now) for board in boards]
+    LeaderboardSnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['board'], update_fields=['entries', 'refreshed_at'],
+    )
+    return snapshots
+
+
+def stale_boards():
+    """Boards whose snapshot is missing or older than a change to what they rank"""
+    snapshots = {
+        board: (refreshed_at, [entry['id'] for entry in entries])
+        for board, refreshed_at, entries in LeaderboardSnapshot.objects.values_list('board', 'refreshed_at', 'entries')
+    }
+    boards = {MODELS} | {category_board(pk) for pk in ModelCategory.objects.values_list('pk', flat=True)}
+    stale = {board for board in boards if board not in snapshots}
+
+    # Latest model change per category (None: uncategorized), read from the (category, ...) indexes
+    changed = dict(AIModel.objects.order_by().values_list('category_id').annotate(last=Max('updated_at')))
+    latest = max(changed.values(), default=None)
+    if latest and MODELS in snapshots and latest > snapshots[MODELS][0]:
+        stale.add(MODELS)
+    for category_id, last in changed.items():
+        board = category_board(category_id)
+        if category_id is not None and board in snapshots and last > snapshots[board][0]:
+            stale.add(board)
+
+    # Listed models that were deleted or moved out of the board's category
+    listed = {pk for board, (_, ids) in snapshots.items() if board != REVIEWERS for pk in ids}
+    current = dict(AIModel.objects.filter(pk__in=listed).values_list('pk', 'category_id'))
+    for board, (_, ids) in snapshots.items():
+        if board == REVIEWERS or board not in boards:
+            continue
+        category_id = int(board[len(CATEGORY_PREFIX):]) if board != MODELS else None
+        if any(pk not in current or (category_id is not None and current[pk] != category_id) for pk in ids):
+            stale.add(board)
+
+    # Reviewer counts are recounted without touching updated_at, and the board is one cheap query
+    stale.add(REVIEWERS)
+    return stale, set(snapshots) - boards - {REVIEWERS}
+
+
+def refresh(force=False):
+    """Rebuild stale boards (every board with `force`); returns the rebuilt board names"""
+    stale, removed = stale_boards()
+    if force:
+        stale |= {MODELS, REVIEWERS} | {category_board(pk) for pk in ModelCategory.objects.values_list('pk', flat=True)}
+    with transaction.atomic():
+        LeaderboardSnapshot.objects.filter(board__in=removed).delete()
+        _save(sorted(stale))
+    return sorted(stale)
+
+
+def get(board):
+    """The stored board, built on first request if it has never been refreshed"""
+    snapshot = LeaderboardSnapshot.objects.filter(board=board).first()
+    if snapshot is None:
+        snapshot, = _save([board])
+    return snapshot
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from modelmate.models import AIModel, Discussion
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests per second of the hot read endpoints: the DRF views through the WSGI handler "
+        "(one thread per concurrent request) against the async views under /api/async/ through the ASGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and mode")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once")
+
+    def handle(self, *args, **options):
+        model = AIModel.objects.order_by('-reviews_count').first()
+        if model is None:
+            raise CommandError("Load some models and reviews first (e.g. with import_models and import_reviews)")
+        paths = ['models/', f'models/{model.pk}/', f'models/{model.pk}/reviews/']
+        discussion = Discussion.objects.order_by('-comments_count').first()
+        if discussion:
+            paths.append(f'discussions/{discussion.pk}/')
+
+        self.requests, self.concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(f"{self.requests} requests per run, {self.concurrency} concurrent, database: {connection.vendor}")
+        self.stdout.write(f"{'endpoint':<28}{'WSGI (DRF)':>14}{'ASGI (DRF)':>14}{'ASGI (async)':>14}")
+        # The test clients send Host: testserver, which the test runner would allow
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for path in paths:
+                rates = [
+                    self.run_wsgi(f'/api/{path}'),
+                    asyncio.run(self.run_asgi(f'/api/{path}')),
+                    asyncio.run(self.run_asgi(f'/api/async/{path}')),
+                ]
+                self.stdout.write(f"{path:<28}" + ''.join(f"{rate:>10.0f} r/s" for rate in rates))
+
+    def run_wsgi(self, url):
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            self.expect_ok(local.client.get(url), url)
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            started = time.perf_counter()
+            list(pool.map(fetch, range(self.requests)))
+            return self.requests / (time.perf_counter() - started)
+
+    async def run_asgi(self, url):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def fetch():
+            async with slots:
+                self.expect_ok(await client.get(url), url)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(self.requests)))
+        return self.requests / (time.perf_counter() - started)
+
+    def expect_ok(self, response, url):
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
@@ -0,0 +1,69 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from modelmate.models import AIModel, Discussion, Review
+from modelmate.renderers import FastJSONParser, FastJSONRenderer
+from modelmate.serializers import AIModelListSerializer, ReviewListSerializer
+
+
+class Command(BaseCommand):
+    help = "Time DRF's JSONRenderer/JSONParser against FastJSONRenderer/FastJSONParser on real API responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=500, help="Renders (and parses) per payload and class")
+        parser.add_argument('--rows', type=int, default=100, help="Rows in the list payloads")
+
+    def handle(self, *args, **options):
+        model = AIModel.objects.order_by('-reviews_count').first()
+        if model is None:
+            raise CommandError("Load some models and reviews first (e.g. with import_models and import_reviews)")
+        rows = options['rows']
+        payloads = {
+            f'{rows} models': AIModelListSerializer(
+                AIModel.objects.select_related('category')[:rows], many=True,
+            ).data,
+            f'{rows} reviews': ReviewListSerializer(
+                Review.objects.select_related('user', 'model')[:rows], many=True,
+            ).data,
+        }
+        urls = [f'/api/models/{model.pk}/']
+        discussion = Discussion.objects.order_by('-comments_count').first()
+        if discussion:
+            urls.append(f'/api/discussions/{discussion.pk}/')
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            client = Client()
+            for url in urls:
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+                payloads[url] = response.data
+
+        rounds = options['rounds']
+        self.stdout.write(f"{rounds} rounds per payload, times per call")
+        self.stdout.write(f"{'payload':<44}{'bytes':>8}{'DRF':>10}{'fast':>10}{'speedup':>9}")
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                raise CommandError(f"{name}: FastJSONRenderer output differs from JSONRenderer")
+            self.report(f'render {name}', len(body), rounds, JSONRenderer().render, FastJSONRenderer().render, data)
+            self.report(
+                f'parse {name}', len(body), rounds,
+                lambda body: JSONParser().parse(io.BytesIO(body)), lambda body: FastJSONParser().parse(io.BytesIO(body)),
+                body,
+            )
+
+    def report(self, name, size, rounds, default, fast, argument):
+        timings = []
+        for function in (default, fast):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                function(argument)
+            timings.append((time.perf_counter() - started) / rounds * 1e6)
+        self.stdout.write(
+            f"{name:<44}{size:>8}{timings[0]:>8.0f}us{timings[1]:>8.0f}us{timings[0] / timings[1]:>8.1f}x"
+        )
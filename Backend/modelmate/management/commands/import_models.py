@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from modelmate.bulk import BATCH_SIZE, FORMATS, ModelImporter, RejectWriter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert AI models from a CSV or JSONL catalog, matching existing models on (name, creator)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with a header row) or JSONL file")
+        parser.add_argument('--format', choices=FORMATS, help="Input format (default: from the file extension)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--rejects', help="Where to write rejected rows (default: <path>.rejected.<format>)")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+        rejects_path = options['rejects'] or f"{path}.rejected.{fmt}"
+
+        with open(path, newline='', encoding='utf-8-sig') as source, \
+                open(rejects_path, 'w', newline='', encoding='utf-8') as rejected:
+            importer = ModelImporter(batch_size=options['batch_size'], progress=self.report)
+            stats = importer.run(read_rows(source, fmt), RejectWriter(rejected, fmt))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.rows} rows in {stats.elapsed:.1f}s ({stats.rate:.0f} rows/s): "
+            f"{stats.created} created, {stats.updated} updated, {stats.rejected} rejected"
+        ))
+        if stats.rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
+        else:
+            os.remove(rejects_path)
+
+    def report(self, stats):
+        self.stdout.write(
+            f"{stats.rows} rows, {stats.created} created, {stats.updated} updated, "
+            f"{stats.rejected} rejected ({stats.rate:.0f} rows/s)"
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Sum
+from modelmate import ranking
+from modelmate.models import RATING_FIELDS, AIModel
+
+
+class Command(BaseCommand):
+    help = "Rescore every AI model's rank_score from its stored sums with the current ranking prior"
+
+    def handle(self, *args, **options):
+        updated = AIModel.update_rank_scores()
+
+        totals = AIModel.objects.aggregate(
+            reviews=Sum('reviews_count'), total=Sum(sum(F(f'{field}_sum') for field in RATING_FIELDS))
+        )
+        if totals['reviews']:
+            catalog_mean = totals['total'] / (totals['reviews'] * len(RATING_FIELDS))
+            self.stdout.write(
+                f"Mean rating across all reviews is {catalog_mean:.2f} "
+                f"(RANKING_PRIOR_MEAN is {ranking.prior_mean():.2f})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rescored {updated} model(s)"))
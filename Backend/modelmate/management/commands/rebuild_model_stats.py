@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from modelmate.models import AIModel, rebuild_model_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild AIModel rating sums, counts and averages from the reviews table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_ids', nargs='*', type=int, help="Only rebuild these models (default: all)")
+
+    def handle(self, *args, **options):
+        queryset = AIModel.objects.all()
+        if options['model_ids']:
+            queryset = queryset.filter(pk__in=options['model_ids'])
+
+        with transaction.atomic():
+            drifted = rebuild_model_stats(queryset)
+
+        for model in drifted:
+            self.stdout.write(f"Fixed {model.pk}: {model.reviews_count} reviews, average {model.average_rating}")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats, {len(drifted)} model(s) had drifted"))
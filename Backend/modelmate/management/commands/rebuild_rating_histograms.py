@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from modelmate.models import AIModel, rebuild_rating_histograms
+
+
+class Command(BaseCommand):
+    help = "Recount per-model rating histograms from the reviews table, or just check them with --check"
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_ids', nargs='*', type=int, help="Only these models (default: all)")
+        parser.add_argument('--check', action='store_true', help="Report drifted histograms without fixing them")
+
+    def handle(self, *args, **options):
+        queryset = AIModel.objects.all()
+        if options['model_ids']:
+            queryset = queryset.filter(pk__in=options['model_ids'])
+
+        drifted = rebuild_rating_histograms(queryset, dry_run=options['check'])
+
+        for pk in drifted:
+            self.stdout.write(f"{'Drifted' if options['check'] else 'Fixed'} {pk}")
+        if options['check'] and drifted:
+            raise CommandError(f"{len(drifted)} model histogram(s) do not match the reviews table")
+        self.stdout.write(self.style.SUCCESS(
+            "Histograms are consistent" if options['check'] else f"Rebuilt histograms, {len(drifted)} model(s) had drifted"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from modelmate.models import CategoryStats, UserStats, UserCategoryStats, rebuild_stats_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-category and per-user review rollups from the reviews table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', nargs='+', type=int, help="Only rebuild these users' rows")
+        parser.add_argument('--categories', nargs='+', type=int, help="Only rebuild these categories' rows")
+
+    def handle(self, *args, **options):
+        rebuild_stats_rollups(user_ids=options['users'], category_ids=options['categories'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups: {CategoryStats.objects.count()} category, {UserStats.objects.count()} user, "
+            f"{UserCategoryStats.objects.count()} user/category row(s)"
+        ))
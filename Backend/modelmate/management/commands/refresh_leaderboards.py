@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from modelmate import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the leaderboard snapshots whose models or categories changed since their last refresh"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rebuild every board, changed or not")
+
+    def handle(self, *args, **options):
+        boards = leaderboards.refresh(force=options['all'])
+        for board in boards:
+            self.stdout.write(f"Refreshed {board}")
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(boards)} leaderboard(s)"))
@@ -0,0 +1,243 @@
+"""
+Per-endpoint query counts and latencies.
+
+RequestMetricsMiddleware counts the queries of a request on every database
+connection (including the worker threads of the async ORM) and splits its
+wall time into:
+
+- db: time spent executing queries (and how many ran);
+- view: the rest of the view, which on read endpoints is mostly serializers
+  walking instances (queries they trigger count as db);
+- render: turning the response data into bytes (DRF renderers);
+- total: the whole request, middleware included.
+
+The phases are sent back in a Server-Timing header (METRICS_SERVER_TIMING)
+and added to a rolling window of the last METRICS_WINDOW requests per URL
+name, which /api/metrics/ reports as p50/p95/p99. Windows are per process.
+
+Views can declare `query_budget`, the most queries a request may run, as a
+number or as {method: number}. A request over budget logs a warning, or
+raises QueryBudgetExceeded with QUERY_BUDGETS_STRICT, which tests turn on so
+an N+1 fails the suite instead of reaching production. Batched writes that
+some request has to pay for (buffered discussion views, deferred counters)
+run in `unbudgeted()` blocks, which are timed but not held against the view.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('db', 'view', 'render', 'total')
+PERCENTILES = (50, 95, 99)
+
+_state = Local()
+
+
+def window():
+    return getattr(settings, 'METRICS_WINDOW', 1000)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class Sample:
+    """Queries and phase times (seconds) of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.exempt = 0  # of which ran in unbudgeted() blocks
+        self.exempting = False
+        self.db = 0.0
+        self.started = time.perf_counter()
+        self.view_started = self.view_ended = self.render_ended = None
+        self.db_before_view = self.db_after_view = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def phases(self, ended):
+        """{phase: milliseconds}"""
+        view = render = 0.0
+        if self.view_started is not None:
+            # Without a template response (streaming, 304s) the view runs until the response is returned
+            view_ended, db_after_view = (self.view_ended, self.db_after_view) if self.view_ended else (ended, self.db)
+            view = view_ended - self.view_started - (db_after_view - self.db_before_view)
+        if self.render_ended is not None:
+            render = self.render_ended - self.view_ended
+        seconds = {'db': self.db, 'view': max(view, 0.0), 'render': render, 'total': ended - self.started}
+        return {phase: value * 1000 for phase, value in seconds.items()}
+
+
+class Recorder:
+    """Thread-safe rolling windows of samples per URL name"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {}
+
+    def add(self, name, queries, phases):
+        with self.lock:
+            samples = self.windows.get(name)
+            if samples is None or samples.maxlen != window():
+                samples = self.windows[name] = deque(samples or (), maxlen=window())
+            samples.append((queries, *(phases[phase] for phase in PHASES)))
+
+    def report(self):
+        """{name: {'requests': n, 'queries': {p50, p95, p99, max}, '<phase>_ms': {...}}}"""
+        with self.lock:
+            windows = {name: list(samples) for name, samples in self.windows.items()}
+        report = {}
+        for name, samples in sorted(windows.items()):
+            columns = list(zip(*samples))
+            entry = {'requests': len(samples), 'queries': _summary(columns[0])}
+            for phase, values in zip(PHASES, columns[1:]):
+                entry[f'{phase}_ms'] = {key: round(value, 2) for key, value in _summary(values).items()}
+            report[name] = entry
+        return report
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+def _summary(values):
+    ordered = sorted(values)
+    summary = {f'p{p}': ordered[max(0, -(-len(ordered) * p // 100) - 1)] for p in PERCENTILES}  # nearest rank
+    summary['max'] = ordered[-1]
+    return summary
+
+
+recorder = Recorder()
+
+
+@contextmanager
+def unbudgeted():
+    """Leave the queries of the block out of the current request's query budget"""
+    sample = getattr(_state, 'sample', None)
+    if sample is None or sample.exempting:
+        yield
+        return
+    before = sample.queries
+    sample.exempting = True
+    try:
+        yield
+    finally:
+        sample.exempting = False
+        sample.exempt += sample.queries - before
+
+
+def query_budget(view_class, method):
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        budget = budget.get(method, budget.get('GET') if method == 'HEAD' else None)
+    return budget
+
+
+def server_timing(queries, phases):
+    return ', '.join(
+        f'{phase};dur={phases[phase]:.1f}' + (f';desc="{queries} queries"' if phase == 'db' else '')
+        for phase in PHASES
+    )
+
+
+def _execute(execute, sql, params, many, context):
+    """Execute wrapper on every connection, counting into the current request's sample"""
+    sample = getattr(_state, 'sample', None)
+    if sample is None:
+        return execute(sql, params, many, context)
+    return sample(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    # On the connection rather than per request: the async ORM runs queries on
+    # connections of worker threads, which _state (an asgiref Local) follows into
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+class RequestMetricsMiddleware:
+    """Time and count the queries of each request, per resolved URL name"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # The handler awaits view hooks under ASGI; coroutines save each a thread hop
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample = request._metrics = _state.sample = Sample()
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.sample = None
+        return self.record(request, sample, response)
+
+    async def __acall__(self, request):
+        sample = request._metrics = _state.sample = Sample()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.sample = None
+        return self.record(request, sample, response)
+
+    def record(self, request, sample, response):
+        phases = sample.phases(time.perf_counter())
+        match = request.resolver_match
+        if match is None or not match.view_name:
+            return response
+        recorder.add(match.view_name, sample.queries, phases)
+        if getattr(settings, 'METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(sample.queries, phases)
+
+        budget = query_budget(getattr(match.func, 'view_class', None), request.method)
+        if budget is not None and sample.queries - sample.exempt > budget:
+            message = (
+                f'{request.method} {match.view_name} ran {sample.queries - sample.exempt} queries (budget {budget})'
+            )
+            if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample = request._metrics
+        sample.view_started = time.perf_counter()
+        sample.db_before_view = sample.db
+
+    def process_template_response(self, request, response):
+        # The view is done; rendering runs next, then the post-render callbacks
+        sample = request._metrics
+        sample.view_ended = time.perf_counter()
+        sample.db_after_view = sample.db
+        response.add_post_render_callback(lambda response: setattr(sample, 'render_ended', time.perf_counter()))
+        return response
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return RequestMetricsMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def _aprocess_template_response(self, request, response):
+        return RequestMetricsMiddleware.process_template_response(self, request, response)
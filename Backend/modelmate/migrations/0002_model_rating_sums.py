@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:07
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+RATING_FIELDS = ('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability')
+
+
+def backfill_rating_sums(apps, schema_editor):
+    AIModel = apps.get_model('modelmate', 'AIModel')
+    Review = apps.get_model('modelmate', 'Review')
+    rows = Review.objects.values('model').annotate(**{f'{field}_sum': Sum(field) for field in RATING_FIELDS})
+    for row in rows:
+        AIModel.objects.filter(pk=row.pop('model')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='accuracy_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='cost_efficiency_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='ease_of_use_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='reliability_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='speed_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:13
+
+from collections import Counter
+
+from django.db import migrations, models
+
+PATH_STEP = 10
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model('modelmate', 'Comment')
+    parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+    paths, depths = {}, {}
+
+    def resolve(pk):
+        chain = []
+        while pk is not None and pk not in paths:
+            chain.append(pk)
+            pk = parents[pk]
+        prefix, depth = (paths[pk], depths[pk] + 1) if pk is not None else ('', 0)
+        for node in reversed(chain):
+            prefix += str(node).zfill(PATH_STEP)
+            paths[node], depths[node] = prefix, depth
+            depth += 1
+
+    for pk in parents:
+        resolve(pk)
+    replies = Counter(parent_id for parent_id in parents.values() if parent_id is not None)
+    comments = list(Comment.objects.only('pk'))
+    for comment in comments:
+        comment.path, comment.depth, comment.replies_count = paths[comment.pk], depths[comment.pk], replies[comment.pk]
+    Comment.objects.bulk_update(comments, ['path', 'depth', 'replies_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0002_model_rating_sums'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', 'path'], name='modelmate_c_discuss_2274db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', 'depth', 'path'], name='modelmate_c_discuss_cbd082_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
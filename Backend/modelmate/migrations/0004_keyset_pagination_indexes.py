@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0003_comment_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aimodel',
+            index=models.Index(fields=['-average_rating', 'name', 'id'], name='modelmate_a_average_0c5c14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', 'path'], name='modelmate_c_parent__07c8c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['-created_at', '-id'], name='modelmate_d_created_f177b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['model', '-created_at', '-id'], name='modelmate_d_model_i_791339_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='modelmate_r_created_0db702_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['model', '-created_at', '-id'], name='modelmate_r_model_i_2bf94f_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:31
+
+from django.db import migrations
+
+# PostgreSQL only: other backends use the icontains fallback in modelmate.search
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE modelmate_aimodel ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(creator, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(architecture, '')), 'C') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX modelmate_aimodel_search_vector_gin ON modelmate_aimodel USING GIN (search_vector)",
+    "CREATE INDEX modelmate_aimodel_name_trgm ON modelmate_aimodel USING GIN (name gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS modelmate_aimodel_name_trgm",
+    "DROP INDEX IF EXISTS modelmate_aimodel_search_vector_gin",
+    "ALTER TABLE modelmate_aimodel DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(FORWARD_SQL), run_on_postgresql(REVERSE_SQL)),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:42
+
+from django.db import migrations
+
+# Weighted search vectors for the unified /search/ endpoint (PostgreSQL only)
+VECTORS = {
+    'modelmate_review': [('title', 'A'), ('pros', 'B'), ('cons', 'B'), ('description', 'C')],
+    'modelmate_discussion': [('title', 'A'), ('content', 'C')],
+    'modelmate_comment': [('content', 'C')],
+}
+
+
+def vector_sql(columns):
+    return ' || '.join(
+        f"setweight(to_tsvector('english'::regconfig, coalesce({column}, '')), '{label}')"
+        for column, label in columns
+    )
+
+
+def add_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in VECTORS.items():
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector_sql(columns)}) STORED"
+        )
+        schema_editor.execute(f"CREATE INDEX {table}_search_vector_gin ON {table} USING GIN (search_vector)")
+
+
+def remove_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in VECTORS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_vector_gin")
+        schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0005_model_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vectors, remove_search_vectors),
+    ]
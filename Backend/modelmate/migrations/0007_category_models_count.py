@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_models_count(apps, schema_editor):
+    ModelCategory = apps.get_model('modelmate', 'ModelCategory')
+    for category in ModelCategory.objects.annotate(count=Count('models')):
+        ModelCategory.objects.filter(pk=category.pk).update(models_count=category.count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0006_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelcategory',
+            name='models_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_models_count, migrations.RunPython.noop),
+    ]
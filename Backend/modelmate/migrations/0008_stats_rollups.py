@@ -0,0 +1,79 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+RATING_FIELDS = ('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability')
+
+
+def backfill_rollups(apps, schema_editor):
+    Review = apps.get_model('modelmate', 'Review')
+    CategoryStats = apps.get_model('modelmate', 'CategoryStats')
+    UserStats = apps.get_model('modelmate', 'UserStats')
+    UserCategoryStats = apps.get_model('modelmate', 'UserCategoryStats')
+    totals = {'reviews_count': Count('pk'), 'score_sum': Sum(sum(F(field) for field in RATING_FIELDS))}
+    reviews = Review.objects.order_by()
+    categorized = reviews.exclude(model__category=None)
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(category_id=row.pop('model__category'), **row)
+         for row in categorized.values('model__category').annotate(**totals)],
+        batch_size=500,
+    )
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=row.pop('user'), **row) for row in reviews.values('user').annotate(**totals)],
+        batch_size=500,
+    )
+    UserCategoryStats.objects.bulk_create(
+        [UserCategoryStats(user_id=row['user'], category_id=row['model__category'], reviews_count=row['count'])
+         for row in categorized.values('user', 'model__category').annotate(count=Count('pk'))],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0007_category_models_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='modelmate.modelcategory')),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Category stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='modelmate.modelcategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User category stats',
+                'indexes': [models.Index(fields=['user', '-reviews_count'], name='modelmate_u_user_id_6fa455_idx')],
+                'unique_together': {('user', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0009_model_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscussionViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('discussion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='modelmate.discussion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='modelmate_d_hour_b4b408_idx')],
+                'unique_together': {('discussion', 'hour')},
+            },
+        ),
+    ]
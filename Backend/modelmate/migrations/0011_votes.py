@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0010_discussion_view_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'review'), (2, 'discussion'), (3, 'comment')])),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_type', 'target_id'], name='modelmate_v_target__9ecf31_idx')],
+                'unique_together': {('user', 'target_type', 'target_id')},
+            },
+        ),
+    ]
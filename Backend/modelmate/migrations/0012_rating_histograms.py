@@ -0,0 +1,69 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+RATING_FIELDS = ('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability')
+
+
+def backfill_histograms(apps, schema_editor):
+    Review = apps.get_model('modelmate', 'Review')
+    ModelRatingHistogram = apps.get_model('modelmate', 'ModelRatingHistogram')
+    aggregates = {}
+    for star in range(1, 6):
+        aggregates[f'overall_{star}'] = Count('pk', filter=Q(overall_rating__gte=star - 0.5, overall_rating__lt=star + 0.5))
+        for field in RATING_FIELDS:
+            aggregates[f'{field}_{star}'] = Count('pk', filter=Q(**{field: star}))
+    rows = Review.objects.order_by().values('model').annotate(**aggregates)
+    ModelRatingHistogram.objects.bulk_create(
+        [ModelRatingHistogram(model_id=row.pop('model'), **row) for row in rows.iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0011_votes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelRatingHistogram',
+            fields=[
+                ('model', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_histogram', serialize=False, to='modelmate.aimodel')),
+                ('overall_1', models.PositiveIntegerField(default=0)),
+                ('overall_2', models.PositiveIntegerField(default=0)),
+                ('overall_3', models.PositiveIntegerField(default=0)),
+                ('overall_4', models.PositiveIntegerField(default=0)),
+                ('overall_5', models.PositiveIntegerField(default=0)),
+                ('accuracy_1', models.PositiveIntegerField(default=0)),
+                ('accuracy_2', models.PositiveIntegerField(default=0)),
+                ('accuracy_3', models.PositiveIntegerField(default=0)),
+                ('accuracy_4', models.PositiveIntegerField(default=0)),
+                ('accuracy_5', models.PositiveIntegerField(default=0)),
+                ('speed_1', models.PositiveIntegerField(default=0)),
+                ('speed_2', models.PositiveIntegerField(default=0)),
+                ('speed_3', models.PositiveIntegerField(default=0)),
+                ('speed_4', models.PositiveIntegerField(default=0)),
+                ('speed_5', models.PositiveIntegerField(default=0)),
+                ('cost_efficiency_1', models.PositiveIntegerField(default=0)),
+                ('cost_efficiency_2', models.PositiveIntegerField(default=0)),
+                ('cost_efficiency_3', models.PositiveIntegerField(default=0)),
+                ('cost_efficiency_4', models.PositiveIntegerField(default=0)),
+                ('cost_efficiency_5', models.PositiveIntegerField(default=0)),
+                ('ease_of_use_1', models.PositiveIntegerField(default=0)),
+                ('ease_of_use_2', models.PositiveIntegerField(default=0)),
+                ('ease_of_use_3', models.PositiveIntegerField(default=0)),
+                ('ease_of_use_4', models.PositiveIntegerField(default=0)),
+                ('ease_of_use_5', models.PositiveIntegerField(default=0)),
+                ('reliability_1', models.PositiveIntegerField(default=0)),
+                ('reliability_2', models.PositiveIntegerField(default=0)),
+                ('reliability_3', models.PositiveIntegerField(default=0)),
+                ('reliability_4', models.PositiveIntegerField(default=0)),
+                ('reliability_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_histograms, migrations.RunPython.noop),
+    ]
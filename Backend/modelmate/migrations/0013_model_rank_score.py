@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, FloatField, Value, When
+from django.db.models.functions import Cast, Round
+
+RATING_FIELDS = ('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability')
+
+
+def backfill_rank_scores(apps, schema_editor):
+    # The Bayesian average of modelmate.ranking as of this migration
+    AIModel = apps.get_model('modelmate', 'AIModel')
+    mean = float(getattr(settings, 'RANKING_PRIOR_MEAN', 3.5))
+    weight = float(getattr(settings, 'RANKING_PRIOR_WEIGHT', 10))
+    overall_sum = Cast(sum(F(f'{field}_sum') for field in RATING_FIELDS), FloatField()) / len(RATING_FIELDS)
+    AIModel.objects.update(rank_score=Case(
+        When(
+            reviews_count__gt=0,
+            then=Round((overall_sum + Value(weight * mean)) / (Cast('reviews_count', FloatField()) + Value(weight)), 4),
+        ),
+        default=Value(0.0),
+        output_field=DecimalField(max_digits=6, decimal_places=4),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0012_rating_histograms'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='aimodel',
+            options={'ordering': ['-rank_score', 'name']},
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='rank_score',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=6),
+        ),
+        migrations.AddIndex(
+            model_name='aimodel',
+            index=models.Index(fields=['-rank_score', 'name', 'id'], name='modelmate_a_rank_sc_d9c3ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aimodel',
+            index=models.Index(fields=['category', '-rank_score', 'name', 'id'], name='modelmate_a_categor_db7414_idx'),
+        ),
+        migrations.RunPython(backfill_rank_scores, migrations.RunPython.noop),
+    ]
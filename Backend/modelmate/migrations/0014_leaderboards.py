@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:53
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelmate', '0013_model_rank_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('board', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('entries', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,15 +1,24 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import IntegrityError, models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.contrib.auth.models import AbstractUser
-from django.db.models import Avg
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Concat, Now, NullIf, Round, Substr
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save, post_delete
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from . import counters, ranking
 
 # ------------------------------
 # Validators and Utilities
 # ------------------------------
 
+# Per-dimension scores every review carries; overall_rating is their mean
+RATING_FIELDS = ('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability')
+STARS = range(1, 6)
+
+
 def validate_image_file_size(value):
     """Validate uploaded image file size (max 5MB)"""
     filesize = value.size
@@ -24,7 +33,7 @@ def validate_image_file_size(value):
 class TimestampedModel(models.Model):
     """Abstract base model for created_at and updated_at timestamps"""
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Last-Modified for conditional GETs
 
     class Meta:
         abstract = True
@@ -77,6 +86,7 @@ class ModelCategory(TimestampedModel):
     name = models.CharField(max_length=255, unique=True, db_index=True)
     description = models.TextField(null=True, blank=True)
     slug = models.SlugField(unique=True, db_index=True)
+    models_count = models.PositiveIntegerField(default=0, editable=False)  # updated via signals
 
     class Meta:
         verbose_name_plural = "Model Categories"
@@ -89,12 +99,8 @@ class ModelCategory(TimestampedModel):
     def __str__(self):
         return self.name
 
-    @property
-    def models_count(self):
-        return self.models.count()
 
-
-class AIModel(models.Model):
+class AIModel(TimestampedModel):
     """AI Model information"""
     name = models.CharField(max_length=255, db_index=True)
     creator = models.CharField(max_length=255, db_index=True)
@@ -108,21 +114,127 @@ class AIModel(models.Model):
     license = models.CharField(max_length=100, blank=True)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00, db_index=True)
     reviews_count = models.PositiveIntegerField(default=0, db_index=True)
+    # Bayesian average of the reviews against a prior (see ranking.py), kept in step with the sums
+    rank_score = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+
+    # Running per-dimension sums - updated incrementally via signals, rebuilt by `rebuild_model_stats`
+    accuracy_sum = models.PositiveIntegerField(default=0)
+    speed_sum = models.PositiveIntegerField(default=0)
+    cost_efficiency_sum = models.PositiveIntegerField(default=0)
+    ease_of_use_sum = models.PositiveIntegerField(default=0)
+    reliability_sum = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = [('name', 'creator')]
-        ordering = ['-average_rating', 'name']
+        ordering = ['-rank_score', 'name']
         indexes = [
             models.Index(fields=['name']),
             models.Index(fields=['creator']),
             models.Index(fields=['-average_rating']),
             models.Index(fields=['-release_date']),
             models.Index(fields=['category', '-average_rating']),
+            models.Index(fields=['-average_rating', 'name', 'id']),
+            # Keyset pagination on the default ordering (pk is the tiebreaker), overall and per category
+            models.Index(fields=['-rank_score', 'name', 'id']),
+            models.Index(fields=['category', '-rank_score', 'name', 'id']),
         ]
 
     def __str__(self):
         return f"{self.name}{' v'+self.version if self.version else ''}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_category_id = instance.__dict__.get('category_id')
+        return instance
+
+    @property
+    def dimension_averages(self):
+        """Per-dimension averages derived from the running sums"""
+        count = self.reviews_count
+        return {
+            field: round(getattr(self, f'{field}_sum') / count, 2) if count else 0.00
+            for field in RATING_FIELDS
+        }
+
+    @classmethod
+    def apply_review_delta(cls, model_id, count, scores):
+        """
+        Shift a model's running sums by `count` reviews carrying `scores`
+        (a signed dict keyed by RATING_FIELDS) and recompute average_rating
+        and rank_score in the same UPDATE statement.
+        """
+        new_count = F('reviews_count') + count
+        updates = {'reviews_count': new_count, 'updated_at': Now()}
+        for field in RATING_FIELDS:
+            updates[f'{field}_sum'] = F(f'{field}_sum') + scores[field]
+        # overall_rating is the mean of the dimensions, so the average follows from their sums
+        new_total = sum(updates[f'{field}_sum'] for field in RATING_FIELDS)
+        updates['average_rating'] = cls._average_rating(new_total, new_count)
+        updates['rank_score'] = cls._rank_score(new_total, new_count)
+        return cls.objects.filter(pk=model_id).update(**updates)
+
+    @staticmethod
+    def _rank_score(total, count):
+        return ranking.score_expression(Cast(total, models.FloatField()) / len(RATING_FIELDS), count)
+
+    @classmethod
+    def update_rank_scores(cls, queryset=None):
+        """Rescore models from their stored sums, e.g. after the ranking prior changed"""
+        queryset = cls.objects.all() if queryset is None else queryset
+        total = sum(F(f'{field}_sum') for field in RATING_FIELDS)
+        return queryset.update(rank_score=cls._rank_score(total, F('reviews_count')), updated_at=Now())
+
+    @staticmethod
+    def _average_rating(total, count):
+        return Coalesce(
+            Round(Cast(total, models.FloatField()) / NullIf(count * len(RATING_FIELDS), 0), 2),
+            Value(0),
+            output_field=models.DecimalField(max_digits=3, decimal_places=2),
+        )
+
+    @classmethod
+    def recompute_stats(cls, model_ids):
+        """Set the stats of `model_ids` from the reviews table in one UPDATE (for bulk writes)"""
+        reviews = Review.objects.filter(model=OuterRef('pk')).order_by().values('model')
+
+        def aggregate(expression):
+            return Coalesce(Subquery(reviews.annotate(value=expression).values('value')), 0)
+
+        updates = {'reviews_count': aggregate(Count('pk')), 'updated_at': Now()}
+        for field in RATING_FIELDS:
+            updates[f'{field}_sum'] = aggregate(Sum(field))
+        total, count = aggregate(Sum(sum(F(field) for field in RATING_FIELDS))), aggregate(Count('pk'))
+        updates['average_rating'] = cls._average_rating(total, count)
+        updates['rank_score'] = cls._rank_score(total, count)
+        return cls.objects.filter(pk__in=model_ids).update(**updates)
+
+    @staticmethod
+    def rating_histograms(model_ids):
+        """
+        Reviews per star for overall_rating (rounded half up) and each dimension,
+        as {model_id: {'overall': {1: n, ..., 5: n}, 'accuracy': {...}, ...}},
+        counted for all of `model_ids` in one grouped query
+        """
+        aggregates = {}
+        for star in STARS:
+            aggregates[f'overall_{star}'] = Count(
+                'pk', filter=Q(overall_rating__gte=star - 0.5, overall_rating__lt=star + 0.5)
+            )
+            for field in RATING_FIELDS:
+                aggregates[f'{field}_{star}'] = Count('pk', filter=Q(**{field: star}))
+        rows = {
+            row['model_id']: row
+            for row in Review.objects.filter(model_id__in=model_ids).order_by().values('model_id').annotate(**aggregates)
+        }
+        return {
+            model_id: {
+                name: {star: rows[model_id][f'{name}_{star}'] if model_id in rows else 0 for star in STARS}
+                for name in ('overall',) + RATING_FIELDS
+            }
+            for model_id in model_ids
+        }
+
 
 class Review(TimestampedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
@@ -142,6 +254,42 @@ class Review(TimestampedModel):
     class Meta:
         unique_together = [('user', 'model')]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['model', '-created_at', '-id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_scores()
+        return instance
+
+    def _remember_scores(self):
+        """Snapshot what the model stats currently hold for this review"""
+        loaded = self.__dict__
+        if all(field in loaded for field in ('user_id', 'model_id') + RATING_FIELDS):
+            self._stored_scores = (self.user_id, self.model_id, self.scores())
+        else:
+            self._stored_scores = None
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        stored = getattr(self, '_stored_scores', None)
+        if fields is None or stored is None:
+            self._remember_scores()
+            return
+        # Only the refreshed fields now match the row; the others keep their snapshot
+        refreshed = {self._meta.get_field(name).attname for name in fields}
+        user_id, model_id, scores = stored
+        self._stored_scores = (
+            self.user_id if 'user_id' in refreshed else user_id,
+            self.model_id if 'model_id' in refreshed else model_id,
+            {name: getattr(self, name) if name in refreshed else value for name, value in scores.items()},
+        )
+
+    def scores(self):
+        return {field: getattr(self, field) for field in RATING_FIELDS}
 
     def calculate_overall_rating(self):
         return (self.accuracy + self.speed + self.cost_efficiency + self.ease_of_use + self.reliability)/5
@@ -165,11 +313,28 @@ class Discussion(TimestampedModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['model', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
 
+class DiscussionViewBucket(models.Model):
+    """Views of a discussion within one hour, flushed from the view buffer; ranks trending discussions"""
+    discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='view_buckets')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('discussion', 'hour')]
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+
 class Comment(TimestampedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
     discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='comments')
@@ -177,35 +342,488 @@ class Comment(TimestampedModel):
     likes = models.PositiveIntegerField(default=0, db_index=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
 
+    # Materialized path: ancestors' zero-padded ids followed by our own, so a
+    # subtree is one contiguous range and sorting by path gives display order
+    path = models.TextField(editable=False, default='')
+    depth = models.PositiveIntegerField(editable=False, default=0)
+    replies_count = models.PositiveIntegerField(default=0)
+
+    PATH_STEP = 10
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['discussion', 'path']),
+            models.Index(fields=['discussion', 'depth', 'path']),
+            models.Index(fields=['parent', 'path']),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on '{self.discussion.title}'"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    @staticmethod
+    def path_upper_bound(path):
+        """Smallest path of the same length sorting after every descendant of `path`"""
+        return str(int(path) + 1).zfill(len(path))
+
+    def subtree_filter(self, max_depth=None):
+        """Lookup for this comment's descendants as one (discussion, path) range"""
+        lookup = models.Q(
+            discussion_id=self.discussion_id,
+            path__gt=self.path,
+            path__lt=self.path_upper_bound(self.path),
+        )
+        if max_depth is not None:
+            lookup &= models.Q(depth__lte=self.depth + max_depth)
+        return lookup
+
+    def save(self, *args, **kwargs):
+        moved = self.path and self.parent_id != getattr(self, '_stored_parent_id', self.parent_id)
+        if moved and self.parent_id:
+            parent_path = Comment.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+            if parent_path.startswith(self.path):
+                raise ValidationError("A comment cannot be moved under itself or one of its replies.")
+        super().save(*args, **kwargs)
+        if not self.path or moved:
+            self._update_path()
+        self._stored_parent_id = self.parent_id
+
+    def _update_path(self):
+        parent = None
+        if self.parent_id:
+            parent = Comment.objects.filter(pk=self.parent_id).values('path', 'depth').first()
+        old_path, old_depth = self.path, self.depth
+        self.path = (parent['path'] if parent else '') + str(self.pk).zfill(self.PATH_STEP)
+        self.depth = parent['depth'] + 1 if parent else 0
+        Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        if old_path:
+            # Re-root the moved subtree under the new prefix
+            Comment.objects.filter(
+                discussion_id=self.discussion_id,
+                path__gt=old_path,
+                path__lt=self.path_upper_bound(old_path),
+            ).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
 
-@receiver([post_save, post_delete], sender=Review)
-def update_model_stats(sender, instance, **kwargs):
-    model = instance.model
-    reviews = model.reviews.all()
-    model.average_rating = round(reviews.aggregate(Avg('overall_rating'))['overall_rating__avg'] or 0, 2)
-    model.reviews_count = reviews.count()
-    model.save(update_fields=['average_rating', 'reviews_count'])
+
+# ------------------------------
+# Votes
+# ------------------------------
+
+class Vote(models.Model):
+    """
+    Ledger of helpful votes on reviews and likes on discussions and comments,
+    one row per (user, target). The unique constraint makes repeated clicks
+    idempotent: only a request whose INSERT or DELETE changed the ledger moves
+    the target's counter, with one conditional UPDATE in the same transaction.
+    """
+    class Target(models.IntegerChoices):
+        REVIEW = 1, 'review'
+        DISCUSSION = 2, 'discussion'
+        COMMENT = 3, 'comment'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes')
+    target_type = models.PositiveSmallIntegerField(choices=Target.choices)
+    target_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('user', 'target_type', 'target_id')]
+        indexes = [
+            models.Index(fields=['target_type', 'target_id']),
+        ]
+
+    @staticmethod
+    def counted_model(target_type):
+        """(model, counter field) the votes of `target_type` are counted on"""
+        return {
+            Vote.Target.REVIEW: (Review, 'helpful_votes'),
+            Vote.Target.DISCUSSION: (Discussion, 'likes'),
+            Vote.Target.COMMENT: (Comment, 'likes'),
+        }[target_type]
+
+    @staticmethod
+    def target_type_of(target):
+        return {Review: Vote.Target.REVIEW, Discussion: Vote.Target.DISCUSSION, Comment: Vote.Target.COMMENT}[type(target)]
+
+    @classmethod
+    def cast(cls, user, target):
+        """Vote for `target`; False if `user` already had"""
+        target_type = cls.target_type_of(target)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user=user, target_type=target_type, target_id=target.pk)
+            except IntegrityError:
+                return False
+            cls._shift(target_type, target.pk, 1)
+        return True
+
+    @classmethod
+    def retract(cls, user, target):
+        """Withdraw a vote for `target`; False if there was none"""
+        target_type = cls.target_type_of(target)
+        with transaction.atomic():
+            deleted, _ = cls.objects.filter(user=user, target_type=target_type, target_id=target.pk).delete()
+            if not deleted:
+                return False
+            cls._shift(target_type, target.pk, -1)
+        return True
+
+    @classmethod
+    def _shift(cls, target_type, target_id, delta):
+        model, counter = cls.counted_model(target_type)
+        targets = model.objects.filter(pk=target_id)
+        authors = User.objects.filter(pk__in=targets.values('user_id'))
+        if delta < 0:
+            targets = targets.filter(**{f'{counter}__gt': 0})
+            authors = authors.filter(helpful_votes_received__gt=0)
+        if target_type == cls.Target.REVIEW:
+            # Before the review's own counter, so both statements see the same rows
+            authors.update(helpful_votes_received=F('helpful_votes_received') + delta)
+        targets.update(**{counter: F(counter) + delta})
+
+
+# ------------------------------
+# Leaderboards
+# ------------------------------
+
+class LeaderboardSnapshot(models.Model):
+    """A ranked top-K list, materialized by `refresh_leaderboards` (see leaderboards.py)"""
+    board = models.CharField(max_length=64, primary_key=True)
+    entries = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.board
+
+
+# ------------------------------
+# Stats Rollups
+# ------------------------------
+
+class CategoryStats(models.Model):
+    """Review totals for one category - updated incrementally via signals, rebuilt by `rebuild_stats_rollups`"""
+    category = models.OneToOneField(ModelCategory, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    reviews_count = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)  # sum of every rating dimension of every review
+
+    class Meta:
+        verbose_name_plural = "Category stats"
+
+    @property
+    def average_rating(self):
+        return average_from_sum(self.score_sum, self.reviews_count)
+
+
+class UserStats(models.Model):
+    """Review totals for one reviewer"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    reviews_count = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "User stats"
+
+    @property
+    def average_rating(self):
+        return average_from_sum(self.score_sum, self.reviews_count)
+
+
+class UserCategoryStats(models.Model):
+    """How many reviews a user has written in one category"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='category_stats')
+    category = models.ForeignKey(ModelCategory, on_delete=models.CASCADE, related_name='user_stats')
+    reviews_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "User category stats"
+        unique_together = [('user', 'category')]
+        indexes = [
+            models.Index(fields=['user', '-reviews_count']),
+        ]
+
+
+class ModelRatingHistogram(models.Model):
+    """
+    Reviews per star of one model, for overall_rating (rounded half up) and
+    each dimension, in `<name>_<star>` columns - updated incrementally via
+    signals, rebuilt by `rebuild_rating_histograms`
+    """
+    NAMES = ('overall',) + RATING_FIELDS
+
+    model = models.OneToOneField(AIModel, on_delete=models.CASCADE, primary_key=True, related_name='rating_histogram')
+
+    def as_dict(self):
+        return {name: {star: getattr(self, f'{name}_{star}') for star in STARS} for name in self.NAMES}
+
+    @classmethod
+    def empty(cls):
+        return {name: {star: 0 for star in STARS} for name in cls.NAMES}
+
+
+for _name in ModelRatingHistogram.NAMES:
+    for _star in STARS:
+        ModelRatingHistogram.add_to_class(f'{_name}_{_star}', models.PositiveIntegerField(default=0))
+del _name, _star
+
+
+def overall_star(scores):
+    """The star a review's overall_rating falls in, rounding half up"""
+    return (2 * sum(scores.values()) + len(RATING_FIELDS)) // (2 * len(RATING_FIELDS))
+
+
+def histogram_columns(scores):
+    return [f'overall_{overall_star(scores)}'] + [f'{field}_{scores[field]}' for field in RATING_FIELDS]
+
+
+def apply_histogram_delta(model_id, removed=None, added=None):
+    """Move a review's buckets: out of those for `removed` scores, into those for `added`"""
+    deltas = {}
+    for scores, step in ((removed, -1), (added, 1)):
+        for column in histogram_columns(scores) if scores else ():
+            deltas[column] = deltas.get(column, 0) + step
+    _increment(ModelRatingHistogram, {'model_id': model_id}, **{k: v for k, v in deltas.items() if v})
+
+
+def average_from_sum(score_sum, count):
+    """Mean overall_rating of `count` reviews whose dimensions add up to `score_sum`"""
+    if not count:
+        return 0.00
+    return round(score_sum / (count * len(RATING_FIELDS)), 2)
+
+
+def _increment(model, lookup, **deltas):
+    """Add `deltas` to the rollup row matching `lookup`, creating it on first use"""
+    if not any(deltas.values()):
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates) or min(deltas.values()) < 0:
+        # A missing row with a negative delta was never counted; rebuilds settle it
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created concurrently since our UPDATE
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_rollup_delta(user_id, model_id, count, scores):
+    """Shift the category and user rollups by `count` reviews of `model_id` carrying `scores`"""
+    score = sum(scores.values())
+    _increment(UserStats, {'user_id': user_id}, reviews_count=count, score_sum=score)
+    category_id = AIModel.objects.filter(pk=model_id).values_list('category_id', flat=True).first()
+    if category_id is None:
+        return
+    _increment(CategoryStats, {'category_id': category_id}, reviews_count=count, score_sum=score)
+    _increment(UserCategoryStats, {'user_id': user_id, 'category_id': category_id}, reviews_count=count)
+
+
+def rebuild_stats_rollups(user_ids=None, category_ids=None):
+    """
+    Recompute rollup rows from the reviews table: everything by default,
+    otherwise the rows of the given users and/or categories.
+    """
+    everything = user_ids is None and category_ids is None
+    score = sum(F(field) for field in RATING_FIELDS)
+    totals = {'reviews_count': Count('pk'), 'score_sum': Sum(score)}
+    reviews = Review.objects.order_by()
+    with transaction.atomic():
+        if everything or category_ids is not None:
+            stats, rows = CategoryStats.objects.all(), reviews.exclude(model__category=None)
+            if not everything:
+                stats = stats.filter(category_id__in=category_ids)
+                rows = rows.filter(model__category__in=category_ids)
+            stats.delete()
+            CategoryStats.objects.bulk_create(
+                [CategoryStats(category_id=row.pop('model__category'), **row)
+                 for row in rows.values('model__category').annotate(**totals)],
+                batch_size=500,
+            )
+        if everything or user_ids is not None:
+            stats, rows = UserStats.objects.all(), reviews
+            if not everything:
+                stats, rows = stats.filter(user_id__in=user_ids), rows.filter(user__in=user_ids)
+            stats.delete()
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=row.pop('user'), **row) for row in rows.values('user').annotate(**totals)],
+                batch_size=500,
+            )
+        scope = models.Q()
+        if user_ids is not None:
+            scope |= models.Q(user__in=user_ids)
+        if category_ids is not None:
+            scope |= models.Q(category__in=category_ids)
+        UserCategoryStats.objects.filter(scope).delete()
+        review_scope = models.Q()
+        if user_ids is not None:
+            review_scope |= models.Q(user__in=user_ids)
+        if category_ids is not None:
+            review_scope |= models.Q(model__category__in=category_ids)
+        rows = reviews.filter(review_scope).exclude(model__category=None)
+        UserCategoryStats.objects.bulk_create(
+            [UserCategoryStats(user_id=row['user'], category_id=row['model__category'], reviews_count=row['count'])
+             for row in rows.values('user', 'model__category').annotate(count=Count('pk'))],
+            batch_size=500,
+        )
+
+
+def rebuild_model_stats(queryset=None):
+    """Recompute running sums from the reviews table; returns the models that had drifted"""
+    queryset = AIModel.objects.all() if queryset is None else queryset
+    sums = {
+        row.pop('model'): row
+        for row in Review.objects.filter(model__in=queryset.values('pk')).values('model').annotate(
+            count=Count('pk'), **{f'{field}_sum': Sum(field) for field in RATING_FIELDS}
+        )
+    }
+    stat_fields = ['reviews_count', 'average_rating'] + [f'{field}_sum' for field in RATING_FIELDS]
+    drifted = []
+    for model in queryset.only('pk', *stat_fields).iterator():
+        row = sums.get(model.pk, {})
+        count = row.get('count', 0)
+        expected = {'reviews_count': count}
+        for field in RATING_FIELDS:
+            expected[f'{field}_sum'] = row.get(f'{field}_sum') or 0
+        total = sum(expected[f'{field}_sum'] for field in RATING_FIELDS)
+        average = total / (count * len(RATING_FIELDS)) if count else 0
+        expected['average_rating'] = Decimal(str(average)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if any(getattr(model, name) != value for name, value in expected.items()):
+            for name, value in expected.items():
+                setattr(model, name, value)
+            drifted.append(model)
+    AIModel.objects.bulk_update(drifted, stat_fields, batch_size=500)
+    AIModel.update_rank_scores(AIModel.objects.filter(pk__in=[model.pk for model in drifted]))
+    return drifted
+
+
+def rebuild_rating_histograms(queryset=None, dry_run=False):
+    """
+    Recount rating histograms from the reviews table; returns the pks of the
+    models whose stored histogram had drifted (left as is with `dry_run`)
+    """
+    queryset = AIModel.objects.all() if queryset is None else queryset
+    model_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    drifted = []
+    for start in range(0, len(model_ids), 1000):
+        batch = model_ids[start:start + 1000]
+        expected = AIModel.rating_histograms(batch)
+        stored = {row.pk: row.as_dict() for row in ModelRatingHistogram.objects.filter(model_id__in=batch)}
+        drifted += [pk for pk in batch if stored.get(pk, ModelRatingHistogram.empty()) != expected[pk]]
+    if dry_run or not drifted:
+        return drifted
+    with transaction.atomic():
+        for start in range(0, len(drifted), 1000):
+            batch = drifted[start:start + 1000]
+            expected = AIModel.rating_histograms(batch)
+            ModelRatingHistogram.objects.filter(model_id__in=batch).delete()
+            ModelRatingHistogram.objects.bulk_create([
+                ModelRatingHistogram(model_id=pk, **{
+                    f'{name}_{star}': count for name, stars in expected[pk].items() for star, count in stars.items()
+                })
+                for pk in batch
+            ], batch_size=500)
+    return drifted
+
+
+def _apply_review_delta(user_id, model_id, count, scores):
+    AIModel.apply_review_delta(model_id, count, scores)
+    apply_rollup_delta(user_id, model_id, count, scores)
+
+
+@receiver(post_save, sender=Review)
+def update_model_stats(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored_scores', None)
+    if created:
+        _apply_review_delta(instance.user_id, instance.model_id, 1, instance.scores())
+        apply_histogram_delta(instance.model_id, added=instance.scores())
+    elif stored is None:
+        # Loaded with deferred rating fields, so the previous scores are unknown
+        rebuild_model_stats(AIModel.objects.filter(pk=instance.model_id))
+        rebuild_rating_histograms(AIModel.objects.filter(pk=instance.model_id))
+        category_id = AIModel.objects.filter(pk=instance.model_id).values_list('category_id', flat=True).first()
+        rebuild_stats_rollups(user_ids=[instance.user_id], category_ids=[category_id] if category_id else [])
+    elif stored[:2] == (instance.user_id, instance.model_id):
+        scores = instance.scores()
+        _apply_review_delta(instance.user_id, instance.model_id, 0, {k: v - stored[2][k] for k, v in scores.items()})
+        apply_histogram_delta(instance.model_id, removed=stored[2], added=scores)
+    else:
+        _apply_review_delta(stored[0], stored[1], -1, {k: -v for k, v in stored[2].items()})
+        _apply_review_delta(instance.user_id, instance.model_id, 1, instance.scores())
+        if stored[1] == instance.model_id:
+            apply_histogram_delta(instance.model_id, removed=stored[2], added=instance.scores())
+        else:
+            apply_histogram_delta(stored[1], removed=stored[2])
+            apply_histogram_delta(instance.model_id, added=instance.scores())
+    instance._remember_scores()
+
+@receiver(post_delete, sender=Review)
+def remove_model_stats(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_scores', None)
+    user_id, model_id, scores = stored if stored else (instance.user_id, instance.model_id, instance.scores())
+    _apply_review_delta(user_id, model_id, -1, {k: -v for k, v in scores.items()})
+    apply_histogram_delta(model_id, removed=scores)
+
+counters.register(ModelCategory, 'models_count', AIModel, 'category')
+counters.register(User, 'reviews_count', Review, 'user')
+counters.register(User, 'discussions_count', Discussion, 'user')
+counters.register(Discussion, 'comments_count', Comment, 'discussion')
+counters.register(Comment, 'replies_count', Comment, 'parent')
+
+@receiver([post_save, post_delete], sender=AIModel)
+def update_category_models(sender, instance, created=False, **kwargs):
+    stored_category_id = getattr(instance, '_stored_category_id', None)
+    if created or kwargs['signal'] is post_delete or stored_category_id != instance.category_id:
+        counters.mark(ModelCategory, instance.category_id, 'models_count')
+        counters.mark(ModelCategory, stored_category_id, 'models_count')
+    if not created and kwargs['signal'] is post_save and stored_category_id != instance.category_id:
+        # The model's reviews now count towards another category
+        category_ids = [pk for pk in (stored_category_id, instance.category_id) if pk is not None]
+        if category_ids and instance.reviews_count:
+            rebuild_stats_rollups(category_ids=category_ids)
+    instance._stored_category_id = instance.category_id
 
 @receiver([post_save, post_delete], sender=Review)
 def update_user_reviews(sender, instance, **kwargs):
-    user = instance.user
-    user.reviews_count = user.reviews.count()
-    user.save(update_fields=['reviews_count'])
+    counters.mark(User, instance.user_id, 'reviews_count')
 
 @receiver([post_save, post_delete], sender=Discussion)
 def update_user_discussions(sender, instance, **kwargs):
-    user = instance.user
-    user.discussions_count = user.discussions.count()
-    user.save(update_fields=['discussions_count'])
+    counters.mark(User, instance.user_id, 'discussions_count')
 
 @receiver([post_save, post_delete], sender=Comment)
 def update_discussion_comments(sender, instance, **kwargs):
-    discussion = instance.discussion
-    discussion.comments_count = discussion.comments.count()
-    discussion.save(update_fields=['comments_count'])
\ No newline at end of file
+    counters.mark(Discussion, instance.discussion_id, 'comments_count')
+    counters.mark(Comment, instance.parent_id, 'replies_count')
+    stored_parent_id = getattr(instance, '_stored_parent_id', None)
+    if stored_parent_id != instance.parent_id:
+        counters.mark(Comment, stored_parent_id, 'replies_count')
+
+@receiver(pre_delete, sender=User)
+def release_user_votes(sender, instance, **kwargs):
+    # The user's votes cascade away with them; take them off the counters first
+    for target_type, target_id in instance.votes.values_list('target_type', 'target_id').iterator():
+        Vote._shift(target_type, target_id, -1)
+
+@receiver(pre_delete, sender=Review)
+def release_review_votes(sender, instance, **kwargs):
+    # The ledger rows go with the review; take its votes off the author's counter first
+    votes = Subquery(Review.objects.filter(pk=instance.pk).values('helpful_votes'))
+    User.objects.filter(pk=instance.user_id, helpful_votes_received__gte=votes).update(
+        helpful_votes_received=F('helpful_votes_received') - votes
+    )
+
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Discussion)
+@receiver(post_delete, sender=Comment)
+def delete_target_votes(sender, instance, **kwargs):
+    Vote.objects.filter(target_type=Vote.target_type_of(instance), target_id=instance.pk).delete()
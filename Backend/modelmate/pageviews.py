@@ -0,0 +1,177 @@
+"""
+Buffered view counting for discussions.
+
+Views are added to an in-process buffer and written out at most every
+DISCUSSION_VIEWS_FLUSH_INTERVAL seconds: one UPDATE of Discussion.views
+(`views + CASE id WHEN ... END`) and one of the hourly DiscussionViewBucket
+rows, so a hot thread costs one row write per flush instead of a locked
+read-modify-write per request. Repeat views by the same user or IP within
+DISCUSSION_VIEW_DEDUP_WINDOW seconds are dropped with an atomic cache.add on
+the shared cache. Trending discussions are ranked by a weighted sum of recent
+buckets, computed in the database, plus whatever is still buffered.
+"""
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from . import caching, metrics
+from .models import Discussion, DiscussionViewBucket
+
+FLUSH_BATCH_SIZE = 500
+MAX_PENDING = 10000  # distinct discussions buffered before an early flush
+GRAVITY = 1.5  # how quickly older views stop counting towards trending
+
+
+def flush_interval():
+    return getattr(settings, 'DISCUSSION_VIEWS_FLUSH_INTERVAL', 10)
+
+
+def dedup_window():
+    return getattr(settings, 'DISCUSSION_VIEW_DEDUP_WINDOW', 0)
+
+
+def trending_window():
+    return getattr(settings, 'TRENDING_WINDOW_HOURS', 48)
+
+
+def viewer_key(request):
+    """Who is viewing, for de-duplication: the user, or the client address when anonymous"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+class ViewBuffer:
+    """Per-process discussion id -> unflushed view count"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.timer = None
+
+    def add(self, discussion_id):
+        interval = flush_interval()
+        with self.lock:
+            self.pending[discussion_id] += 1
+            flush_now = interval <= 0 or len(self.pending) >= MAX_PENDING
+            if not flush_now and self.timer is None:
+                self.timer = threading.Timer(interval, self._flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if flush_now:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return Counter(self.pending)
+
+    def flush(self):
+        """Write every buffered view out; returns how many were written"""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            if self.timer is not None and self.timer is not threading.current_thread():
+                self.timer.cancel()
+            self.timer = None
+        if pending:
+            with metrics.unbudgeted():
+                write_views(pending)
+        return sum(pending.values())
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+buffer = ViewBuffer()
+
+
+def record_view(discussion_id, viewer=None):
+    """Count a view, unless `viewer` already viewed this discussion within the dedup window"""
+    window = dedup_window()
+    if viewer and window > 0:
+        if not caching.shared_cache().add(f'pageviews:seen:{discussion_id}:{viewer}', 1, window):
+            return False
+    buffer.add(discussion_id)
+    return True
+
+
+def _delta(lookup, counts):
+    return Case(
+        *(When(**{lookup: pk}, then=Value(count)) for pk, count in counts.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+_pruned_before = None
+
+
+def write_views(pending):
+    """Add `pending` (discussion id -> views) to the counters and the current hour's buckets"""
+    global _pruned_before
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    ids = sorted(pending)
+    for start in range(0, len(ids), FLUSH_BATCH_SIZE):
+        with transaction.atomic():
+            # Skip discussions deleted since they were viewed
+            batch = list(Discussion.objects.filter(pk__in=ids[start:start + FLUSH_BATCH_SIZE]).values_list('pk', flat=True))
+            counts = {pk: pending[pk] for pk in batch}
+            if not counts:
+                continue
+            Discussion.objects.filter(pk__in=batch).update(views=F('views') + _delta('pk', counts))
+            DiscussionViewBucket.objects.bulk_create(
+                [DiscussionViewBucket(discussion_id=pk, hour=hour) for pk in batch], ignore_conflicts=True
+            )
+            DiscussionViewBucket.objects.filter(hour=hour, discussion_id__in=batch).update(
+                views=F('views') + _delta('discussion_id', counts)
+            )
+        caching.invalidate('discussions', *(f'discussion:{pk}' for pk in batch))
+
+    cutoff = hour - timedelta(hours=trending_window())
+    if _pruned_before != cutoff:
+        DiscussionViewBucket.objects.filter(hour__lt=cutoff).delete()
+        _pruned_before = cutoff
+
+
+def _hour_weight(now, hours):
+    """Weight of each bucket by the hour it started: 1 / (age in hours + 2) ** GRAVITY"""
+    current = now.replace(minute=0, second=0, microsecond=0)
+    return Case(
+        *(When(hour__gte=current - timedelta(hours=i), then=Value(
+            1 / ((now - current).total_seconds() / 3600 + i + 2) ** GRAVITY
+        )) for i in range(hours + 1)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def trending(limit=10, hours=None):
+    """Discussions with the most recent views, older hours weighing less"""
+    now = timezone.now()
+    hours = hours or trending_window()
+    # Weighted sums per discussion in the database, over at most `hours` + 1 distinct weights
+    scored = (
+        DiscussionViewBucket.objects.filter(hour__gte=now - timedelta(hours=hours))
+        .values('discussion_id')
+        .annotate(score=Sum(F('views') * _hour_weight(now, hours), output_field=FloatField()))
+    )
+    scores = dict(scored.order_by('-score', 'discussion_id').values_list('discussion_id', 'score')[:limit])
+    # Buffered views count as this hour's; only buffered discussions can overtake the top `limit`
+    buffered = buffer.snapshot()
+    missing = sorted(set(buffered) - set(scores))
+    for start in range(0, len(missing), FLUSH_BATCH_SIZE):
+        batch = scored.filter(discussion_id__in=missing[start:start + FLUSH_BATCH_SIZE])
+        scores.update(batch.values_list('discussion_id', 'score'))
+    for discussion_id, views in buffered.items():
+        scores[discussion_id] = scores.get(discussion_id, 0) + views / 2 ** GRAVITY
+
+    top = sorted(scores, key=lambda pk: (-scores[pk], pk))[:limit]
+    discussions = Discussion.objects.select_related('user', 'model').in_bulk(top)
+    return [discussions[pk] for pk in top if pk in discussions]
@@ -0,0 +1,202 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with `WHERE (ordering columns) > (last row's values)` and
+a LIMIT, so page N costs the same as page 1 and no COUNT(*) is issued. The
+ordering is whatever the view's queryset (or OrderingFilter) asked for,
+falling back to the model's Meta.ordering, with the primary key appended as
+a tiebreaker. Cursors are signed, opaque tokens of the boundary row's values.
+`values()` querysets work too: the key columns are added to the fetched ones.
+"""
+import datetime
+import json
+from decimal import Decimal
+from functools import reduce
+from operator import and_, or_
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_SALT = 'modelmate.pagination.cursor'
+
+
+def estimate_count(queryset):
+    """Planner row estimate on PostgreSQL, exact COUNT elsewhere"""
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count(), False
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows']), True
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a composite (ordering..., pk) key"""
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request)
+        if request.query_params.get(self.count_query_param):
+            self.count = estimate_count(self.unpaged)
+        return self.finish(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, fetching the page through the async ORM"""
+        queryset = self.prepare(queryset, request)
+        if request.query_params.get(self.count_query_param):
+            self.count = await sync_to_async(estimate_count)(self.unpaged)
+        return self.finish([row async for row in queryset[:self.page_size + 1]])
+
+    def prepare(self, queryset, request):
+        """The ordered, cursor-filtered queryset of this page and the next row"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.opts = queryset.model._meta
+        self.annotations = queryset.query.annotations
+        self.ordering = self.get_ordering(queryset)
+        self.reverse, self.cursor_values = self.decode_cursor(request)
+        self.count = None
+        self.unpaged = queryset
+
+        if queryset._fields:
+            missing = [key for key in map(self._key, self.ordering) if key not in queryset._fields]
+            queryset = queryset.values(*queryset._fields, *missing) if missing else queryset
+        if self.cursor_values is not None:
+            queryset = queryset.filter(self.keyset_filter(self.cursor_values, self.reverse))
+        return queryset.order_by(*self.order_expressions(self.reverse))
+
+    def finish(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = self.cursor_values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor_values is not None
+        self.page = rows
+        return rows
+
+    def get_ordering(self, queryset):
+        """[(field, descending), ...] ending in a unique, non-null column"""
+        names = list(queryset.query.order_by) or list(self.opts.ordering) or ['-pk']
+        ordering = []
+        for name in names:
+            if not isinstance(name, str) or '__' in name or name.lstrip('-') == '?':
+                raise ValueError(f'KeysetPagination cannot order by {name!r}')
+            ordering.append((name.lstrip('-'), name.startswith('-')))
+        fields = [self._field(self.opts, name) for name, _ in ordering]
+        if not any(field.unique and not field.null for field in fields):
+            ordering.append(('pk', ordering[-1][1]))
+        return ordering
+
+    def _key(self, ordering):
+        """The attribute (or values() key) holding an ordering column"""
+        name, _ = ordering
+        return name if name in self.annotations else self._field(self.opts, name).attname
+
+    def _field(self, opts, name):
+        if name in self.annotations:
+            return self.annotations[name].output_field
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def order_expressions(self, reverse=False):
+        # NULLs always sort last (in page order) so the keyset comparison is the same on every backend
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        return [
+            F(name).desc(**nulls) if descending != reverse else F(name).asc(**nulls)
+            for name, descending in self.ordering
+        ]
+
+    def keyset_filter(self, values, reverse=False):
+        """Rows strictly after (or before, when paging back) the boundary row"""
+        clauses = []
+        for index, (name, descending) in enumerate(self.ordering):
+            nullable = self._field(self.opts, name).null
+            equal = [
+                Q(**{f'{prev}__isnull': True}) if value is None else Q(**{prev: value})
+                for (prev, _), value in zip(self.ordering[:index], values)
+            ]
+            value = values[index]
+            if value is None:
+                # NULLs sort last: nothing follows them, every non-NULL precedes them
+                strict = Q(**{f'{name}__isnull': False}) if reverse else None
+            else:
+                lookup = 'lt' if descending != reverse else 'gt'
+                strict = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    strict |= Q(**{f'{name}__isnull': True})
+            if strict is not None:
+                clauses.append(reduce(and_, equal + [strict]))
+        return reduce(or_, clauses) if clauses else Q(pk__in=[])
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            payload = signing.loads(token, salt=CURSOR_SALT)
+            reverse, values = bool(payload['r']), list(payload['v'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for key in map(self._key, self.ordering):
+            value = instance[key] if isinstance(instance, dict) else getattr(instance, key)
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        token = signing.dumps({'r': int(reverse), 'v': values}, salt=CURSOR_SALT, compress=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            body['count'], body['count_is_estimate'] = self.count
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
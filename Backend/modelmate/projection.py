@@ -0,0 +1,221 @@
+"""
+Fast list rendering from `values()` rows.
+
+On big list pages most of the CPU goes into building a model instance per
+row (and per joined row) and walking every serializer field through
+get_attribute / to_representation. A Projection reads the fields of a
+read-only serializer, nested serializers included, once and turns them into
+the columns to fetch and one converter per field. Each page is then fetched
+with `queryset.values(*columns)` and its rows are turned straight into the
+dicts the serializer would have produced.
+
+Plain integer, float and string fields are cast directly, ISO 8601
+datetimes are converted with the time zone looked up once per page, and
+every other field goes through the serializer field's own to_representation, so the
+JSON is byte-for-byte the same, down to fields left out when their source
+runs through a null relation. Sources that are not model columns
+(properties, methods) must be declared on the serializer in
+`projection_sources` as `{source: (columns, function)}`; anything else
+(SerializerMethodField, source='*', many=True) is refused when compiling.
+Nested serializers with CachedFragmentMixin also fetch their pk and version
+columns, and their rows are rendered through the fragment cache.
+"""
+import datetime
+from functools import cache, partial
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import FileField
+from rest_framework import ISO_8601, fields, serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fragments import CachedFragmentMixin
+
+# Stands for a field the serializer leaves out of the row
+SKIP = object()
+
+# Field to_representation methods that amount to a type cast of the column value
+CASTS = {
+    fields.IntegerField.to_representation: int,
+    fields.FloatField.to_representation: float,
+    fields.CharField.to_representation: str,
+    fields.ReadOnlyField.to_representation: None,
+}
+
+
+class Projection:
+    """The columns and converters of a read-only serializer class"""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self.plan = self._compile(serializer_class(), '', serializer_class.Meta.model._meta)
+
+    @classmethod
+    @cache
+    def of(cls, serializer_class):
+        return cls(serializer_class)
+
+    def _compile(self, serializer, prefix, opts):
+        """[(key, kind, column(s), extra, nullable relation columns on the way)] in field order"""
+        plan = []
+        computed = getattr(serializer, 'projection_sources', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer) or field.source == '*':
+                    raise ImproperlyConfigured(f'{serializer.__class__.__name__}.{name} cannot be projected')
+                relation, _ = self._model_field(opts, [field.source], prefix, serializer, name)
+                null_column = prefix + relation.name if relation.null else None
+                if null_column:
+                    self.columns.append(null_column)
+                nested_prefix = f'{prefix}{relation.name}__'
+                related = relation.related_model._meta
+                nested = self._compile(field, nested_prefix, related)
+                fragment = None
+                if isinstance(field, CachedFragmentMixin):
+                    pk_column = nested_prefix + related.pk.name
+                    version_columns = [nested_prefix + version for version in field.fragment_version_fields]
+                    self.columns += [pk_column, *version_columns]
+                    fragment = (related.concrete_model, pk_column, version_columns)
+                plan.append((name, 'nested', null_column, (nested, fragment), ()))
+            elif field.source in computed:
+                sources, function = computed[field.source]
+                columns = [prefix + source for source in sources]
+                self.columns.extend(columns)
+                plan.append((name, 'computed', columns, function, ()))
+            else:
+                if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                    raise ImproperlyConfigured(f'{serializer.__class__.__name__}.{name} cannot be projected')
+                model_field, through = self._model_field(opts, field.source_attrs, prefix, serializer, name)
+                column = prefix + '__'.join(field.source_attrs)
+                self.columns += [column, *through]
+                kind = 'file' if isinstance(model_field, FileField) else 'column'
+                plan.append((name, kind, column, model_field, through))
+        return plan
+
+    def _model_field(self, opts, attrs, prefix, serializer, name):
+        """The model field at the end of `attrs`, and the columns of the nullable relations leading to it"""
+        through = []
+        try:
+            for index, attr in enumerate(attrs[:-1]):
+                relation = opts.get_field(attr)
+                if relation.null:
+                    through.append(prefix + '__'.join(attrs[:index + 1]))
+                opts = relation.related_model._meta
+            return (opts.pk if attrs[-1] == 'pk' else opts.get_field(attrs[-1])), through
+        except (FieldDoesNotExist, AttributeError):
+            raise ImproperlyConfigured(
+                f'{serializer.__class__.__name__}.{name}: {".".join(attrs)} is not a column; '
+                'declare it in projection_sources'
+            )
+
+    def values(self, queryset):
+        return queryset.values(*dict.fromkeys(self.columns))
+
+    def converters(self, serializer, plan):
+        """The plan with each field's converter, bound to `serializer`'s fields (and so its context)"""
+        bound = []
+        for name, kind, column, extra, through in plan:
+            field = serializer.fields[name]
+            if kind == 'nested':
+                nested, fragment = extra
+                render = partial(_render, plan=self.converters(field, nested))
+                if fragment:
+                    render = _fragment_renderer(field, *fragment, render)
+                bound.append((name, kind, column, render, through, None))
+                continue
+            convert = CASTS.get(type(field).to_representation, field.to_representation)
+            if type(field).to_representation is fields.DateTimeField.to_representation:
+                convert = _datetime_converter(field)
+            if kind == 'file':
+                convert = _file_converter(field, extra)
+            elif kind == 'computed':
+                convert = _computed_converter(extra, convert)
+            bound.append((name, kind, column, convert, through, through and _absent(field)))
+        return bound
+
+    def render(self, rows, context=None):
+        """The serializer's representation of each `values()` row"""
+        plan = self.converters(self.serializer_class(context=context or {}), self.plan)
+        return [_render(row, plan) for row in rows]
+
+
+def _file_converter(field, model_field):
+    # values() gives the stored name; the serializer field expects the FieldFile
+    return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation for aware datetimes, with its format and time zone resolved up front"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    zone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if zone is None or output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(zone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _fragment_renderer(serializer, model, pk_column, version_columns, render):
+    def cached(row):
+        versions = tuple(row[column] for column in version_columns)
+        return serializer.cached_fragment(model, row[pk_column], versions, lambda: render(row))
+    return cached
+
+
+def _computed_converter(function, convert):
+    if convert is None:
+        return lambda *values: function(*values)
+    return lambda *values: convert(function(*values))
+
+
+def _absent(field):
+    """What Field.get_attribute falls back to when the source's relation is missing"""
+    if field.default is not empty:
+        return field.get_default
+    return (lambda: None) if field.allow_null else (lambda: SKIP)
+
+
+def _render(row, plan):
+    data = {}
+    for name, kind, column, convert, through, absent in plan:
+        if through and any(row[relation] is None for relation in through):
+            value = absent()
+            if value is not SKIP:
+                data[name] = value
+        elif kind == 'nested':
+            data[name] = None if column and row[column] is None else convert(row)
+        elif kind == 'computed':
+            data[name] = convert(*(row[source] for source in column))
+        else:
+            value = row[column]
+            data[name] = value if value is None or convert is None else convert(value)
+    return data
+
+
+class ProjectedListMixin:
+    """
+    list() that fetches the page as `values()` rows and renders them through
+    the serializer's Projection. Set `use_projection = False` (also as an
+    `as_view()` argument) to render through the serializer instead.
+    """
+    use_projection = True
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_projection:
+            return super().list(request, *args, **kwargs)
+        projection = Projection.of(self.get_serializer_class())
+        rows = projection.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        data = projection.render(rows if page is None else page, self.get_serializer_context())
+        return Response(data) if page is None else self.get_paginated_response(data)
@@ -0,0 +1,52 @@
+"""
+Confidence-adjusted ranking for AI models.
+
+AIModel.rank_score is a Bayesian average: each model's reviews are blended
+with RANKING_PRIOR_WEIGHT imaginary reviews at RANKING_PRIOR_MEAN, so
+
+    rank_score = (weight * mean + sum of overall ratings) / (weight + reviews)
+
+A single 5-star review barely moves a model off the prior, while hundreds
+of reviews outweigh it. The score only depends on the model's own running
+sums, so it is updated in the same UPDATE that shifts them. Models without
+reviews score 0 and sort last. After changing the prior, run
+`rebuild_model_ranking` to rescore every model.
+"""
+from django.conf import settings
+from django.db.models import Case, DecimalField, FloatField, Value, When
+from django.db.models.functions import Cast, Round
+from django.db.models.lookups import GreaterThan
+
+
+def prior_mean():
+    return float(getattr(settings, 'RANKING_PRIOR_MEAN', 3.5))
+
+
+def prior_weight():
+    return float(getattr(settings, 'RANKING_PRIOR_WEIGHT', 10))
+
+
+def score_expression(ratings_sum, count, mean=None):
+    """rank_score from expressions for the sum of the reviews' overall ratings and their number"""
+    mean = prior_mean() if mean is None else mean
+    weight = prior_weight()
+    return Case(
+        When(
+            GreaterThan(count, 0),
+            then=Round(
+                (Cast(ratings_sum, FloatField()) + Value(weight * mean)) / (Cast(count, FloatField()) + Value(weight)),
+                4,
+            ),
+        ),
+        default=Value(0.0),
+        output_field=DecimalField(max_digits=6, decimal_places=4),
+    )
+
+
+def score(ratings_sum, count, mean=None):
+    """The same score in Python, for checks and tests"""
+    if not count:
+        return 0.0
+    mean = prior_mean() if mean is None else mean
+    weight = prior_weight()
+    return round((ratings_sum + weight * mean) / (count + weight), 4)
@@ -0,0 +1,85 @@
+"""
+JSON rendering and parsing through orjson.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer (compact,
+UTF-8, U+2028/U+2029 escaped) for everything the API returns, several times
+faster. Datetimes, dates, times and UUIDs are encoded natively by orjson in
+the format DRF's encoder uses. Decimals and other types go through DRF's
+encoder. Floats of 1e16 and above or below 1e-4 are spelled without the
+exponent sign or padding (1e16, not 1e+16), which is the same number to
+any JSON parser. orjson writes NaN and infinities as null, so output with a
+null is checked for them and rendered by DRF, which refuses them under
+STRICT_JSON.
+
+orjson is optional: without it, or when the client asks for indented output
+(the browsable API, `Accept: application/json; indent=4`), or when orjson
+cannot encode a value (integers beyond 64 bits), rendering falls back to
+DRF's renderer. Enable both classes in REST_FRAMEWORK.
+"""
+import io
+import math
+from decimal import Decimal
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+_encoder = JSONEncoder()
+
+
+def _has_non_finite(data):
+    """Whether `data` holds a NaN or infinite float or Decimal"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal) and not value.is_finite():
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'null' in ret and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)  # raises, as DRF does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # DRF's parser for integers beyond 64 bits, and for its error message
+            return super().parse(io.BytesIO(body), media_type, parser_context)
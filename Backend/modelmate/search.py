@@ -0,0 +1,222 @@
+"""
+Full-text search over models, reviews, discussions and comments.
+
+On PostgreSQL each searchable table carries a generated, weighted
+`search_vector` tsvector column with a GIN index, and AIModel also has a
+trigram index on `name` that catches typos the stemmer cannot. Elsewhere
+(SQLite in dev/tests) the same API falls back to per-term icontains
+matching scored with the same field weights.
+
+Matches are annotated with `search_rank`; for AI models, text relevance is
+boosted by up to 2x for the model's average rating.
+"""
+import html
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections
+from django.db.models import BooleanField, Case, CharField, ExpressionWrapper, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework.filters import BaseFilterBackend
+
+from .models import AIModel, Review, Discussion, Comment
+
+SEARCH_CONFIG = 'english'
+
+# ts_rank's default weights for the A/B/C/D labels, reused by the fallback scorer
+LABEL_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+# Private-use markers wrapped around matched words before snippets are HTML-escaped
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\ue000', '\ue001'
+SNIPPET_LENGTH = 160
+
+
+class Searchable:
+    """How one model is searched and summarized in unified results"""
+
+    def __init__(self, model, labels, title, body, parent=None, trigram=None, rating_boost=False):
+        self.model = model
+        self.labels = labels  # field -> tsvector weight label, as in the generated column
+        self.title = title
+        self.body = body
+        self.parent = parent
+        self.trigram = trigram
+        self.rating_boost = rating_boost
+
+
+SEARCHABLES = {
+    'models': Searchable(
+        AIModel, {'name': 'A', 'creator': 'B', 'architecture': 'C', 'description': 'D'},
+        title='name', body='description', parent='category_id', trigram='name', rating_boost=True,
+    ),
+    'reviews': Searchable(
+        Review, {'title': 'A', 'pros': 'B', 'cons': 'B', 'description': 'C'},
+        title='title', body='description', parent='model_id',
+    ),
+    'discussions': Searchable(
+        Discussion, {'title': 'A', 'content': 'C'},
+        title='title', body='content', parent='model_id',
+    ),
+    'comments': Searchable(
+        Comment, {'content': 'C'},
+        title=None, body='content', parent='discussion_id',
+    ),
+}
+
+
+def _normalize(query):
+    return ' '.join(query.split())
+
+
+def _is_postgresql(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def _columns(queryset, *names):
+    quote = connections[queryset.db].ops.quote_name
+    table = quote(queryset.model._meta.db_table)
+    return [f'{table}.{quote(name)}' for name in names]
+
+
+def search_queryset(queryset, query, searchable):
+    """Filter `queryset` to rows matching `query`, annotated with `search_rank`"""
+    if _is_postgresql(queryset):
+        queryset, relevance = _match_postgres(queryset, query, searchable)
+    else:
+        queryset, relevance = _match_fallback(queryset, query, searchable)
+    if searchable.rating_boost:
+        relevance = relevance * (Value(1.0) + Cast('average_rating', FloatField()) / Value(5.0))
+    return queryset.annotate(search_rank=ExpressionWrapper(relevance, output_field=FloatField()))
+
+
+def search_models(queryset, query):
+    query = _normalize(query)
+    if not query:
+        return queryset
+    return search_queryset(queryset, query, SEARCHABLES['models'])
+
+
+def _match_postgres(queryset, query, searchable):
+    vector, = _columns(queryset, 'search_vector')
+    tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+    match_sql, match_params = f'{vector} @@ {tsquery}', [SEARCH_CONFIG, query]
+    rank_sql, rank_params = f'ts_rank_cd({vector}, {tsquery}, 32)', [SEARCH_CONFIG, query]
+    if searchable.trigram:
+        trigram, = _columns(queryset, searchable.trigram)
+        # pg_trgm's `%` similarity operator (escaped for the DB-API), served by the trigram index
+        match_sql += f' OR {trigram} %% %s'
+        rank_sql += f' + similarity({trigram}, %s) * 0.5'
+        match_params.append(query)
+        rank_params.append(query)
+    queryset = queryset.filter(RawSQL(f'({match_sql})', match_params, output_field=BooleanField()))
+    return queryset, RawSQL(f'({rank_sql})::double precision', rank_params, output_field=FloatField())
+
+
+def _match_fallback(queryset, query, searchable):
+    terms = query.split()
+    matches = [
+        reduce(or_, (Q(**{f'{field}__icontains': term}) for field in searchable.labels))
+        for term in terms
+    ]
+    relevance = sum(
+        Case(
+            When(**{f'{field}__icontains': term}, then=Value(LABEL_WEIGHTS[label])),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        for term in terms
+        for field, label in searchable.labels.items()
+    )
+    return queryset.filter(reduce(and_, matches)), relevance
+
+
+# ------------------------------
+# Unified search
+# ------------------------------
+
+def _snippet_expression(queryset, query, searchable):
+    if _is_postgresql(queryset):
+        body, = _columns(queryset, searchable.body)
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=30, MinWords=12, MaxFragments=2'
+        return RawSQL(
+            f"ts_headline(%s::regconfig, coalesce({body}, ''), websearch_to_tsquery(%s::regconfig, %s), %s)",
+            (SEARCH_CONFIG, SEARCH_CONFIG, query, options),
+            output_field=CharField(),
+        )
+    return F(searchable.body)
+
+
+def _hits_queryset(kind, query, limit):
+    searchable = SEARCHABLES[kind]
+    queryset = search_queryset(searchable.model.objects.all(), query, searchable)
+    # Every branch selects the same annotation-only columns so they can be UNIONed
+    queryset = queryset.annotate(
+        hit_type=Value(kind, output_field=CharField()),
+        hit_id=F('pk'),
+        hit_title=F(searchable.title) if searchable.title else Value('', output_field=CharField()),
+        hit_snippet=_snippet_expression(queryset, query, searchable),
+        hit_parent=F(searchable.parent) if searchable.parent else Value(None, output_field=IntegerField()),
+        hit_rank=F('search_rank'),
+    )
+    return queryset.values(
+        'hit_type', 'hit_id', 'hit_title', 'hit_snippet', 'hit_parent', 'hit_rank'
+    ).order_by('-hit_rank', '-hit_id')[:limit]
+
+
+def search_all(query, kinds=None, limit=5):
+    """Top `limit` hits per kind, grouped and ranked, with highlighted snippets"""
+    query = _normalize(query)
+    kinds = [kind for kind in (kinds or SEARCHABLES) if kind in SEARCHABLES]
+    grouped = {kind: [] for kind in kinds}
+    if not query or not kinds:
+        return grouped
+
+    querysets = [_hits_queryset(kind, query, limit) for kind in kinds]
+    if _is_postgresql(querysets[0]) and len(querysets) > 1:
+        # One round trip: each branch is its own ranked, LIMITed index scan
+        rows = querysets[0].union(*querysets[1:], all=True)
+    else:
+        rows = [row for queryset in querysets for row in queryset]
+
+    for row in rows:
+        snippet = row['hit_snippet'] or ''
+        if HIGHLIGHT_START not in snippet:
+            snippet = _mark_terms(snippet, query)
+        grouped[row['hit_type']].append({
+            'id': row['hit_id'],
+            'title': row['hit_title'],
+            'snippet': highlight(snippet),
+            'parent_id': row['hit_parent'],
+            'rank': round(row['hit_rank'], 4),
+        })
+    for hits in grouped.values():
+        hits.sort(key=lambda hit: (-hit['rank'], -hit['id']))
+    return grouped
+
+
+def _mark_terms(text, query):
+    """Fallback highlighter: a window around the first match, with every term marked"""
+    terms = sorted(set(query.split()), key=len, reverse=True)
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - SNIPPET_LENGTH // 3) if first else 0
+    window = text[start:start + SNIPPET_LENGTH]
+    return pattern.sub(lambda match: f'{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_STOP}', window)
+
+
+def highlight(snippet):
+    """HTML-escape a snippet, then turn the match markers into <mark> tags"""
+    return html.escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+class ModelSearchFilter(BaseFilterBackend):
+    """`?search=` for AIModel lists, ordered by relevance unless ?ordering= is given"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        return search_models(queryset, query).order_by('-search_rank', '-average_rating', 'name')
@@ -2,9 +2,15 @@ from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from django.core.exceptions import ValidationError
-from django.db.models import Avg, Count
-from .models import User, ModelCategory, AIModel, Review, Discussion, Comment
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import models
+from django.db.models import Exists, OuterRef
+from .models import User, ModelCategory, AIModel, ModelRatingHistogram, Review, Discussion, Comment
+from .comment_tree import CommentTree
+from .fragments import CachedFragmentMixin
+
+# Reviews embedded in a model's detail representation
+RECENT_REVIEWS = 3
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -94,10 +100,16 @@ class ChangePasswordSerializer(serializers.Serializer):
         return user
 
 
-class UserMinimalSerializer(serializers.ModelSerializer):
+class UserMinimalSerializer(CachedFragmentMixin, serializers.ModelSerializer):
     """Minimal user serializer for nested representations"""
     """Mainly for use as a nested serializer in other objects (like reviews, comments, etc.)."""
     full_name = serializers.CharField(source='full_name_or_username', read_only=True)
+    # User.full_name_or_username from columns, for list pages rendered from values() (see projection.py)
+    projection_sources = {
+        'full_name_or_username': (
+            ('first_name', 'last_name', 'username'), lambda first, last, username: f'{first} {last}'.strip() or username,
+        ),
+    }
 
     class Meta:
         model = User
@@ -122,9 +134,10 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
 
-class ModelCategorySerializer(serializers.ModelSerializer):
+class ModelCategorySerializer(CachedFragmentMixin, serializers.ModelSerializer):
     """Serializer for model categories"""
     models_count = serializers.ReadOnlyField()
+    fragment_version_fields = ('updated_at', 'models_count')  # models_count is recounted without save()
 
     class Meta:
         model = ModelCategory
@@ -141,9 +154,37 @@ class AIModelListSerializer(serializers.ModelSerializer):
         model = AIModel
         fields = [
             'id', 'name', 'creator', 'version', 'category', 'category_id',
-            'description', 'average_rating', 'reviews_count', 'release_date'
+            'description', 'average_rating', 'rank_score', 'reviews_count', 'release_date'
+        ]
+
+    @staticmethod
+    def setup_eager_loading(queryset, request=None):
+        """Join the nested category (its models_count is a stored column)"""
+        return queryset.select_related('category')
+
+
+def _histogram(obj):
+    """The model's stored per-star review counts (all zero before its first review)"""
+    histogram = _rollup(obj, 'rating_histogram')
+    return histogram.as_dict() if histogram else ModelRatingHistogram.empty()
+
+
+class AIModelComparisonSerializer(serializers.ModelSerializer):
+    """Side-by-side stats, all from stored columns"""
+    category = ModelCategorySerializer(read_only=True)
+    dimension_averages = serializers.ReadOnlyField()
+    rating_histograms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AIModel
+        fields = [
+            'id', 'name', 'creator', 'version', 'category', 'average_rating',
+            'reviews_count', 'dimension_averages', 'rating_histograms'
         ]
 
+    def get_rating_histograms(self, obj):
+        return _histogram(obj)
+
 
 class AIModelSerializer(serializers.ModelSerializer):
     """Detailed serializer for AI models"""
@@ -151,26 +192,45 @@ class AIModelSerializer(serializers.ModelSerializer):
     category_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
     user_has_reviewed = serializers.SerializerMethodField()
     recent_reviews = serializers.SerializerMethodField()
+    rating_histograms = serializers.SerializerMethodField()
 
     class Meta:
         model = AIModel
         fields = [
             'id', 'name', 'creator', 'version', 'category', 'category_id',
             'description', 'url', 'release_date', 'size', 'architecture', 
-            'license', 'average_rating', 'reviews_count', 'user_has_reviewed',
-            'recent_reviews'
+            'license', 'average_rating', 'rank_score', 'reviews_count', 'user_has_reviewed',
+            'recent_reviews', 'rating_histograms'
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset, request=None):
+        """Join the category and histogram and answer user_has_reviewed in the same query"""
+        queryset = queryset.select_related('category', 'rating_histogram')
+        if request and request.user.is_authenticated:
+            queryset = queryset.annotate(reviewed_by_user=Exists(
+                Review.objects.filter(model=OuterRef('pk'), user=request.user)
+            ))
+        return queryset
+
     def get_user_has_reviewed(self, obj):
         """Check if current user has reviewed this model"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'reviewed_by_user'):
+                return obj.reviewed_by_user
             return obj.reviews.filter(user=request.user).exists()
         return False
 
+    def get_rating_histograms(self, obj):
+        """Reviews per star, overall and per dimension"""
+        return _histogram(obj)
+
     def get_recent_reviews(self, obj):
-        """Get recent reviews for this model"""
-        recent_reviews = obj.reviews.select_related('user').order_by('-created_at')[:3]
+        """Get recent reviews for this model (preloaded as `recent_review_list` by async views)"""
+        recent_reviews = getattr(obj, 'recent_review_list', None)
+        if recent_reviews is None:
+            recent_reviews = obj.reviews.select_related('user').order_by('-created_at')[:RECENT_REVIEWS]
         return ReviewListSerializer(recent_reviews, many=True).data
 
     def create(self, validated_data):
@@ -332,6 +392,15 @@ class DiscussionSerializer(serializers.ModelSerializer):
         return discussion
 
 
+class CommentListSerializer(serializers.ListSerializer):
+    """Serializes many comments from one shared in-memory comment tree"""
+
+    def to_representation(self, data):
+        comments = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        CommentTree.from_context(self.context, comments)
+        return super().to_representation(comments)
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer for comments"""
     user = UserMinimalSerializer(read_only=True)
@@ -341,10 +410,15 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = [
-            'id', 'user', 'content', 'likes', 'parent', 'replies',
-            'can_edit', 'created_at'
+            'id', 'user', 'content', 'likes', 'parent', 'depth', 'replies',
+            'replies_count', 'can_edit', 'created_at'
         ]
-        read_only_fields = ['likes', 'created_at']
+        read_only_fields = ['likes', 'depth', 'replies_count', 'created_at']
+        list_serializer_class = CommentListSerializer
+
+    def to_representation(self, instance):
+        CommentTree.from_context(self.context, [instance])
+        return super().to_representation(instance)
 
     def get_can_edit(self, obj):
         """Check if current user can edit this comment"""
@@ -352,14 +426,23 @@ class CommentSerializer(serializers.ModelSerializer):
         return request and request.user == obj.user
 
     def get_replies(self, obj):
-        """Get nested replies"""
-        if obj.replies.exists():
-            return CommentSerializer(
-                obj.replies.all(), 
-                many=True, 
-                context=self.context
-            ).data
-        return []
+        """Get nested replies (truncated by the tree's depth and size limits)"""
+        replies = self.context['comment_tree'].replies(obj)
+        return CommentSerializer(replies, many=True, context=self.context).data
+
+    def validate_parent(self, value):
+        """Prevent moving a comment into its own subtree"""
+        if value and self.instance and value.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A comment cannot be moved under itself or one of its replies.")
+        return value
+
+    def validate(self, attrs):
+        """Keep replies in their parent's discussion"""
+        parent = attrs.get('parent')
+        discussion_id = self.instance.discussion_id if self.instance else self.context.get('discussion_id')
+        if parent and discussion_id is not None and parent.discussion_id != int(discussion_id):
+            raise serializers.ValidationError({'parent': "The parent comment belongs to a different discussion."})
+        return attrs
 
 
 class DiscussionDetailSerializer(DiscussionSerializer):
@@ -370,18 +453,26 @@ class DiscussionDetailSerializer(DiscussionSerializer):
         fields = DiscussionSerializer.Meta.fields + ['comments']
 
     def get_comments(self, obj):
-        """Get top-level comments for this discussion"""
-        top_level_comments = obj.comments.filter(parent__isnull=True).order_by('created_at')
+        """Get top-level comments for this discussion, loading the visible thread in one query"""
+        tree = self.context.get('comment_tree') or CommentTree.for_discussion(obj.pk)
         return CommentSerializer(
-            top_level_comments, 
-            many=True, 
-            context=self.context
+            tree.roots,
+            many=True,
+            context=dict(self.context, comment_tree=tree)
         ).data
 
 
+def _rollup(obj, name):
+    """The object's stats rollup row, or None before its first review"""
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
+
+
 class ModelCategoryStatsSerializer(serializers.ModelSerializer):
-    """Serializer for model category statistics"""
-    models_count = serializers.SerializerMethodField()
+    """Serializer for model category statistics, read from the CategoryStats rollup"""
+    models_count = serializers.ReadOnlyField()
     total_reviews = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
 
@@ -392,24 +483,23 @@ class ModelCategoryStatsSerializer(serializers.ModelSerializer):
             'total_reviews', 'average_rating'
         ]
 
-    def get_models_count(self, obj):
-        """Get count of models in this category"""
-        return obj.models.count()
+    @staticmethod
+    def setup_eager_loading(queryset, request):
+        return queryset.select_related('stats')
 
     def get_total_reviews(self, obj):
         """Get total reviews across all models in this category"""
-        return Review.objects.filter(model__category=obj).count()
+        stats = _rollup(obj, 'stats')
+        return stats.reviews_count if stats else 0
 
     def get_average_rating(self, obj):
         """Get average rating across all models in this category"""
-        avg = Review.objects.filter(model__category=obj).aggregate(
-            avg_rating=Avg('overall_rating')
-        )['avg_rating']
-        return round(avg, 2) if avg else 0.00
+        stats = _rollup(obj, 'stats')
+        return stats.average_rating if stats else 0.00
 
 
 class UserStatsSerializer(serializers.ModelSerializer):
-    """Serializer for user statistics"""
+    """Serializer for user statistics, read from the UserStats rollups"""
     average_rating_given = serializers.SerializerMethodField()
     favorite_categories = serializers.SerializerMethodField()
 
@@ -420,17 +510,19 @@ class UserStatsSerializer(serializers.ModelSerializer):
             'helpful_votes_received', 'average_rating_given', 'favorite_categories'
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset, request):
+        return queryset.select_related('stats')
+
     def get_average_rating_given(self, obj):
         """Get average rating given by this user"""
-        avg = obj.reviews.aggregate(avg_rating=Avg('overall_rating'))['avg_rating']
-        return round(avg, 2) if avg else 0.00
+        stats = _rollup(obj, 'stats')
+        return stats.average_rating if stats else 0.00
 
     def get_favorite_categories(self, obj):
         """Get categories this user reviews most"""
         categories = ModelCategory.objects.filter(
-            models__reviews__user=obj
-        ).annotate(
-            review_count=Count('models__reviews')
-        ).order_by('-review_count')[:3]
+            user_stats__user=obj, user_stats__reviews_count__gt=0
+        ).order_by('-user_stats__reviews_count', 'name')[:3]
 
         return ModelCategorySerializer(categories, many=True).data
@@ -1,10 +1,42 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
-from .models import User, ModelCategory, AIModel, Review, Discussion, Comment
+from .models import (
+    User, ModelCategory, AIModel, Review, Discussion, Comment,
+    CategoryStats, UserStats, UserCategoryStats, DiscussionViewBucket, Vote, ModelRatingHistogram,
+    LeaderboardSnapshot, rebuild_rating_histograms,
+)
 from django.utils.text import slugify
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from . import bulk, caching, counters, fragments, leaderboards, metrics, pageviews, ranking, views
+from .pagination import KeysetPagination
+from .projection import Projection
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import AIModelListSerializer, ModelCategorySerializer, ReviewSerializer
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from django.utils.translation import gettext_lazy
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from io import StringIO
+from decimal import Decimal
+import csv
 import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zoneinfo
+from unittest import mock
+from asgiref.sync import iscoroutinefunction
 
 class ModelCreationTests(TestCase):
     def setUp(self):
@@ -79,6 +111,7 @@ class ModelCreationTests(TestCase):
         self.assertEqual(Comment.objects.count(), 1)  # type: ignore
         self.assertEqual(comment.discussion, discussion)
 
+@override_settings(DISCUSSION_VIEWS_FLUSH_INTERVAL=0)  # no background flush outliving the test
 class APITests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -224,3 +257,1716 @@ class APITests(TestCase):
         # Delete comment
         response = self.client.delete(reverse('comment-detail', args=[comment_id]))
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)  # type: ignore
+
+class ModelStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rater', password='ratepass123')
+        self.other_user = User.objects.create_user(username='rater2', password='ratepass123')
+        self.model = AIModel.objects.create(name='T5', creator='Google')  # type: ignore
+        self.other_model = AIModel.objects.create(name='BART', creator='Meta')  # type: ignore
+
+    def review(self, user, model, score, **kwargs):
+        scores = dict(accuracy=score, speed=score, cost_efficiency=score, ease_of_use=score, reliability=score)
+        scores.update(kwargs)
+        return Review.objects.create(user=user, model=model, title='Review', description='Text', **scores)  # type: ignore
+
+    def test_create_update_delete_keep_running_sums(self):
+        first = self.review(self.user, self.model, 5)
+        self.review(self.other_user, self.model, 3, accuracy=4)
+        self.model.refresh_from_db()
+        self.assertEqual(self.model.reviews_count, 2)
+        self.assertEqual(self.model.accuracy_sum, 9)
+        self.assertEqual(self.model.speed_sum, 8)
+        self.assertEqual(str(self.model.average_rating), '4.10')
+
+        first = Review.objects.get(pk=first.pk)  # type: ignore
+        first.speed = 1
+        first.save()
+        self.model.refresh_from_db()
+        self.assertEqual(self.model.reviews_count, 2)
+        self.assertEqual(self.model.speed_sum, 4)
+        self.assertEqual(str(self.model.average_rating), '3.70')
+
+        first.delete()
+        self.model.refresh_from_db()
+        self.assertEqual(self.model.reviews_count, 1)
+        self.assertEqual(self.model.dimension_averages['accuracy'], 4)
+        self.assertEqual(str(self.model.average_rating), '3.20')
+
+    def test_repeated_saves_and_refreshes_keep_running_sums(self):
+        review = self.review(self.user, self.model, 3)
+        for speed in (4, 1, 5):
+            review.speed = speed
+            review.save()
+        # Another copy changes the row; the refreshed one must diff against it
+        copy = Review.objects.get(pk=review.pk)  # type: ignore
+        copy.accuracy = 1
+        copy.save()
+        review.refresh_from_db()
+        review.accuracy = 2
+        review.save()
+        copy.refresh_from_db(fields=['accuracy'])
+        copy.accuracy = 5
+        copy.save()
+        self.model.refresh_from_db()
+        self.assertEqual((self.model.reviews_count, self.model.speed_sum, self.model.accuracy_sum), (1, 5, 5))
+        call_command('rebuild_model_stats', stdout=StringIO())
+        self.model.refresh_from_db()
+        self.assertEqual((self.model.speed_sum, self.model.accuracy_sum), (5, 5))
+
+    def test_moving_review_shifts_stats_between_models(self):
+        review = self.review(self.user, self.model, 4)
+        review = Review.objects.get(pk=review.pk)  # type: ignore
+        review.model = self.other_model
+        review.save()
+        self.model.refresh_from_db()
+        self.other_model.refresh_from_db()
+        self.assertEqual((self.model.reviews_count, self.model.accuracy_sum), (0, 0))
+        self.assertEqual(str(self.model.average_rating), '0.00')
+        self.assertEqual((self.other_model.reviews_count, self.other_model.accuracy_sum), (1, 4))
+
+    def test_rebuild_command_fixes_drift(self):
+        self.review(self.user, self.model, 4)
+        AIModel.objects.filter(pk=self.model.pk).update(reviews_count=7, speed_sum=0, average_rating=1)  # type: ignore
+        call_command('rebuild_model_stats', stdout=StringIO())
+        self.model.refresh_from_db()
+        self.assertEqual((self.model.reviews_count, self.model.speed_sum), (1, 4))
+        self.assertEqual(str(self.model.average_rating), '4.00')
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='poster', password='postpass123')
+        self.discussion = Discussion.objects.create(title='Thread', content='Body', user=self.user)  # type: ignore
+        counters.flush()  # the test transaction never commits, so recount setUp's writes now
+
+    def test_counters_flush_once_per_table_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Comment.objects.create(user=self.user, discussion=self.discussion, content=f'c{i}')  # type: ignore
+            Discussion.objects.create(title='Second', content='Body', user=self.user)  # type: ignore
+            self.discussion.refresh_from_db()
+            self.assertEqual(self.discussion.comments_count, 0)
+        self.discussion.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.discussion.comments_count, 5)
+        self.assertEqual(self.user.discussions_count, 2)
+
+    def test_deferred_block_issues_one_update_per_table(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with counters.deferred():
+                for i in range(3):
+                    Comment.objects.create(user=self.user, discussion=self.discussion, content=f'c{i}')  # type: ignore
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "modelmate_discussion"')]
+        self.assertEqual(len(updates), 1)
+        self.discussion.refresh_from_db()
+        self.assertEqual(self.discussion.comments_count, 3)
+
+    async def test_async_requests_defer_counters(self):
+        async def get_response(request):
+            for i in range(3):
+                await Comment.objects.acreate(user=self.user, discussion=self.discussion, content=f'c{i}')  # type: ignore
+            return await Discussion.objects.values_list('comments_count', flat=True).aget(pk=self.discussion.pk)  # type: ignore
+
+        middleware = counters.DeferredCountersMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))  # no thread hop under ASGI
+        self.assertEqual(await middleware(None), 0)  # held until the request ends
+        await self.discussion.arefresh_from_db()
+        self.assertEqual(self.discussion.comments_count, 3)
+
+    @override_settings(COUNTERS_SYNC=True)
+    def test_sync_mode_recounts_immediately(self):
+        comment = Comment.objects.create(user=self.user, discussion=self.discussion, content='hi')  # type: ignore
+        self.discussion.refresh_from_db()
+        self.assertEqual(self.discussion.comments_count, 1)
+        comment.delete()
+        self.discussion.refresh_from_db()
+        self.assertEqual(self.discussion.comments_count, 0)
+
+
+@override_settings(COUNTERS_SYNC=True, DISCUSSION_VIEWS_FLUSH_INTERVAL=3600)
+class CommentTreeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='threader', password='threadpass123')
+        self.discussion = Discussion.objects.create(title='Thread', content='Body', user=self.user)  # type: ignore
+
+    def tearDown(self):
+        pageviews.buffer.flush()
+
+    def comment(self, parent=None, content='reply'):
+        return Comment.objects.create(user=self.user, discussion=self.discussion, parent=parent, content=content)  # type: ignore
+
+    def test_discussion_detail_query_count_is_independent_of_thread_size(self):
+        root = self.comment()
+        self.comment(parent=self.comment(parent=root))
+        url = reverse('discussion-detail', args=[self.discussion.id])
+        for _ in range(10):
+            self.comment(parent=self.comment(parent=root))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 3)  # the ETag validators, the discussion, then the whole thread
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+        replies = response.data['comments'][0]['replies']  # type: ignore
+        self.assertEqual(len(replies), 11)
+        self.assertEqual(len(replies[0]['replies']), 1)
+
+    @override_settings(COMMENT_TREE_MAX_DEPTH=1)
+    def test_depth_limit_and_replies_endpoint(self):
+        root = self.comment()
+        child = self.comment(parent=root)
+        self.comment(parent=child, content='deep')
+        response = self.client.get(reverse('discussion-detail', args=[self.discussion.id]))
+        nested = response.data['comments'][0]['replies'][0]  # type: ignore
+        self.assertEqual(nested['replies'], [])
+        self.assertEqual(nested['replies_count'], 1)
+
+        response = self.client.get(reverse('comment-replies', args=[child.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+        self.assertEqual([c['content'] for c in response.data['results']], ['deep'])  # type: ignore
+
+    def test_paths_give_display_order_and_subtree_ranges(self):
+        first = self.comment(content='first')
+        second = self.comment(content='second')
+        child = self.comment(parent=first, content='child')
+        grandchild = self.comment(parent=child, content='grandchild')
+        ordered = Comment.objects.filter(discussion=self.discussion).order_by('path')  # type: ignore
+        self.assertEqual([c.content for c in ordered], ['first', 'child', 'grandchild', 'second'])
+        self.assertEqual(grandchild.depth, 2)
+        subtree = Comment.objects.filter(first.subtree_filter())  # type: ignore
+        self.assertEqual({c.pk for c in subtree}, {child.pk, grandchild.pk})
+        self.assertFalse(Comment.objects.filter(second.subtree_filter()).exists())  # type: ignore
+
+    def test_moving_comment_reroots_its_subtree(self):
+        first = self.comment()
+        second = self.comment()
+        child = self.comment(parent=first)
+        grandchild = self.comment(parent=child)
+        child = Comment.objects.get(pk=child.pk)  # type: ignore
+        child.parent = second
+        child.save()
+        grandchild.refresh_from_db()
+        self.assertTrue(grandchild.path.startswith(second.path))
+        self.assertEqual(grandchild.depth, 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.replies_count, second.replies_count), (0, 1))
+        with self.assertRaises(ValidationError):
+            child.parent = grandchild
+            child.save()
+
+    def test_parent_must_belong_to_the_same_discussion(self):
+        other = Discussion.objects.create(title='Other', content='Body', user=self.user)  # type: ignore
+        foreign = Comment.objects.create(user=self.user, discussion=other, content='elsewhere')  # type: ignore
+        own = self.comment()
+        self.client.force_authenticate(user=self.user)
+        url = reverse('discussion-comment-list', args=[self.discussion.id])
+        response = self.client.post(url, {'content': 'reply', 'parent': foreign.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)  # type: ignore
+        self.assertIn('parent', response.data)  # type: ignore
+        response = self.client.patch(reverse('comment-detail', args=[own.id]), {'parent': foreign.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)  # type: ignore
+        response = self.client.post(url, {'content': 'reply', 'parent': own.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)  # type: ignore
+
+    def test_comment_list_uses_cursor_pagination_in_display_order(self):
+        root = self.comment(content='root')
+        for i in range(12):
+            self.comment(parent=root, content=f'reply {i}')
+        response = self.client.get(reverse('discussion-comment-list', args=[self.discussion.id]))
+        self.assertNotIn('count', response.data)  # type: ignore
+        self.assertEqual(response.data['results'][0]['content'], 'root')  # type: ignore
+        next_page = self.client.get(response.data['next'])  # type: ignore
+        self.assertEqual(next_page.data['results'][0]['content'], 'reply 9')  # type: ignore
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # 25 models, many sharing the same rating so the name/pk tiebreakers matter
+        for i in range(25):
+            AIModel.objects.create(name=f'model-{i:02d}', creator='Lab', average_rating=i % 3)  # type: ignore
+
+    def collect(self, url):
+        names, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+            names += [row['name'] for row in response.data['results']]  # type: ignore
+            url, pages = response.data['next'], pages + 1  # type: ignore
+        return names, pages
+
+    def test_walks_default_ordering_without_gaps_or_duplicates(self):
+        names, pages = self.collect(reverse('model-list'))
+        expected = list(AIModel.objects.order_by('-rank_score', 'name').values_list('name', flat=True))  # type: ignore
+        self.assertEqual(names, expected)
+        self.assertEqual(pages, 3)
+
+    def test_follows_ordering_filter_and_nullable_columns(self):
+        AIModel.objects.filter(name__lt='model-05').update(release_date=datetime.date(2020, 1, 1))  # type: ignore
+        names, _ = self.collect(reverse('model-list') + '?ordering=release_date')
+        self.assertEqual(len(names), 25)
+        self.assertEqual(len(set(names)), 25)
+        self.assertEqual(names[:5], [f'model-{i:02d}' for i in range(5)])
+
+    def test_previous_link_and_count(self):
+        first = self.client.get(reverse('model-list') + '?count=1')
+        self.assertEqual(first.data['count'], 25)  # type: ignore
+        self.assertIsNone(first.data['previous'])  # type: ignore
+        second = self.client.get(first.data['next'])  # type: ignore
+        back = self.client.get(second.data['previous'])  # type: ignore
+        self.assertEqual(back.data['results'], first.data['results'])  # type: ignore
+
+    def test_rejects_tampered_cursor(self):
+        response = self.client.get(reverse('model-list') + '?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)  # type: ignore
+
+
+class ModelSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AIModel.objects.create(name='Vision Transformer', creator='Google', architecture='Transformer', average_rating=3)  # type: ignore
+        AIModel.objects.create(name='Whisper', creator='OpenAI', description='Speech model built on a transformer', average_rating=5)  # type: ignore
+        AIModel.objects.create(name='ResNet', creator='Microsoft', architecture='CNN', average_rating=4)  # type: ignore
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('model-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+        return [row['name'] for row in response.data['results']]  # type: ignore
+
+    def test_ranks_name_matches_above_description_matches(self):
+        self.assertEqual(self.search('transformer'), ['Vision Transformer', 'Whisper'])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('transformer google'), ['Vision Transformer'])
+        self.assertEqual(self.search('transformer microsoft'), [])
+
+    def test_explicit_ordering_overrides_relevance(self):
+        self.assertEqual(self.search('transformer', ordering='-average_rating'), ['Whisper', 'Vision Transformer'])
+
+    def test_relevance_ordering_pages_with_cursor(self):
+        for i in range(12):
+            AIModel.objects.create(name=f'Transformer {i}', creator='Lab', average_rating=i % 5)  # type: ignore
+        seen, url = [], reverse('model-list') + '?search=transformer'
+        while url:
+            response = self.client.get(url)
+            seen += [row['name'] for row in response.data['results']]  # type: ignore
+            url = response.data['next']  # type: ignore
+        self.assertEqual(len(seen), 14)
+        self.assertEqual(len(set(seen)), 14)
+
+
+class UnifiedSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='searcher', password='searchpass123')
+        self.model = AIModel.objects.create(name='Llama', creator='Meta', description='Open <b>weights</b> llama model')  # type: ignore
+        Review.objects.create(  # type: ignore
+            user=self.user, model=self.model, accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4,
+            title='Solid llama', description='Runs well on a single GPU'
+        )
+        self.discussion = Discussion.objects.create(title='Fine-tuning', content='Any llama tips?', user=self.user)  # type: ignore
+        Comment.objects.create(user=self.user, discussion=self.discussion, content='Use LoRA on llama')  # type: ignore
+
+    def test_groups_hits_by_type_with_escaped_highlights(self):
+        response = self.client.get(reverse('search'), {'q': 'llama'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+        results = response.data['results']  # type: ignore
+        self.assertEqual({kind: len(hits) for kind, hits in results.items()},
+                         {'models': 1, 'reviews': 1, 'discussions': 1, 'comments': 1})
+        self.assertEqual(results['models'][0]['snippet'], 'Open &lt;b&gt;weights&lt;/b&gt; <mark>llama</mark> model')
+        self.assertEqual(results['reviews'][0]['parent_id'], self.model.id)
+        self.assertEqual(results['comments'][0]['parent_id'], self.discussion.id)
+
+    def test_types_and_limit(self):
+        Discussion.objects.create(title='Llama vs Mistral', content='Which one?', user=self.user)  # type: ignore
+        response = self.client.get(reverse('search'), {'q': 'llama', 'types': 'discussions', 'limit': 1})
+        results = response.data['results']  # type: ignore
+        self.assertEqual(list(results), ['discussions'])
+        self.assertEqual(results['discussions'][0]['title'], 'Llama vs Mistral')
+
+
+@override_settings(COUNTERS_SYNC=True)
+class ListQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.categories = [
+            ModelCategory.objects.create(name=f'Category {i}', slug=f'category-{i}')  # type: ignore
+            for i in range(3)
+        ]
+
+    def add_models(self, count):
+        for i in range(count):
+            AIModel.objects.create(  # type: ignore
+                name=f'model-{AIModel.objects.count()}', creator='Lab',  # type: ignore
+                category=self.categories[i % len(self.categories)]
+            )
+
+    def test_model_list_query_count_is_independent_of_page_size(self):
+        for count in (2, 10):
+            self.add_models(count)
+            with self.assertNumQueries(2):  # the ETag validators, then the page
+                response = self.client.get(reverse('model-list'))
+            self.assertEqual(len(response.data['results']), min(AIModel.objects.count(), 10))  # type: ignore
+
+    def test_category_list_reads_stored_models_count(self):
+        self.add_models(6)
+        with self.assertNumQueries(2):  # the ETag validators, then the page
+            response = self.client.get(reverse('category-list'))
+        self.assertEqual([c['models_count'] for c in response.data['results']], [2, 2, 2])  # type: ignore
+
+    def test_models_count_follows_category_changes(self):
+        model = AIModel.objects.create(name='Mover', creator='Lab', category=self.categories[0])  # type: ignore
+        model = AIModel.objects.get(pk=model.pk)  # type: ignore
+        model.category = self.categories[1]
+        model.save()
+        counts = dict(ModelCategory.objects.values_list('slug', 'models_count'))  # type: ignore
+        self.assertEqual((counts['category-0'], counts['category-1']), (0, 1))
+        model.delete()
+        self.assertEqual(ModelCategory.objects.get(pk=self.categories[1].pk).models_count, 0)  # type: ignore
+
+
+class CounterRollbackTests(TransactionTestCase):
+    def test_rolled_back_marks_do_not_swallow_later_ones(self):
+        user = User.objects.create_user(username='poster', password='postpass123')
+        discussion = Discussion.objects.create(title='Thread', content='Body', user=user)  # type: ignore
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Comment.objects.create(user=user, discussion=discussion, content='gone')  # type: ignore
+            raise RuntimeError
+        with transaction.atomic():
+            Comment.objects.create(user=user, discussion=discussion, content='kept')  # type: ignore
+        discussion.refresh_from_db()
+        self.assertEqual(discussion.comments_count, 1)
+
+    def test_rolled_back_savepoint_keeps_the_outer_marks(self):
+        user = User.objects.create_user(username='poster', password='postpass123')
+        threads = [Discussion.objects.create(title=f'T{i}', content='Body', user=user) for i in range(3)]  # type: ignore
+        with transaction.atomic():
+            Comment.objects.create(user=user, discussion=threads[0], content='outer')  # type: ignore
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Comment.objects.create(user=user, discussion=threads[1], content='gone')  # type: ignore
+                raise RuntimeError
+            Comment.objects.create(user=user, discussion=threads[2], content='after')  # type: ignore
+        counts = dict(Discussion.objects.values_list('title', 'comments_count'))  # type: ignore
+        self.assertEqual(counts, {'T0': 1, 'T1': 0, 'T2': 1})
+
+    def test_one_flush_per_transaction(self):
+        user = User.objects.create_user(username='poster', password='postpass123')
+        threads = [Discussion.objects.create(title=f'T{i}', content='Body', user=user) for i in range(3)]  # type: ignore
+        with transaction.atomic():
+            for thread in threads:
+                Comment.objects.create(user=user, discussion=thread, content='hi')  # type: ignore
+            flushes = [func for _, func, _ in connection.run_on_commit if func.__qualname__.startswith('_flush_on_commit')]
+            self.assertEqual(len(flushes), 1)
+        self.assertEqual([thread.comments_count for thread in Discussion.objects.all()], [1, 1, 1])  # type: ignore
+
+
+@override_settings(COUNTERS_SYNC=True)
+class StatsRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='roller', password='rollpass123')
+        self.other_user = User.objects.create_user(username='roller2', password='rollpass123')
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.vision = ModelCategory.objects.create(name='Vision', slug='vision')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp)  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI', category=self.nlp)  # type: ignore
+        self.vit = AIModel.objects.create(name='ViT', creator='Google', category=self.vision)  # type: ignore
+
+    def review(self, user, model, score, **kwargs):
+        scores = dict(accuracy=score, speed=score, cost_efficiency=score, ease_of_use=score, reliability=score)
+        scores.update(kwargs)
+        return Review.objects.create(user=user, model=model, title='Review', description='Text', **scores)  # type: ignore
+
+    def snapshot(self):
+        return (
+            sorted(CategoryStats.objects.filter(reviews_count__gt=0).values_list('category', 'reviews_count', 'score_sum')),  # type: ignore
+            sorted(UserStats.objects.filter(reviews_count__gt=0).values_list('user', 'reviews_count', 'score_sum')),  # type: ignore
+            sorted(UserCategoryStats.objects.filter(reviews_count__gt=0).values_list(  # type: ignore
+                'user', 'category', 'reviews_count')),
+        )
+
+    def test_rollups_follow_review_writes(self):
+        first = self.review(self.user, self.bert, 5)
+        self.review(self.user, self.gpt, 3, accuracy=4)
+        self.review(self.other_user, self.vit, 2)
+        stats = CategoryStats.objects.get(category=self.nlp)  # type: ignore
+        self.assertEqual((stats.reviews_count, stats.score_sum, stats.average_rating), (2, 41, 4.1))
+
+        first = Review.objects.get(pk=first.pk)  # type: ignore
+        first.model = self.vit
+        first.speed = 1
+        first.save()
+        self.assertEqual(CategoryStats.objects.get(category=self.vision).score_sum, 31)  # type: ignore
+        self.assertEqual(UserStats.objects.get(user=self.user).score_sum, 37)  # type: ignore
+
+        first.delete()
+        Review.objects.filter(model=self.vit).delete()  # type: ignore
+        rolled_up = self.snapshot()
+        call_command('rebuild_stats_rollups', stdout=StringIO())
+        self.assertEqual(self.snapshot(), rolled_up)
+        self.assertEqual(rolled_up[0], [(self.nlp.pk, 1, 16)])
+
+    def test_moving_model_between_categories_moves_its_reviews(self):
+        self.review(self.user, self.bert, 4)
+        self.review(self.other_user, self.bert, 2)
+        bert = AIModel.objects.get(pk=self.bert.pk)  # type: ignore
+        bert.category = self.vision
+        bert.save()
+        self.assertEqual(CategoryStats.objects.get(category=self.vision).reviews_count, 2)  # type: ignore
+        self.assertFalse(CategoryStats.objects.filter(category=self.nlp).exists())  # type: ignore
+        self.assertEqual(
+            list(self.user.category_stats.values_list('category', 'reviews_count')), [(self.vision.pk, 1)]
+        )
+
+    def test_category_stats_is_a_single_query(self):
+        self.review(self.user, self.bert, 5)
+        self.review(self.other_user, self.gpt, 4)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('category-stats', args=[self.nlp.pk]))
+        self.assertEqual(response.data['models_count'], 2)  # type: ignore
+        self.assertEqual(response.data['total_reviews'], 2)  # type: ignore
+        self.assertEqual(response.data['average_rating'], 4.5)  # type: ignore
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('category-stats', args=[self.vision.pk]))
+        self.assertEqual((response.data['total_reviews'], response.data['average_rating']), (0, 0.0))  # type: ignore
+
+    def test_user_stats_reads_rollups(self):
+        self.review(self.user, self.bert, 5)
+        self.review(self.user, self.gpt, 4)
+        self.review(self.user, self.vit, 3)
+        # The user row with its rollup joined, then the top categories off the (user, -reviews_count) index
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('user-stats', args=[self.user.username]))
+        self.assertEqual(response.data['average_rating_given'], 4.0)  # type: ignore
+        self.assertEqual([c['slug'] for c in response.data['favorite_categories']], ['nlp', 'vision'])  # type: ignore
+
+
+@override_settings(COUNTERS_SYNC=True, RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        counters.flush()
+        caching.local_cache().clear()
+        caching.shared_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='cacher', password='cachepass123')
+        self.category = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.model = AIModel.objects.create(name='BERT', creator='Google', category=self.category)  # type: ignore
+
+    def test_anonymous_gets_are_served_from_cache(self):
+        url = reverse('model-detail', args=[self.model.pk])
+        first = self.client.get(url)
+        with self.assertNumQueries(1):  # only the conditional GET validators
+            second = self.client.get(url)
+        self.assertEqual(second.data, first.data)  # type: ignore
+        with self.assertNumQueries(3):  # query params are part of the key
+            self.client.get(url, {'format': 'json'})
+
+    def test_writes_invalidate_dependent_views(self):
+        list_url, detail_url = reverse('model-list'), reverse('model-detail', args=[self.model.pk])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        categories = self.client.get(reverse('category-list'))
+        self.assertEqual(categories.data['results'][0]['models_count'], 1)  # type: ignore
+
+        Review.objects.create(  # type: ignore
+            user=self.user, model=self.model, title='Good', description='Text',
+            accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4
+        )
+        self.assertEqual(self.client.get(list_url).data['results'][0]['reviews_count'], 1)  # type: ignore
+        self.assertEqual(len(self.client.get(detail_url).data['recent_reviews']), 1)  # type: ignore
+
+        AIModel.objects.create(name='GPT', creator='OpenAI', category=self.category)  # type: ignore
+        categories = self.client.get(reverse('category-list'))
+        self.assertEqual(categories.data['results'][0]['models_count'], 2)  # type: ignore
+
+    def test_comment_counts_invalidate_discussion_list(self):
+        discussion = Discussion.objects.create(user=self.user, title='Thread', content='Text')  # type: ignore
+        url = reverse('discussion-list')
+        self.assertEqual(self.client.get(url).data['results'][0]['comments_count'], 0)  # type: ignore
+        Comment.objects.create(user=self.user, discussion=discussion, content='Reply')  # type: ignore
+        self.assertEqual(self.client.get(url).data['results'][0]['comments_count'], 1)  # type: ignore
+
+    def test_authenticated_requests_bypass_cache(self):
+        url = reverse('model-detail', args=[self.model.pk])
+        self.client.get(url)
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):  # validators, the model with user_has_reviewed, its recent reviews
+            self.client.get(url)
+
+    def test_concurrent_misses_build_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return 'value', True
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.get_or_build(('key',), ['group'], build)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(len(builds), 1)
+
+
+@override_settings(COUNTERS_SYNC=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        counters.flush()
+        caching.shared_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='etagger', password='etagpass123')
+        self.model = AIModel.objects.create(name='BERT', creator='Google')  # type: ignore
+        self.discussion = Discussion.objects.create(user=self.user, title='Thread', content='Text')  # type: ignore
+
+    def age(self):
+        """Move every change so far an hour back, out of the current second"""
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        for model in (User, ModelCategory, AIModel, Review, Discussion, Comment):
+            model.objects.update(updated_at=hour_ago)  # type: ignore
+        groups = [
+            'models', 'categories', 'users', 'discussions', f'model:{self.model.pk}', f'user:{self.user.pk}',
+            f'discussion:{self.discussion.pk}', f'model:{self.discussion.model_id}',
+        ]
+        caching.shared_cache().set_many({caching._bumped_key(group): hour_ago.timestamp() for group in groups})
+
+    def test_matching_etag_returns_304_without_serializing(self):
+        url = reverse('model-detail', args=[self.model.pk])
+        self.age()
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        url = reverse('user-detail', args=[self.user.username])
+        self.age()
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_last_modified_follows_changes_outside_updated_at(self):
+        category = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        doomed = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+        counters.flush()
+        self.age()
+        urls = {
+            'thread': reverse('discussion-detail', args=[self.discussion.pk]),
+            'models': reverse('model-list'),
+            'categories': reverse('category-list'),
+        }
+        since = {name: self.client.get(url)['Last-Modified'] for name, url in urls.items()}
+        for name, url in urls.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since[name]).status_code, 304, name)
+
+        Comment.objects.create(user=self.user, discussion=self.discussion, content='New')  # type: ignore
+        doomed.delete()
+        self.model.category = category
+        self.model.save(update_fields=['category'])
+        counters.flush()
+        # None of these touch the rows' updated_at as the lists read it
+        Discussion.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))  # type: ignore
+        AIModel.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))  # type: ignore
+        ModelCategory.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))  # type: ignore
+        for name, url in urls.items():
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since[name])
+            self.assertEqual(response.status_code, 200, name)
+            # Still within the second of the change: no Last-Modified a later change could fail to move
+            self.assertNotIn('Last-Modified', response)
+            self.assertIn('ETag', response)
+
+    def test_writes_change_validators(self):
+        detail_url = reverse('model-detail', args=[self.model.pk])
+        list_url = reverse('discussion-comment-list', args=[self.discussion.pk])
+        detail_etag = self.client.get(detail_url)['ETag']
+        list_etag = self.client.get(list_url)['ETag']
+
+        Review.objects.create(  # type: ignore
+            user=self.user, model=self.model, title='Good', description='Text',
+            accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4
+        )
+        comment = Comment.objects.create(user=self.user, discussion=self.discussion, content='Hi')  # type: ignore
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+        list_etag = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)['ETag']
+
+        # Deleting leaves max(updated_at) alone; the group version still moves
+        comment.delete()
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def test_etag_varies_by_user_and_query(self):
+        url = reverse('model-list')
+        anonymous = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'ordering': 'release_date'})['ETag'], anonymous)
+        self.client.force_authenticate(self.user)
+        self.assertNotEqual(self.client.get(url)['ETag'], anonymous)
+
+    def test_missing_object_is_404(self):
+        response = self.client.get(reverse('review-detail', args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(DISCUSSION_VIEWS_FLUSH_INTERVAL=3600, DISCUSSION_VIEW_DEDUP_WINDOW=0)
+class DiscussionViewTests(TestCase):
+    def setUp(self):
+        pageviews.buffer.flush()
+        caching.shared_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='viewer', password='viewpass123')
+        self.hot = Discussion.objects.create(user=self.user, title='Hot', content='Text')  # type: ignore
+        self.cold = Discussion.objects.create(user=self.user, title='Cold', content='Text')  # type: ignore
+
+    def tearDown(self):
+        pageviews.buffer.flush()
+
+    def test_views_are_buffered_then_flushed_in_one_update(self):
+        for _ in range(5):
+            self.client.get(reverse('discussion-detail', args=[self.hot.pk]))
+        self.client.get(reverse('discussion-detail', args=[self.cold.pk]))
+        self.assertEqual(Discussion.objects.get(pk=self.hot.pk).views, 0)  # type: ignore
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(pageviews.buffer.flush(), 6)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "modelmate_discussion"')]
+        self.assertEqual(len(updates), 1)
+        views = dict(Discussion.objects.values_list('title', 'views'))  # type: ignore
+        self.assertEqual(views, {'Hot': 5, 'Cold': 1})
+
+        self.client.get(reverse('discussion-detail', args=[self.hot.pk]))
+        pageviews.buffer.flush()
+        self.assertEqual(Discussion.objects.get(pk=self.hot.pk).views, 6)  # type: ignore
+        self.assertEqual(self.hot.view_buckets.get().views, 6)
+
+    @override_settings(DISCUSSION_VIEW_DEDUP_WINDOW=60)
+    def test_repeat_views_within_window_count_once(self):
+        url = reverse('discussion-detail', args=[self.hot.pk])
+        self.client.get(url)
+        self.client.get(url)
+        self.client.force_authenticate(self.user)
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(pageviews.buffer.flush(), 2)  # one anonymous IP, one user
+
+    def test_trending_includes_buffered_views(self):
+        DiscussionViewBucket.objects.create(  # type: ignore
+            discussion=self.cold, hour=timezone.now() - datetime.timedelta(hours=30), views=20
+        )
+        for _ in range(3):
+            pageviews.record_view(self.hot.pk)
+        response = self.client.get(reverse('discussion-trending'))
+        self.assertEqual([d['title'] for d in response.data], ['Hot', 'Cold'])  # type: ignore
+        response = self.client.get(reverse('discussion-trending'), {'hours': 12})
+        self.assertEqual([d['title'] for d in response.data], ['Hot'])  # type: ignore
+
+    def test_trending_is_ranked_in_the_database(self):
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        warm = Discussion.objects.create(user=self.user, title='Warm', content='Text')  # type: ignore
+        DiscussionViewBucket.objects.bulk_create([  # type: ignore
+            DiscussionViewBucket(discussion=self.cold, hour=hour - datetime.timedelta(hours=40), views=50),
+            DiscussionViewBucket(discussion=self.cold, hour=hour, views=1),
+            DiscussionViewBucket(discussion=warm, hour=hour - datetime.timedelta(hours=3), views=10),
+            DiscussionViewBucket(discussion=self.hot, hour=hour - datetime.timedelta(hours=20), views=5),
+        ])
+        # Scores: warm 10 / 5 ** 1.5 ~ 0.89, cold 50 / 42 ** 1.5 + 1 / 2 ** 1.5 ~ 0.53, hot 5 / 22 ** 1.5 ~ 0.05
+        self.assertEqual([d.title for d in pageviews.trending(limit=2)], ['Warm', 'Cold'])
+        for _ in range(4):
+            pageviews.record_view(self.hot.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            titles = [d.title for d in pageviews.trending(limit=2)]
+        self.assertEqual(titles, ['Hot', 'Warm'])  # buffered views lift a discussion outside the top 2
+        self.assertEqual(len(ctx.captured_queries), 3)  # top scores, the buffered ones, the discussions
+
+    @override_settings(DISCUSSION_VIEWS_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_through(self):
+        pageviews.record_view(self.hot.pk)
+        self.assertEqual(Discussion.objects.get(pk=self.hot.pk).views, 1)  # type: ignore
+
+
+class VoteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='authorpass123')
+        self.voter = User.objects.create_user(username='voter', password='voterpass123')
+        self.model = AIModel.objects.create(name='BERT', creator='Google')  # type: ignore
+        self.review = Review.objects.create(  # type: ignore
+            user=self.author, model=self.model, title='Good', description='Text',
+            accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4
+        )
+        self.discussion = Discussion.objects.create(user=self.author, title='Thread', content='Text')  # type: ignore
+        self.comment = Comment.objects.create(user=self.author, discussion=self.discussion, content='Hi')  # type: ignore
+        self.client.force_authenticate(self.voter)
+
+    def test_votes_are_idempotent(self):
+        url = reverse('review-helpful', args=[self.review.pk])
+        for _ in range(3):
+            response = self.client.post(url)
+        self.assertEqual(response.data, {'voted': True, 'helpful_votes': 1})  # type: ignore
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 1)  # type: ignore
+
+        for _ in range(2):
+            response = self.client.delete(url)
+        self.assertEqual(response.data, {'voted': False, 'helpful_votes': 0})  # type: ignore
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 0)  # type: ignore
+        self.assertFalse(Vote.objects.exists())  # type: ignore
+
+    def test_likes(self):
+        self.client.post(reverse('discussion-like', args=[self.discussion.pk]))
+        response = self.client.post(reverse('comment-like', args=[self.comment.pk]))
+        self.assertEqual(response.data, {'voted': True, 'likes': 1})  # type: ignore
+        self.assertEqual(Discussion.objects.get(pk=self.discussion.pk).likes, 1)  # type: ignore
+        # Likes don't count as helpful votes
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 0)  # type: ignore
+
+    def test_rules(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post(reverse('review-helpful', args=[self.review.pk]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(None)
+        response = self.client.post(reverse('discussion-like', args=[self.discussion.pk]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(self.voter)
+        response = self.client.post(reverse('comment-like', args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_voter_or_target_keeps_ledger_consistent(self):
+        Vote.cast(self.voter, self.review)
+        Vote.cast(self.voter, self.discussion)
+        self.voter.delete()
+        self.assertEqual(Review.objects.get(pk=self.review.pk).helpful_votes, 0)  # type: ignore
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 0)  # type: ignore
+        self.assertEqual(Discussion.objects.get(pk=self.discussion.pk).likes, 0)  # type: ignore
+
+        other = User.objects.create_user(username='other', password='otherpass123')
+        Vote.cast(other, self.comment)
+        self.comment.delete()
+        self.assertFalse(Vote.objects.exists())  # type: ignore
+
+    def test_deleting_a_review_takes_its_votes_off_the_author(self):
+        other = User.objects.create_user(username='other', password='otherpass123')
+        Vote.cast(self.voter, self.review)
+        Vote.cast(other, self.review)
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 2)  # type: ignore
+        self.review.delete()
+        self.assertEqual(User.objects.get(pk=self.author.pk).helpful_votes_received, 0)  # type: ignore
+        self.assertFalse(Vote.objects.exists())  # type: ignore
+
+
+class VoteLoadTests(TransactionTestCase):
+    """Many threads clicking 'helpful' on one review at once, each voter several times"""
+    voters = 16
+    clicks = 3
+
+    def setUp(self):
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite locks the whole database against concurrent writers')
+
+    def test_concurrent_votes(self):
+        author = User.objects.create_user(username='author', password='authorpass123')
+        model = AIModel.objects.create(name='BERT', creator='Google')  # type: ignore
+        review = Review.objects.create(  # type: ignore
+            user=author, model=model, title='Good', description='Text',
+            accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4
+        )
+        voters = [User.objects.create_user(username=f'voter{i}', password='voterpass123') for i in range(self.voters)]
+        url = reverse('review-helpful', args=[review.pk])
+        barrier = threading.Barrier(self.voters * self.clicks)
+        errors = []
+
+        def click(voter):
+            client = APIClient()
+            client.force_authenticate(voter)
+            try:
+                barrier.wait()
+                response = client.post(url)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=click, args=(voter,)) for voter in voters for _ in range(self.clicks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Vote.objects.filter(target_id=review.pk).count(), self.voters)  # type: ignore
+        self.assertEqual(Review.objects.get(pk=review.pk).helpful_votes, self.voters)  # type: ignore
+        self.assertEqual(User.objects.get(pk=author.pk).helpful_votes_received, self.voters)  # type: ignore
+
+
+class ModelImportTests(TestCase):
+    CSV = (
+        'name,creator,category,release_date,description\n'
+        'BERT,Google,nlp,2018-10-11,Encoder\n'
+        'ViT,Google,vision,2020-10-22,Vision transformer\n'
+        ',Nobody,nlp,,Missing name\n'
+        'GPT-2,OpenAI,audio,,Unknown category\n'
+        'T5,Google,nlp,not-a-date,Bad date\n'
+        'BERT,Google,nlp,2018-10-11,Encoder (duplicate; last wins)\n'
+    )
+
+    def setUp(self):
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.vision = ModelCategory.objects.create(name='Vision', slug='vision')  # type: ignore
+
+    def run_import(self, text, fmt, batch_size=2):
+        rejected = StringIO()
+        stats = bulk.ModelImporter(batch_size=batch_size).run(
+            bulk.read_rows(StringIO(text), fmt), bulk.RejectWriter(rejected, fmt)
+        )
+        return stats, rejected.getvalue()
+
+    def test_csv_upserts_in_batches_and_rejects_bad_rows(self):
+        existing = AIModel.objects.create(name='ViT', creator='Google', category=self.nlp, size='86M')  # type: ignore
+        with CaptureQueriesContext(connection) as ctx:
+            stats, rejected = self.run_import(self.CSV, 'csv')
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "modelmate_aimodel"')]
+        self.assertEqual(len(inserts), 2)  # one upsert per batch of two distinct models
+        self.assertEqual((stats.rows, stats.created, stats.updated, stats.rejected), (6, 1, 2, 3))
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.category_id, existing.size), (self.vision.pk, ''))
+        self.assertEqual(AIModel.objects.get(name='BERT').description, 'Encoder (duplicate; last wins)')  # type: ignore
+        counts = dict(ModelCategory.objects.values_list('slug', 'models_count'))  # type: ignore
+        self.assertEqual(counts, {'nlp': 1, 'vision': 1})
+
+        lines = list(csv.DictReader(StringIO(rejected)))
+        self.assertEqual([line['line'] for line in lines], ['4', '5', '6'])
+        self.assertIn('name', lines[0]['error'])
+        self.assertIn("unknown slug 'audio'", lines[1]['error'])
+        self.assertIn('release_date', lines[2]['error'])
+
+    def test_jsonl(self):
+        text = '{"name": "BERT", "creator": "Google", "category": "nlp"}\n\nnot json\n["list"]\n'
+        stats, rejected = self.run_import(text, 'jsonl')
+        self.assertEqual((stats.created, stats.rejected), (1, 2))
+        self.assertEqual([json.loads(line)['line'] for line in rejected.splitlines()], [3, 4])
+
+    def test_command_reports_progress_and_writes_side_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.csv')
+            with open(path, 'w') as catalog:
+                catalog.write(self.CSV)
+            out = StringIO()
+            call_command('import_models', path, '--batch-size', '2', stdout=out)
+            self.assertIn('rows/s', out.getvalue())
+            self.assertIn('2 created, 1 updated, 3 rejected', out.getvalue())
+            self.assertTrue(os.path.exists(path + '.rejected.csv'))
+
+    def test_api_is_admin_only(self):
+        client = APIClient()
+        upload = SimpleUploadedFile('catalog.csv', self.CSV.encode())
+        client.force_authenticate(User.objects.create_user(username='plain', password='plainpass123'))
+        self.assertEqual(client.post(reverse('model-import'), {'file': upload}).status_code, 403)
+
+        client.force_authenticate(User.objects.create_superuser(username='admin', password='adminpass123'))
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            upload = SimpleUploadedFile('catalog.csv', self.CSV.encode())
+            response = client.post(reverse('model-import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['rejected']), (2, 3))  # type: ignore
+        self.assertIn('rejected.csv', response.data['rejected_file'])  # type: ignore
+
+
+class ReviewImportTests(TestCase):
+    HEADER = 'username,model_id,accuracy,speed,cost_efficiency,ease_of_use,reliability,title,description\n'
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='alicepass123')
+        self.bob = User.objects.create_user(username='bob', password='bobpass1234')
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp)  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI', category=self.nlp)  # type: ignore
+        Review.objects.create(  # type: ignore
+            user=self.bob, model=self.gpt, title='Old', description='Text',
+            accuracy=1, speed=1, cost_efficiency=1, ease_of_use=1, reliability=1,
+        )
+
+    def csv_text(self):
+        return self.HEADER + (
+            f'alice,{self.bert.pk},5,4,3,4,4,Solid,Good encoder\n'
+            f'alice,{self.gpt.pk},3,3,3,3,3,Fine,Okay\n'
+            f'bob,{self.bert.pk},4,4,4,4,4,Nice,Works\n'
+            f'bob,{self.gpt.pk},5,5,5,5,5,Again,Already reviewed\n'
+            f'alice,{self.bert.pk},1,1,1,1,1,Twice,Duplicate in file\n'
+            f'carol,{self.bert.pk},3,3,3,3,3,Who,Unknown user\n'
+            f'alice,999999,3,3,3,3,3,What,Unknown model\n'
+            f'bob,{self.bert.pk},9,3,3,3,3,High,Out of range\n'
+        )
+
+    def run_import(self, text, batch_size=2):
+        rejected = StringIO()
+        stats = bulk.ReviewImporter(batch_size=batch_size).run(
+            bulk.read_rows(StringIO(text), 'csv'), bulk.RejectWriter(rejected, 'csv')
+        )
+        return stats, list(csv.DictReader(StringIO(rejected.getvalue())))
+
+    def test_import_recomputes_stats_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            stats, rejected = self.run_import(self.csv_text())
+        self.assertEqual((stats.rows, stats.created, stats.rejected), (8, 3, 5))
+        self.assertEqual([line['line'] for line in rejected], ['5', '6', '7', '8', '9'])
+        self.assertIn('already reviewed', rejected[0]['error'])
+        self.assertIn("unknown user 'carol'", rejected[2]['error'])
+        self.assertIn('accuracy', rejected[4]['error'])
+
+        inserts = [q['sql'] for q in ctx.captured_queries if 'INTO "modelmate_review" ' in q['sql']]
+        self.assertEqual(len(inserts), 2)  # one per batch that has valid rows, no per-row signals
+        model_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "modelmate_aimodel"')]
+        self.assertEqual(len(model_updates), 1)
+
+        self.bert.refresh_from_db()
+        self.gpt.refresh_from_db()
+        self.assertEqual((self.bert.reviews_count, self.bert.accuracy_sum, self.bert.speed_sum), (2, 9, 8))
+        self.assertEqual(self.bert.average_rating, Decimal('4.00'))
+        self.assertEqual((self.gpt.reviews_count, self.gpt.average_rating), (2, Decimal('2.00')))
+        self.assertEqual(Review.objects.get(user=self.alice, model=self.bert).overall_rating, 4.0)  # type: ignore
+        self.assertEqual(dict(User.objects.values_list('username', 'reviews_count')), {'alice': 2, 'bob': 2})
+        stats = CategoryStats.objects.get(category=self.nlp)  # type: ignore
+        self.assertEqual((stats.reviews_count, stats.score_sum), (4, 20 + 15 + 20 + 5))
+        self.assertEqual(UserStats.objects.get(user=self.alice).reviews_count, 2)  # type: ignore
+
+    def test_reviews_created_concurrently_are_rejected_not_counted(self):
+        build = bulk.ReviewImporter.build
+
+        def build_and_race(importer, data, user_ids, model_ids):
+            review = build(importer, data, user_ids, model_ids)
+            if data['title'] == 'Solid':
+                # Another request saves the same review after the importer's lookup
+                Review.objects.create(  # type: ignore
+                    user=self.alice, model=self.bert, title='Raced', description='Text',
+                    accuracy=2, speed=2, cost_efficiency=2, ease_of_use=2, reliability=2,
+                )
+            return review
+
+        with mock.patch.object(bulk.ReviewImporter, 'build', build_and_race):
+            stats, rejected = self.run_import(self.csv_text(), batch_size=10)
+        self.assertEqual((stats.created, stats.rejected), (2, 6))
+        self.assertIn(('2', 'this user has already reviewed this model'), [(line['line'], line['error']) for line in rejected])
+        self.assertEqual(Review.objects.get(user=self.alice, model=self.bert).title, 'Raced')  # type: ignore
+        self.assertEqual(Review.objects.exclude(title__in=['Old', 'Raced']).count(), 2)  # type: ignore
+
+    def test_stats_match_per_row_writes(self):
+        def snapshot():
+            return list(AIModel.objects.order_by('pk').values_list(  # type: ignore
+                'reviews_count', 'accuracy_sum', 'reliability_sum', 'average_rating'))
+
+        self.run_import(self.csv_text())
+        imported = snapshot()
+        reviews = list(Review.objects.exclude(title='Old').values())  # type: ignore
+        Review.objects.exclude(title='Old').delete()  # type: ignore
+        for values in reviews:
+            values.pop('id')
+            Review.objects.create(**values)  # type: ignore
+        self.assertEqual(imported, snapshot())
+
+    def test_command_and_api(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reviews.csv')
+            with open(path, 'w') as source:
+                source.write(self.csv_text())
+            out = StringIO()
+            call_command('import_reviews', path, '--batch-size', '3', stdout=out)
+            self.assertIn('3 created, 5 rejected', out.getvalue())
+            self.assertTrue(os.path.exists(path + '.rejected.csv'))
+
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        upload = SimpleUploadedFile('reviews.csv', self.csv_text().encode())
+        self.assertEqual(client.post(reverse('review-import'), {'file': upload}).status_code, 403)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='analyst', password='analystpass123')
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp, description='Encoder, "base"')  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+        for model, score in ((self.bert, 5), (self.gpt, 3)):
+            Review.objects.create(  # type: ignore
+                user=self.user, model=model, title='Review', description='Line one\nline two',
+                accuracy=score, speed=score, cost_efficiency=score, ease_of_use=score, reliability=score,
+            )
+
+    def fetch(self, url, **params):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_models_ndjson_with_list_filters(self):
+        response, body = self.fetch(reverse('model-export'), ordering='name')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['BERT', 'GPT'])
+        self.assertEqual((rows[0]['category'], rows[1]['category']), ('nlp', None))
+        self.assertEqual(rows[0]['average_rating'], '5.00')
+
+        _, body = self.fetch(reverse('model-export'), search='encoder')
+        self.assertEqual([json.loads(line)['name'] for line in body.splitlines()], ['BERT'])
+
+    def test_reviews_csv(self):
+        response, body = self.fetch(reverse('review-export'), format='csv')
+        self.assertIn('attachment; filename="reviews-', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['description'], 'Line one\nline two')
+        self.assertEqual({row['username'] for row in rows}, {'analyst'})
+
+        _, body = self.fetch(reverse('model-review-export', args=[self.gpt.pk]), format='csv')
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([(row['model'], row['overall_rating']) for row in rows], [('GPT', '3.0')])
+
+    def test_streams_in_constant_queries(self):
+        for number in range(30):
+            user = User.objects.create_user(username=f'bulk{number}', password='bulkpass123')
+            Review.objects.create(  # type: ignore
+                user=user, model=self.bert, title='Review', description='Text',
+                accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4,
+            )
+        self.client.force_authenticate(self.user)
+        with self.settings(EXPORT_CHUNK_SIZE=5), CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('review-export'))
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 32)
+        selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 2)  # the user, then one query for every row
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(reverse('model-export')).status_code, 401)
+
+
+class ModelCompareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp)  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+        for number, (model, scores) in enumerate([
+            (self.bert, (5, 5, 4, 4, 4)),  # overall 4.4
+            (self.bert, (3, 2, 2, 3, 2)),  # overall 2.4
+            (self.gpt, (1, 1, 1, 1, 1)),
+        ]):
+            user = User.objects.create_user(username=f'rater{number}', password='raterpass123')
+            Review.objects.create(  # type: ignore
+                user=user, model=model, title='Review', description='Text',
+                **dict(zip(('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability'), scores)),
+            )
+        counters.flush()  # recount now rather than inside the measured request
+
+    def test_side_by_side_stats(self):
+        with self.assertNumQueries(1):  # models joined with their categories and stored histograms
+            response = self.client.get(reverse('model-compare'), {'ids': f'{self.gpt.pk},{self.bert.pk},999999'})
+        self.assertEqual(response.status_code, 200)
+        gpt, bert = response.data['results']  # type: ignore
+        self.assertEqual((gpt['name'], bert['name']), ('GPT', 'BERT'))
+        self.assertEqual(bert['reviews_count'], 2)
+        self.assertEqual(bert['dimension_averages']['accuracy'], 4.0)
+        self.assertEqual(bert['rating_histograms']['overall'], {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+        self.assertEqual(bert['rating_histograms']['speed'], {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(gpt['rating_histograms']['reliability'], {1: 1, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertEqual(bert['category']['slug'], 'nlp')
+
+    def test_rejects_bad_ids(self):
+        url = reverse('model-compare')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'ids': 'a,b'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'ids': '1,2,3,4,5'}).status_code, 400)
+
+
+class RatingHistogramTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rater', password='raterpass123')
+        self.bert = AIModel.objects.create(name='BERT', creator='Google')  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+
+    def review(self, model, *scores, user=None):
+        return Review.objects.create(  # type: ignore
+            user=user or self.user, model=model, title='Review', description='Text',
+            **dict(zip(('accuracy', 'speed', 'cost_efficiency', 'ease_of_use', 'reliability'), scores)),
+        )
+
+    def histogram(self, model):
+        return ModelRatingHistogram.objects.get(model=model).as_dict()  # type: ignore
+
+    def test_buckets_follow_review_writes(self):
+        review = self.review(self.bert, 5, 5, 4, 4, 4)
+        self.assertEqual(self.histogram(self.bert)['overall'], {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+        review = Review.objects.get(pk=review.pk)  # type: ignore
+        review.accuracy = 1
+        review.speed = 2
+        with CaptureQueriesContext(connection) as ctx:
+            review.save()
+        histogram_queries = [q for q in ctx.captured_queries if 'modelratinghistogram' in q['sql']]
+        self.assertEqual(len(histogram_queries), 1)  # every bucket move in one UPDATE
+        histogram = self.histogram(self.bert)
+        self.assertEqual(histogram['overall'], {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})  # 3.0
+        self.assertEqual(histogram['accuracy'], {1: 1, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertEqual(histogram['reliability'][4], 1)
+
+        review.model = self.gpt
+        review.save()
+        self.assertEqual(sum(self.histogram(self.bert)['overall'].values()), 0)
+        self.assertEqual(self.histogram(self.gpt)['accuracy'][1], 1)
+
+        review.delete()
+        self.assertEqual(self.histogram(self.gpt), ModelRatingHistogram.empty())
+        self.assertEqual(rebuild_rating_histograms(dry_run=True), [])
+
+    def test_rebuild_and_check(self):
+        self.review(self.bert, 3, 3, 3, 3, 3)
+        ModelRatingHistogram.objects.filter(model=self.bert).update(overall_3=7)  # type: ignore
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rating_histograms', '--check', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_rating_histograms', stdout=out)
+        self.assertIn('1 model(s) had drifted', out.getvalue())
+        self.assertEqual(self.histogram(self.bert)['overall'][3], 1)
+        call_command('rebuild_rating_histograms', '--check', stdout=StringIO())
+
+    def test_exposed_on_detail(self):
+        self.review(self.bert, 2, 2, 2, 2, 2)
+        response = APIClient().get(reverse('model-detail', args=[self.bert.pk]))
+        self.assertEqual(response.data['rating_histograms']['speed'][2], 1)  # type: ignore
+        response = APIClient().get(reverse('model-detail', args=[self.gpt.pk]))
+        self.assertEqual(response.data['rating_histograms'], ModelRatingHistogram.empty())  # type: ignore
+
+
+@override_settings(RANKING_PRIOR_MEAN=3.5, RANKING_PRIOR_WEIGHT=10)
+class RankingTests(TestCase):
+    def setUp(self):
+        self.lucky = AIModel.objects.create(name='Lucky', creator='Lab')  # type: ignore
+        self.proven = AIModel.objects.create(name='Proven', creator='Lab')  # type: ignore
+        self.unrated = AIModel.objects.create(name='Unrated', creator='Lab')  # type: ignore
+        self.review(self.lucky, 0, 5)
+        for number in range(1, 21):
+            self.review(self.proven, number, 4, 5 if number % 2 else 4)
+
+    def review(self, model, number, score, accuracy=None):
+        user, _ = User.objects.get_or_create(username=f'ranker{number}')
+        return Review.objects.create(  # type: ignore
+            user=user, model=model, title='Review', description='Text', accuracy=accuracy or score,
+            speed=score, cost_efficiency=score, ease_of_use=score, reliability=score,
+        )
+
+    def test_volume_outranks_a_single_perfect_review(self):
+        self.lucky.refresh_from_db()
+        self.proven.refresh_from_db()
+        self.assertGreater(self.lucky.average_rating, self.proven.average_rating)
+        self.assertEqual(float(self.lucky.rank_score), ranking.score(5, 1))
+        self.assertEqual(float(self.proven.rank_score), ranking.score(sum(4.2 if n % 2 else 4.0 for n in range(1, 21)), 20))
+        names = [row['name'] for row in APIClient().get(reverse('model-list')).data['results']]  # type: ignore
+        self.assertEqual(names, ['Proven', 'Lucky', 'Unrated'])
+
+    def test_edits_and_deletes_rescore(self):
+        review = self.lucky.reviews.get()
+        review.speed = 1
+        review.save()
+        self.lucky.refresh_from_db()
+        self.assertEqual(float(self.lucky.rank_score), ranking.score(4.2, 1))
+        review.delete()
+        self.lucky.refresh_from_db()
+        self.assertEqual(self.lucky.rank_score, 0)
+
+    def test_ordering_filter_and_rebuild(self):
+        url = reverse('model-list')
+        names = [row['name'] for row in APIClient().get(url, {'ordering': 'rank_score'}).data['results']]  # type: ignore
+        self.assertEqual(names, ['Unrated', 'Lucky', 'Proven'])
+
+        with self.settings(RANKING_PRIOR_WEIGHT=0.01):
+            out = StringIO()
+            call_command('rebuild_model_ranking', stdout=out)
+            self.assertIn('Rescored 3 model(s)', out.getvalue())
+        self.lucky.refresh_from_db()
+        self.assertGreater(self.lucky.rank_score, Decimal('4.98'))  # the prior hardly counts any more
+
+
+@override_settings(COUNTERS_SYNC=True)
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.vision = ModelCategory.objects.create(name='Vision', slug='vision')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp)  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI', category=self.nlp)  # type: ignore
+        self.vit = AIModel.objects.create(name='ViT', creator='Google', category=self.vision)  # type: ignore
+        self.alice = User.objects.create_user(username='alice', password='alicepass123')
+        self.bob = User.objects.create_user(username='bob', password='bobpass1234')
+        self.review(self.alice, self.bert, 5)
+        self.review(self.alice, self.vit, 3)
+        self.review(self.bob, self.gpt, 2)
+
+    def review(self, user, model, score):
+        return Review.objects.create(  # type: ignore
+            user=user, model=model, title='Review', description='Text',
+            accuracy=score, speed=score, cost_efficiency=score, ease_of_use=score, reliability=score,
+        )
+
+    def refresh(self):
+        time.sleep(0.005)  # let later writes land strictly after the snapshot
+        boards = leaderboards.refresh()
+        time.sleep(0.005)
+        return boards
+
+    def test_refresh_only_touches_changed_boards(self):
+        nlp, vision = leaderboards.category_board(self.nlp.pk), leaderboards.category_board(self.vision.pk)
+        self.assertEqual(self.refresh(), sorted(['models', 'reviewers', nlp, vision]))
+        self.assertEqual(self.refresh(), ['reviewers'])
+
+        self.review(self.bob, self.vit, 4)
+        self.assertEqual(self.refresh(), sorted(['models', 'reviewers', vision]))
+
+        self.gpt.refresh_from_db()
+        self.gpt.category = self.vision
+        self.gpt.save()
+        self.assertEqual(self.refresh(), sorted(['models', 'reviewers', nlp, vision]))
+        entries = LeaderboardSnapshot.objects.get(board=vision).entries  # type: ignore
+        self.assertEqual([entry['name'] for entry in entries], ['ViT', 'GPT'])
+
+        self.bert.delete()
+        self.assertIn(nlp, self.refresh())
+        self.assertEqual(LeaderboardSnapshot.objects.get(board=nlp).entries, [])  # type: ignore
+
+    def test_endpoints_read_one_row(self):
+        leaderboards.refresh()
+        client = APIClient()
+        with self.assertNumQueries(1):
+            response = client.get(reverse('leaderboard-models'))
+        self.assertEqual([(e['rank'], e['name']) for e in response.data['results']], [(1, 'BERT'), (2, 'ViT'), (3, 'GPT')])  # type: ignore
+
+        response = client.get(reverse('leaderboard-category', args=[self.nlp.pk]))
+        self.assertEqual([e['name'] for e in response.data['results']], ['BERT', 'GPT'])  # type: ignore
+        response = client.get(reverse('leaderboard-reviewers'))
+        self.assertEqual([(e['username'], e['reviews_count']) for e in response.data['results']], [('alice', 2), ('bob', 1)])  # type: ignore
+        self.assertEqual(client.get(reverse('leaderboard-category', args=[999999])).status_code, 404)
+
+    def test_board_is_built_on_first_read_and_command(self):
+        response = APIClient().get(reverse('leaderboard-category', args=[self.vision.pk]))
+        self.assertEqual([e['name'] for e in response.data['results']], ['ViT'])  # type: ignore
+        out = StringIO()
+        call_command('refresh_leaderboards', '--all', stdout=out)
+        self.assertIn('Refreshed 4 leaderboard(s)', out.getvalue())
+
+
+@override_settings(DISCUSSION_VIEWS_FLUSH_INTERVAL=3600, DISCUSSION_VIEW_DEDUP_WINDOW=0, RESPONSE_CACHE_ENABLED=False)
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='asyncer', password='asyncpass123')
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.bert = AIModel.objects.create(name='BERT', creator='Google', category=self.nlp)  # type: ignore
+        self.gpt = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+        for number, model in enumerate([self.bert, self.bert, self.gpt]):
+            user = self.user if number == 0 else User.objects.create_user(username=f'async{number}', password='asyncpass123')
+            Review.objects.create(  # type: ignore
+                user=user, model=model, title=f'Review {number}', description='Text',
+                accuracy=4, speed=3, cost_efficiency=5, ease_of_use=4, reliability=number + 2,
+            )
+        self.discussion = Discussion.objects.create(user=self.user, model=self.bert, title='Thread', content='Body')  # type: ignore
+        root = Comment.objects.create(discussion=self.discussion, user=self.user, content='Root')  # type: ignore
+        Comment.objects.create(discussion=self.discussion, user=self.user, content='Reply', parent=root)  # type: ignore
+        counters.flush()
+
+    def tearDown(self):
+        pageviews.buffer.flush()
+
+    def assertSameAsSync(self, name, *args, query=''):
+        sync = self.client.get(reverse(name, args=args) + query)
+        asynchronous = self.client.get(reverse(f'async-{name}', args=args) + query)
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous.json(), sync.json())
+        return asynchronous.json()
+
+    def test_responses_match_the_drf_views(self):
+        for authenticated in (False, True):
+            if authenticated:
+                self.client.force_authenticate(self.user)
+            self.assertSameAsSync('model-list')
+            self.assertSameAsSync('model-list', query='?search=bert&count=1')
+            body = self.assertSameAsSync('model-list', query='?ordering=reviews_count')
+            self.assertIsNone(body['previous'])
+            detail = self.assertSameAsSync('model-detail', self.bert.pk)
+            self.assertEqual(detail['user_has_reviewed'], authenticated)
+            self.assertSameAsSync('model-detail', 999999)
+            self.assertSameAsSync('model-review-list', self.bert.pk)
+
+    def test_discussion_detail_counts_views(self):
+        body = self.assertSameAsSync('discussion-detail', self.discussion.pk)
+        self.assertEqual(body['comments'][0]['replies'][0]['content'], 'Reply')
+        pageviews.buffer.flush()
+        self.assertEqual(Discussion.objects.get(pk=self.discussion.pk).views, 2)  # type: ignore
+
+    def test_detail_runs_its_queries_through_the_async_orm(self):
+        with self.assertNumQueries(3):  # the model, its recent reviews, user_has_reviewed
+            self.client.force_authenticate(self.user)
+            response = self.client.get(reverse('async-model-detail', args=[self.bert.pk]))
+        self.assertEqual(len(response.json()['recent_reviews']), 2)
+
+    async def test_served_over_asgi(self):
+        response = await self.async_client.get(reverse('async-model-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['name'] for row in response.json()['results']), ['BERT', 'GPT'])
+        response = await self.async_client.get(reverse('async-model-list'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, FRAGMENT_CACHE_SIZE=0)
+class ProjectionContractTests(TestCase):
+    """The values()-based list rendering must produce exactly the serializers' JSON"""
+
+    def setUp(self):
+        counters.flush()
+        self.factory = APIRequestFactory()
+        named = User.objects.create_user(username='ada', password='adapass123', first_name='Ada', last_name='Lovelace')
+        first_only = User.objects.create_user(username='grace', password='gracepass123', first_name='Grace')
+        plain = User.objects.create_user(username='plain', password='plainpass123')
+        User.objects.filter(pk=named.pk).update(profile_picture='profile_pics/ada lovelace.png')
+        bert = AIModel.objects.create(name='BERT “base”', creator='Google')  # type: ignore
+        gpt = AIModel.objects.create(name='GPT', creator='OpenAI')  # type: ignore
+        for number, (user, model) in enumerate([(named, bert), (first_only, bert), (plain, gpt), (named, gpt)]):
+            Review.objects.create(  # type: ignore
+                user=user, model=model, title=f'Review {number} — ünïcode "quoted" \\ ✓', description='Text',
+                accuracy=4, speed=3, cost_efficiency=5, ease_of_use=number % 5 + 1, reliability=2,
+            )
+            Discussion.objects.create(  # type: ignore
+                user=user, model=model if number % 2 else None, title=f'Thread {number} ✓', content='Body',
+            )
+        # Whole-second timestamps render without a fraction, and equal ones exercise the pk tiebreaker
+        whole = timezone.now().replace(microsecond=0)
+        Review.objects.filter(user=plain).update(created_at=whole)
+        Discussion.objects.filter(user__in=[plain, first_only]).update(created_at=whole)
+        self.bert, self.gpt = bert, gpt
+        counters.flush()
+
+    def assertSameJSON(self, view, url, **kwargs):
+        """Walk every page of `url` both ways, comparing the rendered bytes; returns the pages' rows"""
+        rows = []
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            while url:
+                responses = [
+                    view.as_view(use_projection=use_projection)(self.factory.get(url), **kwargs)
+                    for use_projection in (True, False)
+                ]
+                fast, slow = (response.render().content for response in responses)
+                self.assertEqual(fast, slow)
+                page = json.loads(fast)
+                rows += page['results']
+                url = page['next']
+        return rows
+
+    def test_review_lists(self):
+        rows = []
+        for model in (self.bert, self.gpt):
+            rows += self.assertSameJSON(
+                views.ReviewListCreateView, reverse('model-review-list', args=[model.pk]), model_id=model.pk,
+            )
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row['user']['full_name'] for row in rows}, {'Ada Lovelace', 'Grace', 'plain'})
+        self.assertTrue(any(row['user']['profile_picture'] for row in rows))
+
+    def test_discussion_lists(self):
+        rows = self.assertSameJSON(views.DiscussionListCreateView, reverse('discussion-list'))
+        self.assertEqual(sum('model_name' not in row for row in rows), 2)  # left out, not null
+        self.assertSameJSON(
+            views.DiscussionListCreateView, reverse('model-discussion-list', args=[self.bert.pk]),
+            model_id=self.bert.pk,
+        )
+
+    def test_in_another_time_zone(self):
+        with timezone.override('Asia/Kolkata'):
+            rows = self.assertSameJSON(views.DiscussionListCreateView, reverse('discussion-list'))
+        self.assertTrue(rows[0]['created_at'].endswith('+05:30'))
+
+    def test_shares_the_fragment_cache(self):
+        url, model_id = reverse('model-review-list', args=[self.bert.pk]), self.bert.pk
+        uncached = views.ReviewListCreateView.as_view()(self.factory.get(url), model_id=model_id).render().content
+        fragments.cache.clear()
+        with override_settings(FRAGMENT_CACHE_SIZE=100):
+            for use_projection in (False, True, True):
+                view = views.ReviewListCreateView.as_view(use_projection=use_projection)
+                self.assertEqual(view(self.factory.get(url), model_id=model_id).render().content, uncached)
+            self.assertEqual(len(fragments.cache.entries), 2)
+
+    def test_one_query_per_page(self):
+        with self.assertNumQueries(2):  # Last-Modified, then the page with its joins
+            self.client.get(reverse('model-review-list', args=[self.bert.pk]))
+
+    def test_refuses_fields_it_cannot_project(self):
+        with self.assertRaises(ImproperlyConfigured):
+            Projection(ReviewSerializer)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, DISCUSSION_VIEWS_FLUSH_INTERVAL=3600)
+class FastJSONTests(TestCase):
+    def setUp(self):
+        counters.flush()
+        fragments.cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='json', password='jsonpass123', first_name='Jö', last_name='Sön')
+        self.nlp = ModelCategory.objects.create(name='NLP ✓', slug='nlp', description='Line\u2028separator')  # type: ignore
+        self.models = [
+            AIModel.objects.create(name=f'Model {number} “quoted”', creator='Lab', category=self.nlp)  # type: ignore
+            for number in range(3)
+        ]
+        Review.objects.create(  # type: ignore
+            user=self.user, model=self.models[0], title='Grand ✓', description='Text',
+            accuracy=5, speed=4, cost_efficiency=3, ease_of_use=4, reliability=5,
+        )
+        self.discussion = Discussion.objects.create(user=self.user, model=self.models[0], title='Thread', content='Body')  # type: ignore
+        Comment.objects.create(discussion=self.discussion, user=self.user, content='Root \u2029')  # type: ignore
+        counters.flush()
+
+    def tearDown(self):
+        pageviews.buffer.flush()
+
+    def test_api_responses_match_the_drf_renderer(self):
+        urls = [
+            reverse('model-list'), reverse('model-detail', args=[self.models[0].pk]),
+            reverse('model-review-list', args=[self.models[0].pk]), reverse('discussion-detail', args=[self.discussion.pk]),
+            reverse('category-list'), reverse('leaderboard-models'),
+            reverse('model-compare') + f'?ids={self.models[0].pk},{self.models[1].pk}',
+            reverse('model-detail', args=[999999]),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'application/json', url)
+            self.assertEqual(response.content, JSONRenderer().render(response.data), url)
+        self.assertIn(b'\\u2028', self.client.get(reverse('category-list')).content)
+
+    def test_native_types(self):
+        data = {
+            'decimal': Decimal('4.25'), 'uuid': uuid.uuid4(), 'date': datetime.date(2026, 1, 2),
+            'utc': datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'local': timezone.localtime(timezone.now(), zoneinfo.ZoneInfo('Asia/Kolkata')),
+            'lazy': gettext_lazy('Not found.'), 'tuple': (1, 2), 1: 'int key', 'big': 2 ** 70,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = 'application/json; indent=2'
+        self.assertEqual(FastJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
+
+    def test_non_finite_floats_are_refused_like_drf(self):
+        for value in (float('nan'), float('inf'), Decimal('-Infinity')):
+            data = {'rows': [{'score': value, 'note': None}]}
+            with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+                JSONRenderer().render(data)
+            with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+                FastJSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render({'score': 1.5, 'note': None}), b'{"score":1.5,"note":null}')
+
+    def test_parser(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('model-discussion-list', args=[self.models[1].pk]),
+            json.dumps({'title': 'Ünïcode ✓', 'content': 'Body'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['title'], 'Ünïcode ✓')  # type: ignore
+        response = self.client.post(
+            reverse('model-discussion-list', args=[self.models[1].pk]), '{"title": ', content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['detail'].startswith('JSON parse error'))
+        self.assertEqual(FastJSONParser().parse(StringIO('[%d]' % 2 ** 70)), [2 ** 70])
+
+    def test_nested_categories_are_rendered_once(self):
+        models = AIModel.objects.select_related('category')
+        with mock.patch.object(
+            ModelCategorySerializer, 'get_fields', wraps=ModelCategorySerializer().get_fields,
+        ) as get_fields:
+            first = AIModelListSerializer(models, many=True).data
+            get_fields.reset_mock()
+            second = AIModelListSerializer(models, many=True).data
+        self.assertEqual(get_fields.call_count, 0)
+        self.assertEqual(len({id(row['category']) for row in first + second}), 1)
+
+        AIModel.objects.create(name='Another', creator='Lab', category=self.nlp)  # type: ignore
+        counters.flush()
+        rows = AIModelListSerializer(AIModel.objects.select_related('category'), many=True).data
+        self.assertEqual({row['category']['models_count'] for row in rows}, {4})
+        self.nlp.refresh_from_db()
+        self.nlp.name = 'Language'
+        self.nlp.save()
+        self.assertEqual(ModelCategorySerializer(self.nlp).data['name'], 'Language')
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, FRAGMENT_CACHE_SIZE=100, FRAGMENT_CACHE_TTL=300)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        counters.flush()
+        fragments.cache.clear()
+        self.factory = APIRequestFactory()
+        self.users = [
+            User.objects.create_user(username=f'writer{number}', password='writerpass123', first_name=f'W{number}')
+            for number in range(2)
+        ]
+        self.nlp = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.models = [AIModel.objects.create(name=f'M{number}', creator='Lab', category=self.nlp) for number in range(3)]  # type: ignore
+        for model in self.models:
+            for user in self.users:
+                Review.objects.create(  # type: ignore
+                    user=user, model=model, title='Review', description='Text',
+                    accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4,
+                )
+        counters.flush()
+
+    def render_reviews(self):
+        reviews = Review.objects.select_related('user', 'model__category')
+        context = {'request': Request(self.factory.get('/'))}
+        return ReviewSerializer(reviews, many=True, context=context).data
+
+    def test_builds_each_object_once(self):
+        with mock.patch.object(fragments.cache, 'set', wraps=fragments.cache.set) as stored:
+            rows = self.render_reviews()
+        self.assertEqual(stored.call_count, 3)  # two users, one category
+        by_user = {}
+        for row in rows:
+            self.assertIs(by_user.setdefault(row['user']['id'], row['user']), row['user'])
+        with mock.patch.object(fragments.cache, 'set') as stored:
+            self.render_reviews()
+        stored.assert_not_called()
+
+    def test_identity_map_without_the_process_cache(self):
+        with override_settings(FRAGMENT_CACHE_SIZE=0):
+            rows = self.render_reviews()
+        self.assertEqual(len({id(row['model']['category']) for row in rows}), 1)
+        self.assertEqual(fragments.cache.entries, {})
+
+    def test_saves_evict(self):
+        self.render_reviews()
+        user = self.users[0]
+        self.assertIn((User, user.pk), fragments.cache.entries)
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertNotIn((User, user.pk), fragments.cache.entries)
+        names = {row['user']['full_name'] for row in self.render_reviews()}
+        self.assertEqual(names, {'Renamed', 'W1'})
+
+        self.nlp.description = 'Language'
+        self.nlp.save()
+        self.assertNotIn((ModelCategory, self.nlp.pk), fragments.cache.entries)
+        self.assertEqual(self.render_reviews()[0]['model']['category']['description'], 'Language')
+
+    def test_entries_expire(self):
+        self.render_reviews()
+        # An UPDATE that leaves updated_at alone is only seen once the entry expires
+        User.objects.filter(pk=self.users[1].pk).update(first_name='Quiet')
+        self.assertNotIn('Quiet', {row['user']['full_name'] for row in self.render_reviews()})
+        with override_settings(FRAGMENT_CACHE_TTL=-1):  # stored already expired
+            fragments.cache.clear()
+            self.render_reviews()
+            User.objects.filter(pk=self.users[1].pk).update(first_name='Quieter')
+            self.assertIn('Quieter', {row['user']['full_name'] for row in self.render_reviews()})
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, DISCUSSION_VIEWS_FLUSH_INTERVAL=3600, DISCUSSION_VIEW_DEDUP_WINDOW=0)
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.recorder.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='timed', password='timedpass123')
+        self.category = ModelCategory.objects.create(name='NLP', slug='nlp')  # type: ignore
+        self.model = AIModel.objects.create(name='BERT', creator='Google', category=self.category)  # type: ignore
+        self.discussion = Discussion.objects.create(user=self.user, model=self.model, title='Thread', content='Body')  # type: ignore
+        counters.flush()
+
+    def tearDown(self):
+        pageviews.buffer.flush()
+
+    def test_read_endpoints_stay_within_budget(self):
+        review = Review.objects.create(  # type: ignore
+            user=self.user, model=self.model, title='Solid', description='Text',
+            accuracy=4, speed=4, cost_efficiency=4, ease_of_use=4, reliability=4,
+        )
+        comment = Comment.objects.create(user=self.user, discussion=self.discussion, content='First')  # type: ignore
+        Comment.objects.create(user=self.user, discussion=self.discussion, parent=comment, content='Reply')  # type: ignore
+        counters.flush()
+        urls = [
+            reverse('category-list'), reverse('category-detail', args=[self.category.pk]),
+            reverse('model-list'), reverse('model-detail', args=[self.model.pk]),
+            reverse('model-review-list', args=[self.model.pk]), reverse('review-detail', args=[review.pk]),
+            reverse('discussion-list'), reverse('discussion-detail', args=[self.discussion.pk]),
+            reverse('discussion-trending'), reverse('discussion-comment-list', args=[self.discussion.pk]),
+            reverse('comment-detail', args=[comment.pk]), reverse('comment-replies', args=[comment.pk]),
+            reverse('search') + '?q=BERT',
+        ]
+        for url in urls:
+            with self.subTest(url=url):  # QueryBudgetExceeded propagates out of the test client
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)  # type: ignore
+
+    async def test_async_requests_count_queries_run_by_the_async_orm(self):
+        async def get_response(request):
+            pass
+        self.assertTrue(iscoroutinefunction(metrics.RequestMetricsMiddleware(get_response)))  # no thread hop under ASGI
+        url = reverse('async-model-detail', args=[self.model.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)  # type: ignore
+        queries = int(response['Server-Timing'].split('desc="')[1].split(' ')[0])
+        self.assertGreater(queries, 0)
+        self.assertEqual(metrics.recorder.report()['async-model-detail']['queries']['max'], queries)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('category-detail', args=[self.category.pk]))
+        phases = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(list(phases), ['db', 'view', 'render', 'total'])
+        self.assertIn('desc="1 queries"', phases['db'])
+        with override_settings(METRICS_SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('category-list')))
+
+    def test_metrics_report_percentiles_per_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse('model-list'))
+        self.client.get(reverse('model-detail', args=[self.model.pk]))
+        self.client.get('/api/no-such-endpoint/')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='adminpass123'))
+        endpoints = self.client.get(reverse('metrics')).json()['endpoints']
+        self.assertEqual(endpoints['model-list']['requests'], 3)
+        self.assertEqual(endpoints['model-detail']['requests'], 1)
+        self.assertEqual(set(endpoints['model-list']['queries']), {'p50', 'p95', 'p99', 'max'})
+        self.assertEqual(set(endpoints['model-list']), {'requests', 'queries', 'db_ms', 'view_ms', 'render_ms', 'total_ms'})
+        self.assertNotIn(None, endpoints)
+
+    def test_window_and_percentiles(self):
+        with override_settings(METRICS_WINDOW=100):
+            for queries in range(1, 201):
+                metrics.recorder.add('sample', queries, dict.fromkeys(metrics.PHASES, float(queries)))
+        summary = metrics.recorder.report()['sample']
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['queries'], {'p50': 150, 'p95': 195, 'p99': 199, 'max': 200})
+        self.assertEqual(summary['total_ms']['p95'], 195.0)
+
+    def test_over_budget_fails_or_warns(self):
+        url = reverse('category-detail', args=[self.category.pk])
+        with mock.patch.object(views.ModelCategoryDetailView, 'query_budget', {'GET': 0}):
+            with self.assertRaisesMessage(metrics.QueryBudgetExceeded, 'GET category-detail ran 1 queries (budget 0)'):
+                self.client.get(url)
+            with override_settings(QUERY_BUDGETS_STRICT=False), self.assertLogs('modelmate.metrics', 'WARNING'):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            # Budgets given per method leave the others alone
+            self.assertEqual(self.client.options(url).status_code, status.HTTP_200_OK)
+
+    def test_batched_writes_are_not_held_against_the_view(self):
+        url = reverse('discussion-detail', args=[self.discussion.pk])
+        with override_settings(DISCUSSION_VIEWS_FLUSH_INTERVAL=0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        budget = views.DiscussionDetailView.query_budget['GET']
+        self.assertGreater(len(queries), budget)  # the view's reads plus writing out its view
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+        self.assertEqual(Discussion.objects.get(pk=self.discussion.pk).views, 1)  # type: ignore
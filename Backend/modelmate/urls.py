@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.urlpatterns import format_suffix_patterns
-from . import views
+from . import leaderboards, views
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 
 urlpatterns = [
@@ -33,14 +33,27 @@ urlpatterns = [
     # ------------------------------
     path('models/', views.AIModelListView.as_view(), name='model-list'),
     path('models/<int:pk>/', views.AIModelDetailView.as_view(), name='model-detail'),
+    # Bulk upsert from a CSV or JSONL catalog (admins only)
+    path('models/import/', views.AIModelImportView.as_view(), name='model-import'),
+    # Per-dimension averages and rating histograms of a few models side by side (?ids=1,2,3)
+    path('models/compare/', views.AIModelCompareView.as_view(), name='model-compare'),
+    # The whole catalog in one streamed NDJSON or CSV response (?format=ndjson|csv)
+    path('models/export/', views.AIModelExportView.as_view(), name='model-export'),
 
     # ------------------------------
     # Review URLs
     # ------------------------------
     # List all reviews or create a new review for a specific model
     path('models/<int:model_id>/reviews/', views.ReviewListCreateView.as_view(), name='model-review-list'),
+    # All reviews, or one model's, streamed as NDJSON or CSV (?format=ndjson|csv)
+    path('models/<int:model_id>/reviews/export/', views.ReviewExportView.as_view(), name='model-review-export'),
+    path('reviews/export/', views.ReviewExportView.as_view(), name='review-export'),
     # Retrieve, update or delete a specific review
     path('reviews/<int:pk>/', views.ReviewDetailView.as_view(), name='review-detail'),
+    # Mark a review helpful (POST) or take it back (DELETE)
+    path('reviews/<int:pk>/helpful/', views.ReviewHelpfulView.as_view(), name='review-helpful'),
+    # Bulk insert from a CSV or JSONL file, stats recomputed once (admins only)
+    path('reviews/import/', views.ReviewImportView.as_view(), name='review-import'),
 
     # ------------------------------
     # Discussion URLs
@@ -49,7 +62,11 @@ urlpatterns = [
     path('models/<int:model_id>/discussions/', views.DiscussionListCreateView.as_view(), name='model-discussion-list'),
     # Retrieve, update or delete a specific discussion
     path('discussions/<int:pk>/', views.DiscussionDetailView.as_view(), name='discussion-detail'),
+    # Like (POST) or unlike (DELETE) a discussion
+    path('discussions/<int:pk>/like/', views.DiscussionLikeView.as_view(), name='discussion-like'),
     path('discussions/', views.DiscussionListCreateView.as_view(), name='discussion-list'),
+    # Most viewed discussions, recent views weighted more
+    path('discussions/trending/', views.TrendingDiscussionsView.as_view(), name='discussion-trending'),
 
     # ------------------------------
     # Comment URLs
@@ -58,6 +75,30 @@ urlpatterns = [
     path('discussions/<int:discussion_id>/comments/', views.CommentListCreateView.as_view(), name='discussion-comment-list'),
     # Retrieve, update or delete a specific comment
     path('comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment-detail'),
+    # Like (POST) or unlike (DELETE) a comment
+    path('comments/<int:pk>/like/', views.CommentLikeView.as_view(), name='comment-like'),
+    # Paginated replies under a specific comment
+    path('comments/<int:pk>/replies/', views.CommentRepliesView.as_view(), name='comment-replies'),
+
+    # ------------------------------
+    # Search URLs
+    # ------------------------------
+    # Grouped, ranked results across models, reviews, discussions and comments
+    path('search/', views.SearchView.as_view(), name='search'),
+
+    # ------------------------------
+    # Leaderboard URLs
+    # ------------------------------
+    # Top models by rank_score, overall and per category, and top reviewers, from stored snapshots
+    path('leaderboards/models/', views.LeaderboardView.as_view(board=leaderboards.MODELS), name='leaderboard-models'),
+    path('leaderboards/categories/<int:pk>/', views.LeaderboardView.as_view(), name='leaderboard-category'),
+    path('leaderboards/reviewers/', views.LeaderboardView.as_view(board=leaderboards.REVIEWERS), name='leaderboard-reviewers'),
+
+    # ------------------------------
+    # Metrics URLs
+    # ------------------------------
+    # p50/p95/p99 query counts and timings per endpoint, for this process (admins only)
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
 ]
 
 # Adds support for format suffixes to the URLs (e.g., .json, .api)
@@ -1,18 +1,44 @@
+import io
+import tempfile
+
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
 from django.db.models import Q, Count, Avg
-from .models import User, ModelCategory, AIModel, Review, Discussion, Comment
+from .models import User, ModelCategory, AIModel, Review, Discussion, Comment, Vote
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, ChangePasswordSerializer,
     UserSerializer, UserStatsSerializer,
     ModelCategorySerializer, ModelCategoryStatsSerializer,
-    AIModelListSerializer, AIModelSerializer,
+    AIModelListSerializer, AIModelSerializer, AIModelComparisonSerializer,
     ReviewListSerializer, ReviewSerializer,
     DiscussionListSerializer, DiscussionSerializer, DiscussionDetailSerializer,
     CommentSerializer
 )
+from .search import ModelSearchFilter, SEARCHABLES, search_all
+from .caching import CachedResponseMixin, ConditionalGetMixin
+from . import leaderboards, metrics, pageviews
+from .export import StreamingExportMixin
+from .projection import ProjectedListMixin
+from .bulk import ModelImporter, RejectWriter, ReviewImporter, detect_format, read_rows
+
+
+class EagerLoadingMixin:
+    """Let the serializer plan joins and annotations for the queryset it renders"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        if setup_eager_loading:
+            queryset = setup_eager_loading(queryset, self.request)
+        return queryset
 
 
 # ------------------------------
@@ -76,19 +102,23 @@ class CurrentUserView(APIView):
 #         serializer = UserSerializer(request.user)
 #         return Response(serializer.data)
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Retrieve user details"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 3}
     lookup_field = 'username'
+    cache_groups = ['user:{id}']
+    validator_fields = ['id']
 
 
-class UserStatsView(generics.RetrieveAPIView):
+class UserStatsView(EagerLoadingMixin, generics.RetrieveAPIView):
     """Retrieve user statistics"""
     queryset = User.objects.all()
     serializer_class = UserStatsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 3
     lookup_field = 'username'
 
 
@@ -96,55 +126,149 @@ class UserStatsView(generics.RetrieveAPIView):
 # Model Category Views
 # ------------------------------
 
-class ModelCategoryListView(generics.ListCreateAPIView):
+class ModelCategoryListView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     queryset = ModelCategory.objects.all()
     serializer_class = ModelCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 4}
     filter_backends = [filters.SearchFilter] #enables searching through the categories
     search_fields = ['name', 'description'] #a request to /api/categories/?search=vision will return categories where "vision" appears in the name or description
+    cache_groups = ['categories']
 
 
 class ModelCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ModelCategory.objects.all()
     serializer_class = ModelCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 2}
 
 
-class ModelCategoryStatsView(generics.RetrieveAPIView):
+class ModelCategoryStatsView(EagerLoadingMixin, generics.RetrieveAPIView):
     queryset = ModelCategory.objects.all()
     serializer_class = ModelCategoryStatsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 2
 
 
 # ------------------------------
 # AI Model Views
 # ------------------------------
 
-class AIModelListView(generics.ListCreateAPIView):
+class AIModelListView(ConditionalGetMixin, CachedResponseMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     queryset = AIModel.objects.all()
     serializer_class = AIModelListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'creator', 'description', 'architecture']
-    ordering_fields = ['average_rating', 'reviews_count', 'release_date']
+    query_budget = {'GET': 4}
+    filter_backends = [ModelSearchFilter, filters.OrderingFilter]  # ?search= is ranked full-text search over name, creator, architecture and description
+    ordering_fields = ['rank_score', 'average_rating', 'reviews_count', 'release_date']
+    cache_groups = ['models', 'categories']
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class AIModelDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = AIModel.objects.all().select_related('category')
+class AIModelDetailView(ConditionalGetMixin, CachedResponseMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = AIModel.objects.all()
     serializer_class = AIModelSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 4}
+    cache_groups = ['model:{pk}', 'categories', 'users']
+
+
+class AIModelCompareView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Stats of up to COMPARE_MAX_MODELS models side by side (`?ids=1,2,3`, in that
+    order): per-dimension averages and per-star histograms, all from stored
+    columns, in one query
+    """
+    serializer_class = AIModelComparisonSerializer
+    permission_classes = [permissions.AllowAny]
+    query_budget = 2
+    pagination_class = None
+    cache_groups = ['models', 'categories']
+
+    def get_model_ids(self):
+        try:
+            ids = [int(value) for value in self.request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            raise ValidationError({'ids': 'Pass model ids as a comma-separated list of integers.'})
+        ids = list(dict.fromkeys(ids))
+        limit = getattr(settings, 'COMPARE_MAX_MODELS', 4)
+        if not 1 <= len(ids) <= limit:
+            raise ValidationError({'ids': f'Compare between 1 and {limit} models.'})
+        return ids
+
+    def list(self, request, *args, **kwargs):
+        ids = self.get_model_ids()
+        models = AIModel.objects.filter(pk__in=ids).select_related('category', 'rating_histogram').order_by().in_bulk()
+        models = [models[pk] for pk in ids if pk in models]
+        return Response({'results': self.get_serializer(models, many=True).data})
+
+
+class AIModelExportView(StreamingExportMixin, generics.GenericAPIView):
+    """The whole catalog as NDJSON or CSV, with the list view's ?search= and ?ordering="""
+    queryset = AIModel.objects.all()
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = AIModelListView.filter_backends
+    ordering_fields = AIModelListView.ordering_fields
+    export_name = 'models'
+    export_columns = [
+        ('id', 'id'), ('name', 'name'), ('creator', 'creator'), ('version', 'version'),
+        ('category', 'category__slug'), ('description', 'description'), ('url', 'url'),
+        ('release_date', 'release_date'), ('size', 'size'), ('architecture', 'architecture'),
+        ('license', 'license'), ('reviews_count', 'reviews_count'), ('average_rating', 'average_rating'),
+        ('rank_score', 'rank_score'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ]
+
+
+class AIModelImportView(APIView):
+    """
+    Upsert models from an uploaded CSV or JSONL catalog (multipart field `file`).
+    Rejected rows are saved to a side file whose URL is returned with the counts.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+    importer_class = ModelImporter
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Upload the catalog as `file`.'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = detect_format(upload.name)
+        if fmt is None:
+            return Response({'detail': 'The file must be .csv or .jsonl.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        source = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        with tempfile.TemporaryFile('w+', newline='', encoding='utf-8') as rejected:
+            stats = self.importer_class().run(read_rows(source, fmt), RejectWriter(rejected, fmt))
+            body = stats.as_dict()
+            if stats.rejected:
+                rejected.seek(0)
+                name = default_storage.save(
+                    f'imports/{timezone.now():%Y%m%d-%H%M%S}-rejected.{fmt}', ContentFile(rejected.read().encode())
+                )
+                body['rejected_file'] = request.build_absolute_uri(default_storage.url(name))
+        return Response(body)
 
 
 # ------------------------------
 # Review Views
 # ------------------------------
 
-class ReviewListCreateView(generics.ListCreateAPIView):
+class ReviewImportView(AIModelImportView):
+    """
+    Insert reviews from an uploaded CSV or JSONL file (multipart field `file`),
+    then recompute the stats of the affected models and users once.
+    """
+    importer_class = ReviewImporter
+
+
+class ReviewListCreateView(ConditionalGetMixin, ProjectedListMixin, generics.ListCreateAPIView):
     serializer_class = ReviewListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 4}
+    cache_groups = ['reviews', 'users']
 
     def get_queryset(self):
         model_id = self.kwargs.get('model_id')
@@ -156,10 +280,32 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ReviewExportView(StreamingExportMixin, generics.GenericAPIView):
+    """Every review, or a model's reviews, as NDJSON or CSV"""
+    permission_classes = [permissions.IsAuthenticated]
+    export_name = 'reviews'
+    export_columns = [
+        ('id', 'id'), ('model_id', 'model_id'), ('model', 'model__name'), ('username', 'user__username'),
+        ('accuracy', 'accuracy'), ('speed', 'speed'), ('cost_efficiency', 'cost_efficiency'),
+        ('ease_of_use', 'ease_of_use'), ('reliability', 'reliability'), ('overall_rating', 'overall_rating'),
+        ('title', 'title'), ('description', 'description'), ('pros', 'pros'), ('cons', 'cons'),
+        ('helpful_votes', 'helpful_votes'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ]
+
+    def get_queryset(self):
+        model_id = self.kwargs.get('model_id')
+        if model_id:
+            return Review.objects.filter(model_id=model_id)
+        return Review.objects.all()
+
+
+class ReviewDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Review.objects.all().select_related('user', 'model')
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 4}
+    cache_groups = ['review:{pk}', 'model:{model_id}', 'categories', 'users']
+    validator_fields = ['model_id']
 
     def perform_update(self, serializer):
         if self.request.user != serializer.instance.user:
@@ -176,9 +322,11 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
 # Discussion Views
 # ------------------------------
 
-class DiscussionListCreateView(generics.ListCreateAPIView):
+class DiscussionListCreateView(ConditionalGetMixin, CachedResponseMixin, ProjectedListMixin, generics.ListCreateAPIView):
     serializer_class = DiscussionListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 4}
+    cache_groups = ['discussions', 'users']
 
     def get_queryset(self):
         model_id = self.kwargs.get('model_id')
@@ -190,9 +338,40 @@ class DiscussionListCreateView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrendingDiscussionsView(generics.ListAPIView):
+    """Most viewed discussions over the last ?hours= (default TRENDING_WINDOW_HOURS), recent views weighing more"""
+    serializer_class = DiscussionListSerializer
+    permission_classes = [permissions.AllowAny]
+    query_budget = 3
+    pagination_class = None
+    default_limit = 10
+    max_limit = 50
+
+    def get_queryset(self):
+        params = self.request.query_params
+        try:
+            limit = min(max(int(params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        try:
+            hours = max(int(params['hours']), 1)
+        except (KeyError, ValueError):
+            hours = None
+        return pageviews.trending(limit=limit, hours=hours)
+
+
+class DiscussionDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Discussion.objects.all().select_related('user', 'model')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 5}
+    cache_groups = ['discussion:{pk}', 'model:{model_id}', 'categories', 'users']
+    validator_fields = ['model_id']
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            pageviews.record_view(self.kwargs['pk'], pageviews.viewer_key(request))
+        return response
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -214,23 +393,40 @@ class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
 # Comment Views
 # ------------------------------
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 5}
+    cache_groups = ['discussion:{discussion_id}', 'users']
 
     def get_queryset(self):
         discussion_id = self.kwargs.get('discussion_id')
-        return Comment.objects.filter(discussion_id=discussion_id).select_related('user', 'discussion')
+        # Display order of the thread; keyset-paginated on the materialized path
+        return Comment.objects.filter(discussion_id=discussion_id).select_related('user', 'discussion').order_by('path')
+
+    def get_serializer_context(self):
+        return dict(super().get_serializer_context(), discussion_id=self.kwargs.get('discussion_id'))
 
     def perform_create(self, serializer):
         discussion = get_object_or_404(Discussion, id=self.kwargs.get('discussion_id'))
         serializer.save(user=self.request.user, discussion=discussion)
 
 
+class CommentRepliesView(generics.ListAPIView):
+    """Paginated replies under a comment, for subtrees cut off by the tree limits"""
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 4
+
+    def get_queryset(self):
+        return Comment.objects.filter(parent_id=self.kwargs.get('pk')).select_related('user').order_by('path')
+
+
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Comment.objects.all().select_related('user', 'discussion')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = {'GET': 3}
 
     def perform_update(self, serializer):
         if self.request.user != serializer.instance.user:
@@ -241,3 +437,101 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.user != instance.user:
             raise permissions.PermissionDenied('You cannot delete this comment.')
         instance.delete()
+
+
+# ------------------------------
+# Vote Views
+# ------------------------------
+
+class VoteView(APIView):
+    """POST to vote for the target, DELETE to withdraw; both are idempotent"""
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+
+    def get_target(self):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def vote_response(self, target, voted):
+        _, counter = Vote.counted_model(Vote.target_type_of(target))
+        count = self.model.objects.filter(pk=target.pk).values_list(counter, flat=True).first()
+        return Response({'voted': voted, counter: count})
+
+    def post(self, request, pk):
+        target = self.get_target()
+        if isinstance(target, Review) and target.user_id == request.user.pk:
+            return Response({'detail': 'You cannot vote for your own review.'}, status=status.HTTP_400_BAD_REQUEST)
+        Vote.cast(request.user, target)
+        return self.vote_response(target, True)
+
+    def delete(self, request, pk):
+        target = self.get_target()
+        Vote.retract(request.user, target)
+        return self.vote_response(target, False)
+
+
+class ReviewHelpfulView(VoteView):
+    model = Review
+
+
+class DiscussionLikeView(VoteView):
+    model = Discussion
+
+
+class CommentLikeView(VoteView):
+    model = Comment
+
+
+# ------------------------------
+# Search Views
+# ------------------------------
+
+class SearchView(APIView):
+    """Ranked search across models, reviews, discussions and comments in one request"""
+    permission_classes = [permissions.AllowAny]
+    query_budget = 6
+    default_limit = 5
+    max_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        types = request.query_params.get('types')
+        kinds = [kind.strip() for kind in types.split(',')] if types else list(SEARCHABLES)
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        return Response({'query': query, 'results': search_all(query, kinds, limit)})
+
+
+# ------------------------------
+# Leaderboard Views
+# ------------------------------
+
+class LeaderboardView(APIView):
+    """
+    A precomputed top list: models overall, models in a category, or reviewers.
+    Served from its snapshot row; refreshed by `manage.py refresh_leaderboards`.
+    """
+    permission_classes = [permissions.AllowAny]
+    query_budget = 4
+    board = None
+
+    def get(self, request, pk=None, format=None):
+        board = self.board
+        if pk is not None:
+            get_object_or_404(ModelCategory.objects.only('pk'), pk=pk)
+            board = leaderboards.category_board(pk)
+        snapshot = leaderboards.get(board)
+        return Response({'board': board, 'refreshed_at': snapshot.refreshed_at, 'results': snapshot.entries})
+
+
+# ------------------------------
+# Metrics Views
+# ------------------------------
+
+class MetricsView(APIView):
+    """Query count and per-phase latency percentiles per endpoint, over this process's recent requests"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'window': metrics.window(), 'endpoints': metrics.recorder.report()})